@@ -0,0 +1,113 @@
+import io
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of the parsing / writing code of the dataset store at the time of this
+# migration, later changes to ``source.components.data_store`` must not change what it does.
+def _parse(name, data):
+    import pandas as pd
+
+    if name.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data), encoding='utf-8', on_bad_lines='skip')
+    return pd.read_excel(io.BytesIO(data))
+
+
+def _write(df, root):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = []
+    for col in df.columns:
+        try:
+            arrays.append(pa.array(df[col], from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            text = df[col].astype(str).where(df[col].notna(), None)
+            arrays.append(pa.array(text, type=pa.string(), from_pandas=True))
+    table = pa.Table.from_arrays(arrays, names=[str(col) for col in df.columns])
+
+    relative_path = uuid.uuid4().hex + '.parquet'
+    root.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, root / relative_path)
+    return {
+        'file_path': relative_path,
+        'rows': table.num_rows,
+        'columns': table.column_names,
+        'size_bytes': os.path.getsize(root / relative_path),
+    }
+
+
+def move_blobs_to_store(apps, schema_editor):
+    """
+    Parses the existing BinaryField blobs once and writes them to the dataset store.
+
+    The blob column is dropped right after, so a blob that cannot be parsed aborts
+    the migration (nothing is changed) instead of being lost.
+    """
+    UploadedFile = apps.get_model('erp_app', 'UploadedFile')
+    root = Path(settings.DATASET_STORE_DIR)
+    written = []
+    try:
+        for record in UploadedFile.objects.exclude(data=b'').iterator():
+            try:
+                df = _parse(record.name, bytes(record.data))
+            except Exception as e:
+                raise RuntimeError(
+                    f"Upload #{record.pk} '{record.name}' cannot be parsed ({e}). Export or delete it "
+                    f"before running this migration, its data would be lost otherwise.") from e
+            meta = _write(df, root)
+            written.append(meta['file_path'])
+            record.file_path = meta['file_path']
+            record.rows = meta['rows']
+            record.columns = meta['columns']
+            record.size_bytes = meta['size_bytes']
+            record.save(update_fields=['file_path', 'rows', 'columns', 'size_bytes'])
+    except Exception:
+        # The database changes are rolled back, the files written so far are removed too
+        for relative_path in written:
+            (root / relative_path).unlink(missing_ok=True)
+        raise
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='file_path',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='file_format',
+            field=models.CharField(default='parquet', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='rows',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='columns',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='size_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(move_blobs_to_store, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='uploadedfile',
+            name='data',
+        ),
+    ]
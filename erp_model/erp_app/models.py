@@ -15,8 +15,72 @@ class UploadedFile(models.Model):
     id = models.BigAutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
-    data = models.BinaryField()  # Stores file bytes directly
+    file_path = models.CharField(max_length=500, blank=True, default='')  # Columnar copy inside DATASET_STORE_DIR
+    file_format = models.CharField(max_length=20, default='parquet')
+    sheet = models.CharField(max_length=255, blank=True, default='')  # Worksheet of an Excel upload
+    workbook = models.CharField(max_length=32, blank=True, default='')  # Shared by the sheets of one Excel upload
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)  # sha256 of the uploaded content
+    rows = models.BigIntegerField(default=0)
+    columns = models.JSONField(default=list)
+    size_bytes = models.BigIntegerField(default=0)
+    summary = models.JSONField(default=dict)  # Running column stats computed while ingesting
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.name} uploaded by {self.user}"
+
+    @property
+    def dataset_id(self):
+        """Cache key of the stored data, uploads of identical content share their cached frames, profiles and figures."""
+        return self.content_hash or str(self.id)
+
+
+
+class AnalysisJob(models.Model):
+    """A unit of background work (summary, type inference, plot) run by the local job runner."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    uploaded_file = models.ForeignKey(UploadedFile, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0 - 100
+    message = models.CharField(max_length=255, blank=True, default='')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    worker_pid = models.PositiveIntegerField(null=True, blank=True)  # Pool worker running the job
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped by every progress report
+
+    def __str__(self):
+        return f"{self.kind} job #{self.id} ({self.status})"
+
+
+class TransformStep(models.Model):
+    """
+    One operation of the transformation log of an uploaded dataset.
+
+    Steps form a tree rooted at the ingested data (``parent`` is None), the step id
+    is the dataset version it produces. Only the delta (changed columns, kept rows)
+    is stored, see ``source.components.transform_log``.
+    """
+    id = models.BigAutoField(primary_key=True)
+    uploaded_file = models.ForeignKey(UploadedFile, on_delete=models.CASCADE, related_name='transform_steps')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    operation = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    columns = models.JSONField(default=list)  # Columns replaced or added by the step
+    dropped = models.JSONField(default=list)  # Columns removed by the step
+    rows_before = models.BigIntegerField(default=0)
+    rows_after = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.operation} step #{self.id} of {self.uploaded_file_id}"
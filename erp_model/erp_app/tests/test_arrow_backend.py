@@ -0,0 +1,77 @@
+#base library
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_store import DatasetStore
+from source.components.data_transformation import DataInfo
+
+
+class ArrowBackendTests(TempStoreMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        n = 5_000
+        self.df = pd.DataFrame({
+            'amount': rng.normal(size=n),
+            'qty': rng.integers(0, 100, n),
+            'region': rng.choice(['north', 'south', 'east', 'west'], n),
+            'invoice': [f'INV-{i:08d}' for i in range(n)],
+            'when': pd.date_range('2024-01-01', periods=n, freq='min'),
+        })
+        self.store = DatasetStore()
+        self.path = self.store.write(self.df)['file_path']
+
+    def test_arrow_backed_read(self):
+        df = self.store.read(self.path, dtype_backend='pyarrow')
+        self.assertIsInstance(df['amount'].dtype, pd.ArrowDtype)
+        self.assertIsInstance(df['invoice'].dtype, pd.ArrowDtype)
+        # Few distinct values, dictionary encoded and read as a sorted categorical
+        self.assertIsInstance(df['region'].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(df['region'].cat.categories), ['east', 'north', 'south', 'west'])
+
+        numpy = self.store.read(self.path, dtype_backend='numpy')
+        for col in self.df.columns:
+            self.assertEqual(df[col].astype(object).tolist(), numpy[col].astype(object).tolist())
+        self.assertLess(df['region'].memory_usage(deep=True), numpy['region'].memory_usage(deep=True))
+
+    def test_column_kinds_do_not_depend_on_the_backend(self):
+        self.assertEqual(DataInfo().get_datatype(self.store.read(self.path, dtype_backend='pyarrow')),
+                         DataInfo().get_datatype(self.store.read(self.path, dtype_backend='numpy')))
+
+    @override_settings(DATAFRAME_DTYPE_BACKEND='pyarrow')
+    def test_ipc_copy_is_written_once_and_refreshed(self):
+        arrow = self.store.arrow_path(self.path)
+        self.assertFalse(arrow.exists())
+        self.assertEqual(list(self.store.read(self.path, columns=['qty', 'when']).columns), ['qty', 'when'])
+        self.assertTrue(arrow.exists())
+
+        written = arrow.stat().st_mtime_ns
+        self.store.read(self.path)
+        self.assertEqual(arrow.stat().st_mtime_ns, written)
+
+        # A newer Parquet file (rewritten dataset) invalidates the copy
+        self.store.write(self.df.head(10), self.path)
+        stamp = arrow.stat().st_mtime - 10
+        os.utime(arrow, (stamp, stamp))
+        self.assertEqual(len(self.store.read(self.path)), 10)
+
+        self.store.delete(self.path)
+        self.assertFalse(arrow.exists())
+
+    def test_read_arrow_is_memory_mapped(self):
+        self.store.write_arrow(self.path)
+        allocated = pa.total_allocated_bytes()
+        table = self.store.read_arrow(self.path, ['amount', 'invoice'])
+        self.assertEqual(table.num_rows, len(self.df))
+        # Buffers point into the mapped file, the read allocates nothing
+        self.assertLess(pa.total_allocated_bytes() - allocated, 1024)
+        self.assertFalse(table.column('amount').chunk(0).buffers()[1].is_mutable)
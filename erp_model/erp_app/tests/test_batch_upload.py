@@ -0,0 +1,107 @@
+#base library
+import io
+import zipfile
+
+from openpyxl import Workbook
+
+#django library
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+#app Modules
+from erp_app.models import AnalysisJob, UploadedFile
+from erp_app.tests.utils import TempStoreMixin
+
+
+def workbook_bytes(sheets):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for row in rows:
+            sheet.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@override_settings(DATASET_SKETCHES=False)
+class BatchUploadTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='pw')
+        self.client.force_login(self.user)
+
+    def post(self, *files):
+        return self.client.post('/upload/batch/', {'files': list(files)})
+
+    def batch_jobs(self, response):
+        batch = response['Location'].rstrip('/').rsplit('/', 1)[-1]
+        return batch, list(AnalysisJob.objects.filter(kind='ingest', params__batch=batch).order_by('id'))
+
+    def test_every_file_of_the_batch_is_ingested(self):
+        archive = zip_bytes({
+            'nested/b.csv': b'x,y\n1,2\n3,4\n',
+            'book.xlsx': workbook_bytes({'orders': [('id', 'qty'), (1, 5)], 'blank': []}),
+            'notes.txt': b'not data',
+            '__MACOSX/._b.csv': b'junk',
+        })
+        response = self.post(SimpleUploadedFile('a.csv', b'a,b\n1,2\n'), SimpleUploadedFile('files.zip', archive))
+
+        batch, jobs = self.batch_jobs(response)
+        self.assertRedirects(response, f'/upload/batch/{batch}/', fetch_redirect_response=False)
+        self.assertEqual([job.params['name'] for job in jobs], ['a.csv', 'b.csv', 'book.xlsx'])
+        self.assertEqual({job.status for job in jobs}, {AnalysisJob.DONE})
+        self.assertIn("'notes.txt' is not a CSV or Excel file and was skipped.",
+                      [str(message) for message in get_messages(response.wsgi_request)])
+
+        records = UploadedFile.objects.filter(user=self.user).order_by('id')
+        self.assertEqual([(record.name, record.sheet, record.rows) for record in records],
+                         [('a.csv', '', 1), ('b.csv', '', 2), ('book.xlsx', 'orders', 1)])
+        # Staged copies are removed once parsed
+        self.assertEqual(list((self.store_dir / 'uploads').iterdir()), [])
+
+    def test_status_page_and_opening_a_file(self):
+        response = self.post(SimpleUploadedFile('a.csv', b'a,b\n1,2\n'))
+        batch, _ = self.batch_jobs(response)
+
+        page = self.client.get(f'/upload/batch/{batch}/')
+        self.assertEqual((page.context['done'], page.context['pending'], page.context['failed']), (1, 0, 0))
+
+        record = UploadedFile.objects.get(user=self.user)
+        response = self.client.post(f'/upload/batch/{batch}/', {'file_id': record.id})
+        self.assertRedirects(response, '/analysis/', fetch_redirect_response=False)
+        self.assertEqual(self.client.session['uploaded_file_id'], record.id)
+
+        other = User.objects.create_user('other', password='pw')
+        self.client.force_login(other)
+        self.assertRedirects(self.client.get(f'/upload/batch/{batch}/'), '/', fetch_redirect_response=False)
+
+    def test_a_broken_file_fails_only_its_job(self):
+        with self.assertLogs('source.components.job_queue', level='ERROR'):
+            response = self.post(SimpleUploadedFile('empty.csv', b''), SimpleUploadedFile('a.csv', b'a\n1\n'))
+        _, jobs = self.batch_jobs(response)
+        self.assertEqual([job.status for job in jobs], [AnalysisJob.FAILED, AnalysisJob.DONE])
+
+    @override_settings(BATCH_UPLOAD_MAX_FILES=1)
+    def test_too_many_files_are_rejected(self):
+        response = self.post(SimpleUploadedFile('a.csv', b'a\n1\n'), SimpleUploadedFile('b.csv', b'b\n2\n'))
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertFalse(AnalysisJob.objects.exists())
+        self.assertEqual(list((self.store_dir / 'uploads').iterdir()), [])
+
+    def test_batch_without_data_files(self):
+        response = self.post(SimpleUploadedFile('notes.txt', b'x'))
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertFalse(AnalysisJob.objects.exists())
@@ -0,0 +1,93 @@
+#base library
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from source.components import column_parallel, job_queue
+from source.components.data_transformation import _correct_columns
+
+
+def _slice_dtypes(frame):
+    """Column worker reporting the dtypes it was handed."""
+    return {col: frame[col].dtype for col in frame.columns}
+
+
+class ColumnParallelTests(SimpleTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        column_parallel.shutdown()
+        super().tearDownClass()
+
+    def frame(self):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame({f'c{i}': rng.integers(0, 100, 200).astype(str) if i % 2 else
+                             np.where(rng.random(200) < 0.5, 'x', 'y') for i in range(8)})
+
+    @override_settings(PARALLEL_MIN_COLUMNS=4)
+    def test_process_pool_matches_a_serial_run(self):
+        df = self.frame()
+        serial = column_parallel.map_columns(_correct_columns, df, workers=1)
+        parallel = column_parallel.map_columns(_correct_columns, df, workers=2)
+
+        self.assertEqual(sorted(parallel), sorted(serial))
+        for col, values in serial.items():
+            np.testing.assert_array_equal(parallel[col].to_numpy(), values.to_numpy())
+
+    def typed_frame(self):
+        rng = np.random.default_rng(1)
+        n = 200
+        amounts = rng.normal(100, 10, n)
+        return pd.DataFrame({
+            'count': pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(0, 9, n)), dtype='Int64'),
+            'amount': pd.Series(amounts, dtype=pd.ArrowDtype(pa.float64())),
+            'label': pd.Series(rng.choice(['a', 'b', None], n), dtype=pd.ArrowDtype(pa.string())),
+            'region': pd.Categorical(rng.choice(['n', 's'], n)),
+            'code': rng.integers(0, 100, n).astype(str),
+            'flag': pd.array(rng.random(n) < 0.5, dtype='boolean'),
+        })
+
+    @override_settings(PARALLEL_MIN_COLUMNS=4)
+    def test_workers_see_the_dtypes_of_a_serial_run(self):
+        df = self.typed_frame()
+        serial = column_parallel.map_columns(_slice_dtypes, df, workers=1)
+        parallel = column_parallel.map_columns(_slice_dtypes, df, workers=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial, dict(df.dtypes))
+
+        serial = column_parallel.map_columns(_correct_columns, df, workers=1)
+        parallel = column_parallel.map_columns(_correct_columns, df, workers=2)
+        self.assertEqual(sorted(parallel), sorted(serial))
+        for col, values in serial.items():
+            pd.testing.assert_series_equal(parallel[col], values, check_names=False, check_index=False)
+
+    @override_settings(PARALLEL_MIN_COLUMNS=4)
+    def test_pool_follows_the_worker_count(self):
+        df = self.frame()
+        column_parallel.map_columns(_slice_dtypes, df, workers=2)
+        self.assertEqual(column_parallel._executor_workers, 2)
+        column_parallel.map_columns(_slice_dtypes, df, workers=3)
+        self.assertEqual(column_parallel._executor_workers, 3)
+
+    @override_settings(COLUMN_WORKERS=16, JOB_WORKERS=2)
+    def test_job_workers_get_a_share_of_the_cpus(self):
+        self.assertEqual(column_parallel.resolve_workers(), 16)
+        with mock.patch.object(job_queue, '_job_worker', True), mock.patch.object(os, 'cpu_count', return_value=8):
+            self.assertEqual(column_parallel.resolve_workers(), 4)
+            self.assertEqual(column_parallel.resolve_workers(3), 3)
+
+    def test_default_settings_run_columns_serially_inside_a_job(self):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=job_queue.init_job_worker) as pool:
+            workers = pool.submit(column_parallel.resolve_workers).result()
+        # JOB_WORKERS and COLUMN_WORKERS both default to cpu_count
+        self.assertEqual(workers, 1)
@@ -0,0 +1,74 @@
+#base library
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.column_profile import ColumnProfiler, profile_column
+from source.components.data_analysis import UniVariate
+from source.components.data_cache import tag_dataset
+
+
+class ColumnProfileTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(50, 10, 5000)
+        values[rng.choice(5000, 100, replace=False)] = np.nan
+        self.df = pd.DataFrame({'amount': values, 'region': rng.choice(['n', 's', 'e', 'w'], 5000)})
+
+    def test_numeric_statistics_match_pandas(self):
+        series = self.df['amount']
+        profile = profile_column(series)
+
+        self.assertEqual((profile['count'], profile['nulls']), (series.count(), 100))
+        self.assertAlmostEqual(profile['mean'], series.mean())
+        self.assertAlmostEqual(profile['variance'], series.var())
+        self.assertAlmostEqual(profile['std'], series.std())
+        self.assertEqual((profile['min'], profile['max']), (series.min(), series.max()))
+        for q, value in profile['quantiles'].items():
+            self.assertAlmostEqual(value, series.quantile(q))
+        self.assertEqual(profile['distinct'], series.nunique())
+
+    def test_categorical_top_and_mode(self):
+        series = self.df['region']
+        profile = profile_column(series)
+        counts = series.value_counts()
+
+        self.assertEqual(profile['top'][0], (counts.index[0], counts.iloc[0]))
+        self.assertEqual(profile['mode'], series.mode().tolist())
+        self.assertNotIn('mean', profile)
+
+    def test_tied_modes_of_mixed_types(self):
+        profile = profile_column(pd.Series([1, 'a', 1, 'a', 'b'], dtype=object))
+        self.assertEqual(profile['mode'], [1, 'a'])
+
+    def test_describe_matches_pandas(self):
+        overview = ColumnProfiler().describe(self.df, workers=1)
+        expected = self.df.describe(include='all')
+
+        self.assertEqual(overview.loc['count', 'amount'], expected.loc['count', 'amount'])
+        self.assertAlmostEqual(overview.loc['50%', 'amount'], expected.loc['50%', 'amount'])
+        self.assertEqual(overview.loc['top', 'region'], expected.loc['top', 'region'])
+        self.assertEqual(overview.loc['freq', 'region'], expected.loc['freq', 'region'])
+
+    def test_profiles_of_a_dataset_version_are_cached(self):
+        profiler = ColumnProfiler()
+        df = tag_dataset(self.df.copy(deep=False), ('1', 0))
+        self.assertIs(profiler.profile(df, 'amount'), profiler.profile(df, 'amount'))
+        # Untagged frames are profiled every time
+        self.assertIsNot(profiler.profile(self.df, 'amount'), profiler.profile(self.df, 'amount'))
+
+    def test_univariate_statistics(self):
+        request = SimpleNamespace(user='analyst')
+        univariate, series = UniVariate(), self.df['amount']
+
+        self.assertAlmostEqual(univariate.mean(request, self.df, 'amount'), series.mean())
+        self.assertAlmostEqual(univariate.median(request, self.df, 'amount'), series.median())
+        self.assertAlmostEqual(univariate.standard_deviation(request, self.df, 'amount'), series.std())
+        self.assertAlmostEqual(univariate.range(request, self.df, 'amount'), series.max() - series.min())
+        self.assertEqual(univariate.mode(request, self.df, 'region').tolist(), self.df['region'].mode().tolist())
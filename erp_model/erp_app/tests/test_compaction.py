@@ -0,0 +1,89 @@
+#base library
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.data_transformation import ColumnTranformer, DataInfo, column_kind
+
+
+class CompactColumnsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.transformer = ColumnTranformer()
+
+    def test_numeric_downcasts(self):
+        df = pd.DataFrame({
+            'small': np.arange(100, dtype='int64'),
+            'wide': np.arange(100, dtype='int64') * 1_000,
+            'ids_with_blanks': [float(i) if i % 10 else np.nan for i in range(100)],
+            'halves': np.arange(100) / 2,
+            'decimals': np.arange(100) / 10,
+            'huge': np.full(100, 2 ** 53 + 1, dtype='int64'),
+        })
+        compacted = self.transformer.compact_columns(df)
+
+        self.assertEqual(compacted['small'].dtype, np.int8)
+        self.assertEqual(compacted['wide'].dtype, np.int32)
+        self.assertEqual(compacted['ids_with_blanks'].dtype, pd.Int8Dtype())
+        self.assertEqual(compacted['halves'].dtype, np.float32)
+        # 0.1 has no exact float32, huge already has the narrowest width
+        self.assertNotIn('decimals', compacted)
+        self.assertNotIn('huge', compacted)
+        for col, values in compacted.items():
+            np.testing.assert_array_equal(values.to_numpy(dtype='float64', na_value=np.nan), df[col].to_numpy(dtype='float64'))
+
+    def test_text_becomes_categorical_below_the_ratio(self):
+        df = pd.DataFrame({'region': ['n', 's'] * 50, 'invoice': [f'INV-{i}' for i in range(100)]})
+        compacted = self.transformer.compact_columns(df, category_max_ratio=0.5)
+        self.assertIsInstance(compacted['region'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compacted['region'].tolist(), df['region'].tolist())
+        self.assertNotIn('invoice', compacted)
+        self.assertLess(compacted['region'].memory_usage(deep=True), df['region'].memory_usage(deep=True))
+
+    def test_arrow_columns_stay_arrow_backed(self):
+        df = pd.DataFrame({'qty': pd.array(range(100), dtype='int64[pyarrow]'),
+                           'price': pd.array(np.arange(100) / 4, dtype='double[pyarrow]')})
+        compacted = self.transformer.compact_columns(df)
+        self.assertEqual(compacted['qty'].dtype, pd.ArrowDtype(pa.int8()))
+        self.assertEqual(compacted['price'].dtype, pd.ArrowDtype(pa.float32()))
+
+    def test_auto_correct_compacts_the_result(self):
+        df = pd.DataFrame({'qty': [str(i % 50) for i in range(200)], 'region': ['n', 's', 'e', 'w'] * 50})
+        corrected, original = self.transformer.auto_correct_datatypes(df, workers=1)
+        self.assertEqual(corrected['qty'].dtype, np.int8)
+        self.assertIsInstance(corrected['region'].dtype, pd.CategoricalDtype)
+        self.assertIs(original, df)
+        self.assertEqual(self.transformer.auto_correct_datatypes(df, workers=1, compact=False)[0]['qty'].dtype, np.int64)
+
+
+class ColumnKindTests(SimpleTestCase):
+
+    def test_compact_and_nullable_dtypes(self):
+        kinds = {
+            'int8': 'Numeric', 'float32': 'Numeric', 'Int16': 'Numeric', 'Float32': 'Numeric',
+            'bool': 'Categorical', 'boolean': 'Categorical', 'object': 'Categorical', 'str': 'Categorical',
+            'category': 'Categorical', 'datetime64[ns]': 'DateTime',
+        }
+        for dtype, kind in kinds.items():
+            with self.subTest(dtype=dtype):
+                self.assertEqual(column_kind(pd.Series([], dtype=dtype).dtype), kind)
+
+    def test_arrow_dtypes(self):
+        kinds = {
+            pa.int8(): 'Numeric', pa.float32(): 'Numeric', pa.decimal128(10, 2): 'Numeric',
+            pa.bool_(): 'Categorical', pa.string(): 'Categorical',
+            pa.dictionary(pa.int32(), pa.string()): 'Categorical', pa.timestamp('us'): 'DateTime',
+            pa.date32(): 'DateTime',
+        }
+        for arrow_type, kind in kinds.items():
+            with self.subTest(type=str(arrow_type)):
+                self.assertEqual(column_kind(pd.ArrowDtype(arrow_type)), kind)
+
+    def test_get_datatype(self):
+        df = pd.DataFrame({'a': pd.Series([1, None], dtype='Int8'), 'b': pd.Categorical(['x', 'y']),
+                           'c': pd.to_datetime(['2024-01-01', '2024-01-02'])})
+        self.assertEqual(DataInfo().get_datatype(df), {'Numeric': ['a'], 'Categorical': ['b'], 'DateTime': ['c']})
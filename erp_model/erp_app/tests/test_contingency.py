@@ -0,0 +1,87 @@
+#base library
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2_contingency
+from scipy.stats.contingency import association
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components import contingency
+from source.components.contingency import ContingencyEngine
+from source.components.data_analysis import BiVariateCategorical
+
+
+class ContingencyTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = ContingencyEngine()
+        rng = np.random.default_rng(0)
+        n = 10_000
+        region = rng.choice(['n', 's', 'e', 'w'], n)
+        # Channel depends on the region, so the test has something to find
+        channel = np.where(rng.random(n) < 0.3, 'shop', rng.choice(['web', 'phone', 'shop'], n))
+        channel = np.where((region == 'n') & (rng.random(n) < 0.2), 'web', channel)
+        self.df = pd.DataFrame({'region': region, 'channel': channel, 'flag': rng.choice(['y', 'n'], n),
+                                'other': rng.choice(['a', 'b'], n)})
+        self.df.loc[[1, 2, 3], 'region'] = None
+
+    def assertMatchesScipy(self, x, y, correction=True):
+        crosstab = pd.crosstab(self.df[x], self.df[y])
+        expected = chi2_contingency(crosstab.to_numpy(), correction=correction)
+        result = self.engine.chi_square(self.df, x, y, correction=correction)
+        self.assertAlmostEqual(result['chi2'], expected.statistic, places=6)
+        self.assertAlmostEqual(result['p_value'], expected.pvalue, places=10)
+        self.assertEqual(result['dof'], expected.dof)
+        self.assertEqual(result['n'], crosstab.to_numpy().sum())
+        self.assertAlmostEqual(result['cramers_v'], association(crosstab.to_numpy(), method='cramer'), places=10)
+        return result
+
+    def test_chi_square_matches_scipy(self):
+        result = self.assertMatchesScipy('region', 'channel')
+        self.assertEqual((result['rows'], result['columns'], result['dof']), (4, 3, 6))
+        self.assertLess(result['p_value'], 1e-6)
+
+    def test_two_by_two_uses_yates_correction(self):
+        self.assertMatchesScipy('flag', 'other', correction=True)
+        self.assertMatchesScipy('flag', 'other', correction=False)
+
+    def test_sparse_counting_gives_the_same_table(self):
+        dense = self.engine.table(self.df, 'region', 'channel')
+        with mock.patch.object(contingency, 'DENSE_CELLS', 0):
+            sparse = ContingencyEngine().table(self.df, 'region', 'channel')
+            self.assertAlmostEqual(ContingencyEngine().chi_square(self.df, 'region', 'channel')['chi2'],
+                                   self.engine.chi_square(self.df, 'region', 'channel')['chi2'])
+        crosstab = pd.crosstab(self.df['region'], self.df['channel'])
+        for matrix, rows, cols in (dense, sparse):
+            np.testing.assert_array_equal(matrix.toarray(), crosstab.to_numpy())
+            self.assertEqual(list(rows), list(crosstab.index))
+            self.assertEqual(list(cols), list(crosstab.columns))
+
+    def test_expected_frequencies(self):
+        crosstab = pd.crosstab(self.df['region'], self.df['channel']).to_numpy()
+        np.testing.assert_allclose(self.engine.expected(self.df, 'region', 'channel'),
+                                   chi2_contingency(crosstab).expected_freq)
+
+    def test_single_level_has_no_test(self):
+        df = pd.DataFrame({'a': ['x'] * 10, 'b': ['p', 'q'] * 5})
+        result = self.engine.chi_square(df, 'a', 'b')
+        self.assertEqual((result['chi2'], result['p_value'], result['dof']), (0.0, 1.0, 0))
+
+    def test_association_matrix(self):
+        columns = ['region', 'channel', 'flag']
+        matrix = self.engine.association_matrix(self.df, columns)
+        self.assertEqual(list(matrix.columns), columns)
+        for x in columns:
+            for y in columns:
+                expected = 1.0 if x == y else association(pd.crosstab(self.df[x], self.df[y]).to_numpy(), method='cramer')
+                self.assertAlmostEqual(matrix.loc[x, y], expected, places=10)
+
+    def test_chisquaretest_result(self):
+        result = BiVariateCategorical().chisquaretest(self.df, ['region', 'channel'])
+        expected = chi2_contingency(pd.crosstab(self.df['region'], self.df['channel']).to_numpy())
+        self.assertAlmostEqual(result['Chi-Square Statistic'], expected.statistic, places=6)
+        np.testing.assert_allclose(result['Expected Frequencies'], expected.expected_freq)
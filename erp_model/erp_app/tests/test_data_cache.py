@@ -0,0 +1,94 @@
+#base library
+import pandas as pd
+
+#django library
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+
+#app Modules
+from erp_app.models import UploadedFile
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_cache import DataFrameCache, dataset_key, load_dataset
+
+
+class DataFrameCacheTests(TempStoreMixin, SimpleTestCase):
+
+    def frame(self, rows=100):
+        return pd.DataFrame({'a': range(rows), 'b': [float(i) for i in range(rows)]})
+
+    def test_get_returns_a_tagged_copy(self):
+        cache = DataFrameCache(spill_dir=None)
+        cache.put('7', 0, self.frame())
+        df = cache.get('7', 0)
+
+        self.assertEqual(dataset_key(df), ('7', 0))
+        df['a'] = 0
+        self.assertEqual(cache.get('7', 0)['a'].iloc[5], 5)
+        self.assertIsNone(cache.get('7', 1))
+        # Frames derived from a cached one are not tagged
+        self.assertIsNone(dataset_key(df[df['a'] > 1]))
+
+    def test_least_recently_used_frames_are_evicted(self):
+        cache = DataFrameCache(max_items=2, spill_dir=None)
+        for version in range(3):
+            cache.put('1', version, self.frame())
+        cache.get('1', 1)
+        cache.put('1', 3, self.frame())
+
+        self.assertIsNone(cache.get('1', 0))
+        self.assertIsNone(cache.get('1', 2))
+        self.assertIsNotNone(cache.get('1', 1))
+        self.assertEqual(cache.stats()['items'], 2)
+
+    def test_byte_budget_is_enforced(self):
+        size = int(self.frame(1000).memory_usage(deep=True).sum())
+        cache = DataFrameCache(max_bytes=int(size * 2.5), spill_dir=None)
+        for version in range(4):
+            cache.put('1', version, self.frame(1000))
+        self.assertLessEqual(cache.stats()['bytes'], size * 2.5)
+        self.assertEqual(cache.stats()['items'], 2)
+
+    def test_persisted_versions_survive_eviction_and_invalidate(self):
+        cache = DataFrameCache(max_items=1, spill_dir=self.store_dir / 'spill')
+        cache.put('9', 4, self.frame(), persist=True)
+        cache.put('9', 5, self.frame(3))
+        pd.testing.assert_frame_equal(cache.get('9', 4), self.frame(), check_dtype=False)
+
+        cache.invalidate('9')
+        self.assertIsNone(cache.get('9', 4))
+        self.assertEqual(cache.stats()['items'], 0)
+
+    def test_get_or_load_calls_the_loader_once(self):
+        cache = DataFrameCache(spill_dir=None)
+        calls = []
+        loader = lambda: calls.append(1) or self.frame()
+        first = cache.get_or_load('3', 0, loader)
+        second = cache.get_or_load('3', 0, loader)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(dataset_key(first), dataset_key(second))
+
+
+class SessionHandleTests(TempStoreMixin, TestCase):
+    """The session carries a (file id, version) handle, the frame itself stays on the server."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+
+    def test_upload_keeps_only_the_handle_in_the_session(self):
+        upload = SimpleUploadedFile('sales.csv', b'region,amount\nnorth,10\nsouth,20\n')
+        response = self.client.post('/upload/', {'file': upload})
+        self.assertEqual(response.status_code, 302)
+
+        record = UploadedFile.objects.get(user=self.user)
+        session = self.client.session
+        self.assertEqual(session['uploaded_file_id'], record.id)
+        self.assertEqual(session['df_version'], 0)
+        self.assertNotIn('df', session.keys())
+        self.assertLess(len(session.encode(dict(session.items()))), 1024)
+
+        df = load_dataset(record)
+        self.assertEqual(df['amount'].tolist(), [10, 20])
+        self.assertEqual(dataset_key(df), (record.dataset_id, 0))
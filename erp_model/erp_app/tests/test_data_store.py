@@ -0,0 +1,86 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TransactionTestCase
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_store import DatasetStore
+
+
+class DatasetStoreTests(TempStoreMixin, SimpleTestCase):
+
+    def test_write_read_round_trip(self):
+        store = DatasetStore()
+        df = pd.DataFrame({'id': [1, 2, 3], 'price': [1.5, np.nan, 3.25], 'name': ['a', None, 'c']})
+        meta = store.write(df)
+
+        self.assertEqual(meta['rows'], 3)
+        self.assertEqual(meta['columns'], ['id', 'price', 'name'])
+        self.assertTrue(store.exists(meta['file_path']))
+        result = store.read(meta['file_path'], dtype_backend='numpy')
+        pd.testing.assert_frame_equal(result, df, check_dtype=False)
+        self.assertEqual(list(store.read(meta['file_path'], columns=['price'], dtype_backend='numpy').columns), ['price'])
+
+    def test_mixed_object_column_is_kept_as_text(self):
+        store = DatasetStore()
+        meta = store.write(pd.DataFrame({'mixed': [1, 'a', None]}))
+        values = store.read(meta['file_path'], dtype_backend='numpy')['mixed'].tolist()
+        self.assertEqual(values[:2], ['1', 'a'])
+        self.assertTrue(pd.isna(values[2]))
+
+    def test_delete_removes_the_file(self):
+        store = DatasetStore()
+        meta = store.write(pd.DataFrame({'a': [1]}))
+        store.delete(meta['file_path'])
+        self.assertFalse(store.exists(meta['file_path']))
+
+
+class BlobMigrationTests(TempStoreMixin, TransactionTestCase):
+    """0002 moves the upload blobs into the store before dropping the blob column."""
+
+    before = [('erp_app', '0001_initial')]
+    after = [('erp_app', '0002_uploadedfile_dataset_store')]
+
+    def setUp(self):
+        super().setUp()
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.executor.loader.build_graph()
+        apps = self.executor.loader.project_state(self.before).apps
+        self.UploadedFile = apps.get_model('erp_app', 'UploadedFile')
+        self.user = apps.get_model('auth', 'User').objects.create(username='owner')
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def migrate(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.after)
+        return self.executor.loader.project_state(self.after).apps.get_model('erp_app', 'UploadedFile')
+
+    def test_blobs_are_written_to_the_store(self):
+        record = self.UploadedFile.objects.create(user=self.user, name='sales.csv', data=b'a,b\n1,x\n2,y\n')
+        UploadedFile = self.migrate()
+
+        migrated = UploadedFile.objects.get(pk=record.pk)
+        self.assertEqual((migrated.rows, migrated.columns), (2, ['a', 'b']))
+        df = DatasetStore().read(migrated.file_path, dtype_backend='numpy')
+        self.assertEqual(df['b'].tolist(), ['x', 'y'])
+
+    def test_unparseable_blob_aborts_the_migration(self):
+        self.UploadedFile.objects.create(user=self.user, name='good.csv', data=b'a\n1\n')
+        self.UploadedFile.objects.create(user=self.user, name='broken.xlsx', data=b'not a workbook')
+
+        with self.assertRaisesRegex(RuntimeError, 'broken.xlsx'):
+            self.migrate()
+        # Nothing is dropped and the files written before the failure are removed
+        self.assertEqual(self.UploadedFile.objects.filter(data=b'not a workbook').count(), 1)
+        self.assertEqual(list(self.store_dir.glob('*.parquet')), [])
+        self.UploadedFile.objects.filter(name='broken.xlsx').delete()
@@ -0,0 +1,60 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from source.components import decimation
+from source.components.plotly_calc import TwoVariableNumeric
+
+
+class DecimationTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'x': np.arange(50_000, dtype=float), 'y': np.sin(np.arange(50_000) / 500) + rng.normal(0, 0.01, 50_000),
+                                'group': rng.choice(['a', 'b', 'rare'], 50_000, p=[0.7, 0.2999, 0.0001])})
+
+    def test_lttb_keeps_the_ends_and_the_extremes(self):
+        x, y = self.df['x'].to_numpy(), self.df['y'].to_numpy()
+        index = decimation.lttb(x, y, 1000)
+
+        self.assertEqual(len(index), 1000)
+        self.assertEqual((index[0], index[-1]), (0, len(x) - 1))
+        self.assertTrue(np.all(np.diff(index) > 0))
+        self.assertAlmostEqual(y[index].max(), y.max(), delta=0.05)
+        self.assertAlmostEqual(y[index].min(), y.min(), delta=0.05)
+
+    def test_small_frames_are_not_decimated(self):
+        data, total = decimation.decimate_line(self.df.head(100), 'x', 'y', budget=1000)
+        self.assertEqual((len(data), total), (100, 100))
+
+    def test_stratified_sample_keeps_every_group(self):
+        data, total = decimation.sample_rows(self.df, budget=500, by='group')
+        self.assertEqual(total, 50_000)
+        self.assertAlmostEqual(len(data), 500, delta=5)
+        self.assertEqual(set(data['group']), {'a', 'b', 'rare'})
+
+    def test_2d_bins_hold_every_row(self):
+        xs, ys, counts = decimation.bin_2d(self.df, 'x', 'y', bins=50)
+        self.assertEqual(counts.shape, (50, 50))
+        self.assertEqual(np.nansum(counts), len(self.df))
+
+    @override_settings(PLOT_POINT_BUDGET=1000)
+    def test_binned_scatter_reports_rows_and_bins(self):
+        df = self.df.copy()
+        df.loc[:99, 'y'] = np.nan
+        fig = TwoVariableNumeric().scatter(df, 'x', 'y')
+        bins = int(np.isfinite(fig.data[0].z.astype(float)).sum())
+
+        self.assertEqual(fig.layout.meta['shown_rows'], 49_900)
+        self.assertEqual(fig.layout.meta['bins'], bins)
+        self.assertIn(f'49,900 of 50,000 rows in {bins:,} bins', fig.layout.title.text)
+
+    @override_settings(PLOT_POINT_BUDGET=1000)
+    def test_decimated_line_reports_the_points_shown(self):
+        fig = TwoVariableNumeric().line(self.df, 'x', 'y')
+        self.assertEqual(len(fig.data[0].x), 1000)
+        self.assertEqual(fig.layout.meta['total_rows'], 50_000)
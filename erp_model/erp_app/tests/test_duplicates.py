@@ -0,0 +1,73 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.duplicates import DuplicateEngine
+
+
+class DuplicateEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = DuplicateEngine()
+        rng = np.random.default_rng(0)
+        n = 20_000
+        self.df = pd.DataFrame({
+            'customer': rng.choice(['acme', 'globex', 'initech', None], n),
+            'region': pd.Categorical(rng.choice(['n', 's', 'e'], n)),
+            'qty': rng.integers(0, 5, n),
+            'price': rng.choice([1.5, 2.0, np.nan], n),
+            'when': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 3, n), unit='D'),
+        })
+
+    def test_duplicated_matches_pandas(self):
+        for keep in ('first', 'last', False):
+            with self.subTest(keep=keep):
+                np.testing.assert_array_equal(self.engine.duplicated(self.df, keep=keep),
+                                              self.df.duplicated(keep=keep).to_numpy())
+
+    def test_subset_matches_pandas(self):
+        for columns in (['customer'], ['qty', 'price'], ['region', 'when']):
+            with self.subTest(columns=columns):
+                np.testing.assert_array_equal(self.engine.duplicated(self.df, columns),
+                                              self.df.duplicated(columns).to_numpy())
+
+    def test_scan_counts_rows_and_columns(self):
+        report = self.engine.scan(self.df)
+        self.assertEqual(report['rows'], len(self.df))
+        self.assertEqual(report['duplicate_rows'], self.df.duplicated().sum())
+        self.assertEqual(report['columns'], {col: int(self.df[col].duplicated().sum()) for col in self.df.columns})
+
+    def test_arrow_backed_frame_gives_the_same_rows(self):
+        arrow = self.df.astype({'customer': 'string[pyarrow]', 'qty': 'int64[pyarrow]', 'price': 'double[pyarrow]'})
+        np.testing.assert_array_equal(self.engine.duplicated(arrow), self.df.duplicated().to_numpy())
+
+
+class NearDuplicateTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = DuplicateEngine(threshold=0.7)
+
+    def test_loose_spellings_share_a_code(self):
+        names = pd.Series(['ACME Inc.', 'Acme Incorporated', 'acme, inc', 'Globex Corporation', 'GLOBEX corp',
+                           'Initech', None])
+        codes = self.engine.near_codes(names)
+        self.assertEqual(len(set(codes[:3])), 1)
+        self.assertEqual(codes[3], codes[4])
+        self.assertEqual(len({codes[0], codes[3], codes[5]}), 3)
+        self.assertEqual(codes[6], -1)
+
+    def test_numbers_keep_names_apart(self):
+        codes = self.engine.near_codes(pd.Series(['Store 12 Berlin', 'Store 13 Berlin', 'store 12, berlin']))
+        self.assertNotEqual(codes[0], codes[1])
+        self.assertEqual(codes[0], codes[2])
+
+    def test_near_rows(self):
+        df = pd.DataFrame({'name': ['ACME Inc.', 'acme incorporated', 'Globex'], 'city': ['Rome', 'Rome', 'Rome']})
+        self.assertEqual(self.engine.duplicated(df).tolist(), [False, False, False])
+        self.assertEqual(self.engine.duplicated(df, near=['name']).tolist(), [False, True, False])
+        self.assertEqual(self.engine.scan(df, near=['name'])['duplicate_rows'], 1)
+        self.assertEqual(self.engine.near_groups(df['name']), [['ACME Inc.', 'acme incorporated']])
@@ -0,0 +1,82 @@
+#base library
+import datetime
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin
+from source.components import excel_reader
+from source.components.data_ingestion import DataIngestion
+from source.components.data_store import DatasetStore
+
+
+def write_workbook(path, sheets):
+    """Writes ``{sheet: rows}`` to an xlsx, the first row of every sheet is its header."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for row in rows:
+            sheet.append(list(row))
+    workbook.save(path)
+
+
+# Excel keeps numbers as doubles, ids up to 2**53 are exact
+ORDERS = [
+    ('id', 'code', 'amount', 'when', None, 'id'),
+    (10 ** 15 + 7, 1, 10, datetime.datetime(2024, 1, 1), None, 'a'),
+    (2, 2, 20, datetime.datetime(2024, 1, 2), None, 'b'),
+    (None, None, None, None, None, None),
+    (3, 3, None, None, None, 'c'),
+    (None, 'ABC', 40.5, datetime.datetime(2024, 1, 4), None, 'd'),
+    (5, 'XYZ', 50.25, datetime.datetime(2024, 1, 5)),
+]
+
+
+@override_settings(CSV_CHUNK_ROWS=3, DATASET_SKETCHES=False)
+class ExcelReaderTests(TempStoreMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        folder = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        self.path = folder / 'book.xlsx'
+        write_workbook(self.path, {'orders': ORDERS, 'empty': []})
+
+    def test_sheet_names(self):
+        self.assertEqual(excel_reader.sheet_names(self.path), ['orders', 'empty'])
+
+    def test_chunks_have_nullable_dtypes(self):
+        chunks = list(excel_reader.read_sheet_chunks(self.path, 'orders', chunk_rows=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 3])
+        first = chunks[0]
+        self.assertEqual(list(first.columns), ['id', 'code', 'amount', 'when', 'Unnamed: 4', 'id.1'])
+        self.assertEqual(first['id'].dtype, pd.Int64Dtype())
+        self.assertEqual(first['id'].iloc[0], 10 ** 15 + 7)
+        self.assertEqual(chunks[1]['amount'].dtype, pd.Float64Dtype())
+        self.assertEqual(chunks[1]['code'].dtype, object)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(first['when']))
+
+    def test_stored_sheet_keeps_exact_integers_and_widens_drifting_columns(self):
+        meta = DataIngestion().store_sheet(self.path, 'orders')
+        df = DatasetStore().read(meta['file_path'], dtype_backend='pyarrow')
+
+        self.assertEqual(meta['rows'], 5)
+        self.assertEqual(str(df['id'].dtype), 'int64[pyarrow]')
+        self.assertEqual(df['id'].iloc[0], 10 ** 15 + 7)
+        self.assertTrue(pd.isna(df['id'].iloc[3]))
+        self.assertEqual(df['code'].tolist()[3:], ['ABC', 'XYZ'])
+        self.assertEqual(df['code'].tolist()[:2], ['1', '2'])
+        self.assertEqual(df['amount'].tolist()[3:], [40.5, 50.25])
+        self.assertEqual(df['amount'].iloc[0], 10)
+
+    def test_empty_sheet_raises(self):
+        with self.assertRaises(pd.errors.EmptyDataError):
+            DataIngestion().store_sheet(self.path, 'empty')
@@ -0,0 +1,64 @@
+#base library
+import json
+
+import pandas as pd
+import plotly.graph_objects as go
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_cache import tag_dataset
+from source.components.figure_cache import FigureCache
+
+
+class FigureCacheTests(TempStoreMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = FigureCache(cache_dir=self.store_dir / 'figures')
+        self.calls = []
+
+        @self.cache.cached
+        def build(request, df, column, theme=None):
+            self.calls.append(column)
+            return go.Figure(go.Bar(x=df[column].tolist(), y=[1] * len(df)), layout={'title': {'text': column}})
+        self.build = build
+        self.df = pd.DataFrame({'a': [1, 2, 3], 'b': [4, 5, 6]})
+
+    def test_figures_of_a_dataset_version_are_built_once(self):
+        df = tag_dataset(self.df.copy(deep=False), ('1', 0))
+        first = self.build('req-1', df, 'a')
+        second = self.build('req-2', df, 'a')
+
+        self.assertEqual(self.calls, ['a'])
+        self.assertEqual(json.loads(first.to_json()), json.loads(second.to_json()))
+        # Other arguments and other versions are separate entries
+        self.build(None, df, 'a', theme='plotly_dark')
+        self.build(None, tag_dataset(self.df.copy(deep=False), ('1', 2)), 'a')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_untagged_frames_are_always_built(self):
+        self.build(None, self.df, 'a')
+        self.build(None, self.df, 'a')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_disk_tier_is_shared_and_invalidated(self):
+        df = tag_dataset(self.df.copy(deep=False), ('7', 3))
+        self.build(None, df, 'b')
+        other = FigureCache(cache_dir=self.store_dir / 'figures')
+        key = next(iter(self.cache._figures))
+        self.assertEqual(other.get(key).layout.title.text, 'b')
+
+        other.invalidate('7', version=3)
+        self.cache.invalidate('7')
+        self.assertIsNone(self.cache.get(key))
+
+    @override_settings(FIGURE_CACHE_DIR=None)
+    def test_memory_tier_is_bounded(self):
+        cache = FigureCache(max_items=2)
+        for index in range(3):
+            cache.put(f'1-v0-{index}', go.Figure())
+        self.assertEqual(cache.stats()['items'], 2)
+        self.assertIsNone(cache.get('1-v0-0'))
@@ -0,0 +1,72 @@
+#base library
+import base64
+import gzip
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.figure_export import compact_figure, encode_body, template_json
+
+
+def decode(typed):
+    values = np.frombuffer(base64.b64decode(typed['bdata']), dtype=typed['dtype'])
+    if 'shape' in typed:
+        values = values.reshape([int(size) for size in typed['shape'].split(',')])
+    return values
+
+
+class CompactFigureTests(SimpleTestCase):
+
+    def test_roundtrip_decodes_to_the_plotted_values(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=1_000)
+        y = rng.integers(0, 100, 1_000)
+        fig = go.Figure(go.Scatter(x=x, y=y, mode='markers'))
+        fig.update_layout(template='plotly_white')
+
+        compact = compact_figure(fig)
+        trace = compact['data'][0]
+        self.assertEqual(compact['template'], 'plotly_white')
+        self.assertNotIn('template', compact['layout'])
+        self.assertEqual(trace['y']['dtype'], 'i1')
+        np.testing.assert_array_equal(decode(trace['y']), y)
+        self.assertEqual(trace['x']['dtype'], 'f4')
+        np.testing.assert_allclose(decode(trace['x']), x, rtol=1e-6)
+        self.assertLess(len(json.dumps(compact)), len(fig.to_json()))
+
+    def test_large_values_in_a_narrow_range_keep_float64(self):
+        values = 1234567.89 + np.arange(20) * 0.01
+        fig = go.Figure(go.Scatter(x=np.arange(20), y=values))
+        trace = compact_figure(fig)['data'][0]
+        self.assertEqual(trace['y']['dtype'], 'f8')
+        np.testing.assert_array_equal(decode(trace['y']), values)
+
+    def test_customdata_is_never_narrowed(self):
+        values = np.linspace(0, 1, 50)
+        fig = go.Figure(go.Scatter(x=values, y=values, customdata=values * 1234567.89))
+        trace = compact_figure(fig)['data'][0]
+        self.assertEqual(trace['x']['dtype'], 'f4')
+        self.assertEqual(trace['customdata']['dtype'], 'f8')
+        np.testing.assert_array_equal(decode(trace['customdata']), values * 1234567.89)
+
+    def test_heatmap_keeps_its_shape(self):
+        z = np.arange(30, dtype=float).reshape(5, 6)
+        trace = compact_figure(go.Figure(go.Heatmap(z=z)))['data'][0]
+        np.testing.assert_array_equal(decode(trace['z']), z)
+
+    def test_template_json_rejects_unknown_theme(self):
+        self.assertIn('layout', json.loads(template_json('plotly')))
+        with self.assertRaises(ValueError):
+            template_json('bogus')
+
+    def test_encode_body(self):
+        payload = json.dumps({'values': list(range(1_000))})
+        body, encoding = encode_body(payload, 'gzip, deflate')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(body).decode('utf-8'), payload)
+        self.assertEqual(encode_body(payload, ''), (payload.encode('utf-8'), None))
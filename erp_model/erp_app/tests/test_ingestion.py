@@ -0,0 +1,77 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_ingestion import DataIngestion
+from source.components.data_store import DatasetStore
+from source.components.running_stats import RunningStats
+
+DRIFTING_CSV = (
+    b'id,code,amount,label\n'
+    b'9007199254740993,1,1.5,a\n'
+    b'2,2,2.5,b\n'
+    b'3,3,,c\n'
+    b'4,ABC,4.5,d\n'
+    b',XYZ,5.5,e\n'
+    b'6,x,6.5,f\n'
+)
+
+
+@override_settings(CSV_CHUNK_ROWS=3, DATASET_SKETCHES=False)
+class ChunkedCsvTests(TempStoreMixin, SimpleTestCase):
+
+    def ingest(self, content: bytes):
+        meta = DataIngestion().store_upload(SimpleUploadedFile('data.csv', content))
+        return meta, DatasetStore().read(meta['file_path'], dtype_backend='pyarrow')
+
+    def test_text_in_a_later_chunk_widens_the_column(self):
+        meta, df = self.ingest(DRIFTING_CSV)
+
+        self.assertEqual(meta['rows'], 6)
+        self.assertEqual(df['code'].tolist(), ['1', '2', '3', 'ABC', 'XYZ', 'x'])
+        self.assertEqual(meta['summary']['columns']['code'], {'count': 6, 'nulls': 0})
+
+    def test_integers_stay_exact(self):
+        _, df = self.ingest(DRIFTING_CSV)
+
+        self.assertEqual(str(df['id'].dtype), 'int64[pyarrow]')
+        self.assertEqual(df['id'].iloc[0], 2 ** 53 + 1)
+        self.assertTrue(pd.isna(df['id'].iloc[4]))
+
+    def test_decimals_in_a_later_chunk_widen_integers_to_float(self):
+        _, df = self.ingest(b'n\n1\n2\n3\n4.5\n')
+        self.assertEqual(df['n'].tolist(), [1.0, 2.0, 3.0, 4.5])
+
+    def test_matches_a_single_read(self):
+        rng = np.random.default_rng(0)
+        expected = pd.DataFrame({'a': rng.integers(0, 1000, 50), 'b': rng.normal(size=50).round(6),
+                                 'c': rng.choice(['x', 'y', 'z'], 50)})
+        expected.loc[[7, 30], 'b'] = np.nan
+        meta, df = self.ingest(expected.to_csv(index=False).encode('utf-8'))
+
+        pd.testing.assert_frame_equal(df.astype(object).where(df.notna(), np.nan),
+                                      expected.astype(object), check_dtype=False)
+        self.assertAlmostEqual(meta['summary']['columns']['b']['mean'], expected['b'].mean())
+        self.assertAlmostEqual(meta['summary']['columns']['b']['variance'], expected['b'].var())
+        self.assertEqual(meta['summary']['columns']['b']['nulls'], 2)
+
+
+class RunningStatsTests(SimpleTestCase):
+
+    def test_chunks_merge_to_the_full_scan(self):
+        values = pd.Series(np.random.default_rng(1).normal(5, 2, 1001))
+        stats = RunningStats()
+        for start in range(0, len(values), 97):
+            stats.update(values.iloc[start:start + 97].to_frame('v'))
+        summary = stats.to_dict()['columns']['v']
+
+        self.assertEqual(summary['count'], 1001)
+        self.assertAlmostEqual(summary['mean'], values.mean())
+        self.assertAlmostEqual(summary['variance'], values.var())
+        self.assertEqual((summary['min'], summary['max']), (values.min(), values.max()))
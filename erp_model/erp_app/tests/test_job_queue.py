@@ -0,0 +1,114 @@
+#base library
+import os
+import subprocess
+import sys
+from datetime import timedelta
+from unittest import mock
+
+import pandas as pd
+
+#django library
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+#app Modules
+from erp_app.models import AnalysisJob
+from erp_app.tests.utils import TempStoreMixin, make_upload
+from source.components.job_queue import JOB_HANDLERS, JobRunner, run_job
+
+
+def _failing_job(job, progress):
+    progress(50, 'Halfway')
+    raise ValueError('Column is missing')
+
+
+class JobRunnerTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.runner = JobRunner(eager=True)
+
+    def test_summary_job_stores_its_result(self):
+        record = make_upload(self.user, pd.DataFrame({'region': ['n', 's'], 'amount': [1.5, 2.5]}))
+        job = self.runner.submit(self.user, 'summary', uploaded_file=record)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (AnalysisJob.DONE, 100))
+        self.assertEqual(job.result['rows'], 2)
+        self.assertEqual(job.result['numeric_columns'], ['amount'])
+
+    def test_failing_handler_marks_the_job_failed(self):
+        with mock.patch.dict(JOB_HANDLERS, {'failing': _failing_job}), \
+                self.assertLogs('source.components.job_queue', 'ERROR'):
+            job = self.runner.submit(self.user, 'failing')
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.FAILED)
+        self.assertEqual((job.progress, job.message), (50, 'Halfway'))
+        self.assertIn('Column is missing', job.error)
+
+    def test_a_job_runs_once(self):
+        calls = []
+        with mock.patch.dict(JOB_HANDLERS, {'counted': lambda job, progress: calls.append(job.id) or {}}):
+            job = self.runner.submit(self.user, 'counted')
+            run_job(job.id)
+        self.assertEqual(calls, [job.id])
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(Exception):
+            self.runner.submit(self.user, 'no_such_kind')
+        self.assertFalse(AnalysisJob.objects.exists())
+
+    def test_status_endpoint_is_scoped_to_the_owner(self):
+        with mock.patch.dict(JOB_HANDLERS, {'noop': lambda job, progress: {}}):
+            job = self.runner.submit(self.user, 'noop')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/').json()['status'], AnalysisJob.DONE)
+
+        self.client.force_login(User.objects.create_user('other', password='secret'))
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/').status_code, 404)
+
+    def test_active_job_is_not_queued_twice(self):
+        record = make_upload(self.user, pd.DataFrame({'amount': [1.5, 2.5]}))
+        queued = AnalysisJob.objects.create(user=self.user, kind='summary', uploaded_file=record)
+        self.assertEqual(self.runner.submit(self.user, 'summary', uploaded_file=record).id, queued.id)
+
+        with mock.patch.dict(JOB_HANDLERS, {'noop': lambda job, progress: {}}):
+            pending = AnalysisJob.objects.create(user=self.user, kind='noop', uploaded_file=record, params={'version': 0})
+            self.assertEqual(self.runner.submit(self.user, 'noop', record, {'version': 0}).id, pending.id)
+            # Another version of the dataset is another job
+            self.assertNotEqual(self.runner.submit(self.user, 'noop', record, {'version': 7}).id, pending.id)
+
+    def test_analysis_page_reuses_the_queued_summary(self):
+        record = make_upload(self.user, pd.DataFrame({'amount': [1.5, 2.5]}))
+        queued = AnalysisJob.objects.create(user=self.user, kind='summary', uploaded_file=record)
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['uploaded_file_id'] = record.id
+        session.save()
+        for _ in range(2):
+            self.assertRedirects(self.client.get('/analysis/'), f'/analysis/?job={queued.id}', fetch_redirect_response=False)
+        self.assertEqual(AnalysisJob.objects.filter(kind='summary').count(), 1)
+
+    def running_job(self, worker_pid, age=0):
+        job = AnalysisJob.objects.create(user=self.user, kind='counted', status=AnalysisJob.RUNNING, worker_pid=worker_pid)
+        AnalysisJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(seconds=age))
+        return job
+
+    def test_jobs_of_dead_or_silent_workers_are_reclaimed(self):
+        finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        calls = []
+        with mock.patch.dict(JOB_HANDLERS, {'counted': lambda job, progress: calls.append(job.id) or {}}), \
+                self.assertLogs('source.components.job_queue', 'WARNING'):
+            dead = self.running_job(int(finished.stdout))
+            silent = self.running_job(os.getpid(), age=2 * 3600)
+            alive = self.running_job(os.getpid())
+            self.runner.resume_pending()
+
+        self.assertEqual(sorted(calls), sorted([dead.id, silent.id]))
+        for job in (dead, silent):
+            job.refresh_from_db()
+            self.assertEqual(job.status, AnalysisJob.DONE)
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, AnalysisJob.RUNNING)
@@ -0,0 +1,127 @@
+#base library
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components import outliers
+from source.components.outliers import OutlierEngine, isolation_scores
+
+
+class OutlierEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = OutlierEngine()
+        rng = np.random.default_rng(0)
+        n = 5_000
+        self.df = pd.DataFrame({
+            'a': rng.normal(50, 10, n),
+            'b': rng.standard_t(3, n),
+            'c': pd.array(rng.integers(0, 100, n), dtype='Int64'),
+            'label': rng.choice(['x', 'y'], n),
+        })
+        self.df.loc[[3, 70, 900], 'a'] = [500.0, -300.0, np.nan]
+        self.df.loc[[5, 6], 'c'] = pd.NA
+
+    def reference(self, values, lower, upper):
+        values = values.dropna().astype(float)
+        inliers = values[(values >= lower) & (values <= upper)]
+        return {'count': len(values), 'outliers': int(((values < lower) | (values > upper)).sum()),
+                'lowerfence': inliers.min(), 'upperfence': inliers.max()}
+
+    def assertReport(self, report, values, lower, upper):
+        expected = self.reference(values, lower, upper)
+        self.assertAlmostEqual(report['lower'], lower)
+        self.assertAlmostEqual(report['upper'], upper)
+        for key, value in expected.items():
+            self.assertAlmostEqual(report[key], value, msg=key)
+        mask = OutlierEngine.mask(report, len(values))
+        np.testing.assert_array_equal(mask, ((values < lower) | (values > upper)).fillna(False).to_numpy(dtype=bool))
+
+    def test_iqr(self):
+        report = self.engine.detect(self.df, method='iqr')
+        self.assertEqual(list(report['columns']), ['a', 'b', 'c'])
+        for col in ('a', 'b', 'c'):
+            values = self.df[col].astype('float64')
+            q1, q3 = values.quantile([0.25, 0.75])
+            with self.subTest(column=col):
+                self.assertReport(report['columns'][col], values, q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+                self.assertAlmostEqual(report['columns'][col]['median'], values.median())
+
+    def test_zscore(self):
+        report = self.engine.detect(self.df, ['a', 'b'], method='zscore', factor=2.5)
+        for col in ('a', 'b'):
+            values = self.df[col]
+            with self.subTest(column=col):
+                self.assertReport(report['columns'][col], values,
+                                  values.mean() - 2.5 * values.std(), values.mean() + 2.5 * values.std())
+
+    def test_mad(self):
+        report = self.engine.detect(self.df, ['a', 'b'], method='mad')
+        for col in ('a', 'b'):
+            values = self.df[col]
+            mad = stats.median_abs_deviation(values.dropna())
+            with self.subTest(column=col):
+                self.assertReport(report['columns'][col], values,
+                                  values.median() - 3.5 * mad / 0.6745, values.median() + 3.5 * mad / 0.6745)
+
+    def test_mad_fallback_for_a_constant_majority(self):
+        values = pd.Series([0.0] * 50 + [1.0, 2.0, -3.0, 10.0])
+        report = self.engine.detect(pd.DataFrame({'v': values}), method='mad')['columns']['v']
+        # MAD is 0, sigma is estimated from the mean absolute deviation (16 / 54) as 1.2533 * MeanAD
+        sigma = 1.2533 * 16 / 54
+        self.assertReport(report, values, -3.5 * sigma, 3.5 * sigma)
+        self.assertEqual(report['outliers'], 3)
+
+    def test_isolation_flags_the_extremes(self):
+        report = self.engine.detect(self.df, ['a'], method='isolation')['columns']['a']
+        mask = OutlierEngine.mask(report, len(self.df))
+        self.assertTrue(mask[3] and mask[70])
+        self.assertFalse(mask[900])
+        self.assertLess(report['outliers'], 0.02 * len(self.df))
+        scores = isolation_scores(self.df['a'].to_numpy())
+        np.testing.assert_array_equal(scores, isolation_scores(self.df['a'].to_numpy()))
+        self.assertEqual(scores[900], 0.0)
+
+    def test_column_blocks_give_the_same_reports(self):
+        whole = self.engine.detect(self.df, method='iqr')['columns']
+        with mock.patch.object(outliers, 'BLOCK_BYTES', 8):
+            blocked = OutlierEngine().detect(self.df, method='iqr')['columns']
+        for col, report in whole.items():
+            for key, value in report.items():
+                if key != 'bitmap':
+                    self.assertAlmostEqual(blocked[col][key], value, places=9)
+            np.testing.assert_array_equal(report['bitmap'], blocked[col]['bitmap'])
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            self.engine.detect(self.df, method='nope')
+
+    def test_box_stats_by_group(self):
+        box = self.engine.box_stats(self.df, 'b', by=['label'])
+        for label, group in self.df.groupby('label')['b']:
+            q1, median, q3 = group.quantile([0.25, 0.5, 0.75])
+            expected = self.reference(group, q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+            row = box.loc[label]
+            self.assertAlmostEqual(row['median'], median)
+            self.assertAlmostEqual(row['lowerfence'], expected['lowerfence'])
+            self.assertAlmostEqual(row['upperfence'], expected['upperfence'])
+            self.assertEqual(len(row['points']), expected['outliers'])
+
+    def test_box_stats_with_missing_group_keys(self):
+        df = self.df.astype({'label': 'object'})
+        df.loc[[0, 1, 2], 'label'] = [None, np.nan, None]
+        box = self.engine.box_stats(df, 'b', by=['label'])
+        self.assertEqual(list(box.index), ['x', 'y'])
+        for label, group in df.dropna(subset=['label']).groupby('label')['b']:
+            q1, q3 = group.quantile([0.25, 0.75])
+            expected = self.reference(group, q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+            row = box.loc[label]
+            self.assertAlmostEqual(row['lowerfence'], expected['lowerfence'])
+            self.assertAlmostEqual(row['upperfence'], expected['upperfence'])
+            self.assertEqual(len(row['points']), expected['outliers'])
@@ -0,0 +1,90 @@
+#base library
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components import pairwise
+from source.components.pairwise import PairwiseEngine
+
+
+def correlation_ratio(categories: pd.Series, values: pd.Series) -> float:
+    """Reference eta: sqrt(between-group / total sum of squares) on the complete rows."""
+    complete = categories.notna() & values.notna()
+    categories, values = categories[complete], values[complete].astype(float)
+    means = values.groupby(categories).transform('mean')
+    return float(np.sqrt(((means - values.mean()) ** 2).sum() / ((values - values.mean()) ** 2).sum()))
+
+
+class PairwiseEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = PairwiseEngine(workers=1)
+        rng = np.random.default_rng(0)
+        n = 20_000
+        x = rng.normal(1e8, 5, n)
+        self.df = pd.DataFrame({
+            'x': x,
+            'y': (x - 1e8) * 0.8 + rng.normal(0, 3, n),
+            'z': rng.exponential(2, n),
+            'q': pd.array(rng.integers(0, 50, n), dtype='Int64'),
+            'region': rng.choice(['n', 's', 'e'], n),
+        })
+        self.df['z'] += np.where(self.df['region'] == 'n', 3.0, 0.0)
+        for col, rows in (('x', [1, 5, 9]), ('y', [2, 5, 100]), ('z', [7])):
+            self.df.loc[rows, col] = np.nan
+        self.df.loc[[11, 12], 'q'] = pd.NA
+        self.df.loc[[3, 4], 'region'] = None
+        self.numeric = ['x', 'y', 'z', 'q']
+
+    def test_pearson_matches_pandas(self):
+        matrix = self.engine.matrix(self.df, method='pearson')
+        expected = self.df[self.numeric].astype(float).corr()
+        np.testing.assert_allclose(matrix.loc[self.numeric, self.numeric], expected, atol=1e-5)
+        # Large-magnitude column with a small spread keeps its correlation
+        self.assertAlmostEqual(matrix.loc['x', 'y'], expected.loc['x', 'y'], places=5)
+        self.assertGreater(matrix.loc['x', 'y'], 0.7)
+
+    def test_spearman_matches_pandas(self):
+        matrix = self.engine.matrix(self.df, self.numeric, method='spearman')
+        np.testing.assert_allclose(matrix, self.df[self.numeric].astype(float).corr(method='spearman'), atol=1e-5)
+
+    def test_spearman_reranks_pairs_on_their_complete_rows(self):
+        rng = np.random.default_rng(1)
+        x = rng.normal(0, 1, 2_000)
+        df = pd.DataFrame({'x': x, 'y': x + rng.normal(0, 0.5, 2_000), 'w': rng.normal(0, 1, 2_000)})
+        # y is missing on the upper half of x, ranks of the whole x column do not fit the complete rows
+        df.loc[df['x'] > 0, 'y'] = np.nan
+        df.loc[::7, 'w'] = np.nan
+        matrix = self.engine.matrix(df, method='spearman')
+        np.testing.assert_allclose(matrix, df.corr(method='spearman'), atol=1e-5)
+
+    def test_row_chunks_and_threads_give_the_same_matrix(self):
+        whole = self.engine.matrix(self.df)
+        with mock.patch.object(pairwise, 'CHUNK_BYTES', 4 * 1024 * 4):
+            chunked = PairwiseEngine(workers=3).matrix(self.df)
+        np.testing.assert_allclose(chunked, whole, atol=1e-5)
+
+    def test_correlation_ratio(self):
+        matrix = self.engine.matrix(self.df)
+        for col in self.numeric:
+            with self.subTest(column=col):
+                expected = correlation_ratio(self.df['region'], self.df[col])
+                self.assertAlmostEqual(matrix.loc[col, 'region'], expected, places=5)
+                self.assertAlmostEqual(matrix.loc['region', col], expected, places=5)
+        self.assertGreater(matrix.loc['z', 'region'], 0.3)
+        self.assertEqual(matrix.loc['region', 'region'], 1.0)
+
+    def test_constant_column_has_no_correlation(self):
+        df = self.df.assign(constant=1.0)
+        matrix = self.engine.matrix(df, ['x', 'constant'])
+        self.assertTrue(np.isnan(matrix.loc['x', 'constant']))
+        self.assertTrue(np.isnan(matrix.loc['constant', 'constant']))
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            self.engine.matrix(self.df, method='kendall')
@@ -0,0 +1,110 @@
+#base library
+import builtins
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+#django library
+from django.test import SimpleTestCase, override_settings
+
+#app Modules
+from source.components import plotly_calc
+from source.components.plotly_calc import CHARTS, fundamental, plot
+from source.pipeline.data_analysis_pipeline import build_figure
+
+# Columns of the sample frame for every chart of CHARTS
+SPECS = {
+    'histogram': ['a'], 'boxplot': ['a'], 'violin': ['a'],
+    'bar': ['cat'], 'pie': ['cat'], 'donut': ['cat'],
+    'line_unsorted': ['date'], 'line_sorted': ['date'],
+    'cat_num_bar': ['cat', 'a'], 'cat_num_column': ['cat', 'a'], 'lollipop': ['cat', 'a'],
+    'stacked_bar': ['cat', 'cat2'], 'grouped_count_bar': ['cat', 'cat2'],
+    'scatter': ['a', 'c'], 'line': ['a', 'c'], 'area': ['a', 'c'],
+    'time_line': ['date', 'a'], 'time_area': ['date', 'a'],
+    'regression': ['a', 'c'],
+    'scatter_color': ['a', 'c', 'cat'], 'bubble': ['a', 'c', 'b'], 'box_by_cat': ['cat', 'a', 'cat2'],
+    'bubble_3num': ['a', 'c', 'b'], 'scatter_3d': ['a', 'c', 'b'], 'grouped_bar': ['cat', 'cat2', 'a'],
+    'heatmap_pivot': ['cat', 'cat2', 'a'], 'line_time_group': ['date', 'a', 'cat'],
+    'area_time_group': ['date', 'a', 'cat'], 'box_color_facet': ['a', 'c', 'cat', 'cat2'],
+    'faceted_bar': ['b', 'cat', 'cat2'], 'scatter_size_color': ['a', 'c', 'b', 'cat'],
+    'parallel_coordinates': ['a', 'b', 'c', 'lat'], 'scatter_geo': ['lat', 'lon', 'cat', 'b'],
+    'parallel_coords': ['a', 'b', 'c'], 'scatter_matrix': ['a', 'b', 'c'],
+    'treemap_sunburst': ['cat', 'cat2', 'b'], 'correlation_matrix': None,
+    'association_matrix': ['cat', 'cat2'], 'pairwise_matrix': ['a', 'c', 'cat'],
+}
+
+
+class PlotApiTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2_000
+        self.df = pd.DataFrame({
+            'a': rng.normal(size=n),
+            'b': rng.integers(1, 100, n),
+            'c': rng.normal(10, 2, n),
+            'cat': rng.choice(['x', 'y', 'z'], n),
+            'cat2': rng.choice(['p', 'q'], n),
+            'date': pd.date_range('2020-01-01', periods=n, freq='h'),
+            'lat': rng.uniform(-50, 50, n),
+            'lon': rng.uniform(-100, 100, n),
+        })
+
+    def test_every_chart_builds_without_prompting(self):
+        self.assertEqual(set(SPECS), set(CHARTS))
+        with mock.patch.object(builtins, 'input', side_effect=AssertionError('prompted')):
+            for chart, columns in SPECS.items():
+                with self.subTest(chart=chart):
+                    self.assertIsInstance(plot(self.df, chart, columns), go.Figure)
+
+    def test_unknown_chart_raises(self):
+        with self.assertRaises(ValueError):
+            plot(self.df, 'nope', ['a'])
+
+    def test_missing_column_gives_no_figure(self):
+        with self.assertLogs(plotly_calc.logger, level='WARNING'):
+            self.assertIsNone(plot(self.df, 'scatter', ['a']))
+        with self.assertLogs(plotly_calc.logger, level='WARNING'):
+            self.assertIsNone(plot(self.df, 'histogram', ['missing']))
+
+    def test_require_names_the_unselected_column(self):
+        with self.assertRaisesMessage(ValueError, 'Column 2 of 3 is not selected.'):
+            fundamental().require('a', '', 'c')
+
+    def test_theme(self):
+        fig = plot(self.df, 'histogram', ['a'], theme='plotly_dark')
+        self.assertEqual(fig.layout.template, go.Figure(layout={'template': 'plotly_dark'}).layout.template)
+        with self.assertRaises(ValueError):
+            fundamental().apply_theme(go.Figure(), 'bogus')
+
+    @override_settings(PLOT_THEME='ggplot2')
+    def test_default_theme_comes_from_settings(self):
+        fig = fundamental().apply_theme(go.Figure())
+        self.assertEqual(fig.layout.template, go.Figure(layout={'template': 'ggplot2'}).layout.template)
+
+
+class BuildFigureTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.df = pd.DataFrame({
+            'a': rng.normal(size=500),
+            'c': rng.normal(size=500),
+            'cat': rng.choice(['x', 'y'], 500),
+        })
+
+    def test_needs_columns(self):
+        with self.assertRaises(Exception) as raised:
+            build_figure(None, self.df, 'univariate', [])
+        self.assertIn('Select at least one column.', str(raised.exception))
+
+    def test_bivariate_needs_two_columns(self):
+        with self.assertRaises(Exception) as raised:
+            build_figure(None, self.df, 'bivariate', ['a'])
+        self.assertIn('Bivariate analysis needs two columns.', str(raised.exception))
+
+    def test_bivariate_numeric_pair_is_a_scatter(self):
+        fig = build_figure(None, self.df, 'bivariate', ['a', 'c'])
+        self.assertIsInstance(fig, go.Figure)
@@ -0,0 +1,51 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.plotly_calc import OneVariableNumeric, TwoVariableCategorical, TwoVariableXCatYNum
+
+
+class AggregatedFigureTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'amount': rng.normal(100, 20, 100_000),
+            'when': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, 100_000), unit='h'),
+            'region': rng.choice(['n', 's', 'e'], 100_000),
+            'channel': rng.choice(['web', 'shop'], 100_000),
+        })
+
+    def test_histogram_carries_the_bins_not_the_rows(self):
+        fig = OneVariableNumeric().histogram(self.df, 'amount')
+        counts, edges = np.histogram(self.df['amount'], bins=20)
+
+        self.assertEqual(len(fig.data), 1)
+        np.testing.assert_array_equal(np.asarray(fig.data[0].y), counts)
+        np.testing.assert_allclose(np.asarray(fig.data[0].x), (edges[:-1] + edges[1:]) / 2)
+        self.assertLess(len(fig.to_json()), 20_000)
+
+    def test_datetime_histogram_has_date_bins(self):
+        fig = OneVariableNumeric().histogram(self.df, 'when')
+        self.assertEqual(np.asarray(fig.data[0].y).sum(), len(self.df))
+        self.assertTrue(str(fig.data[0].x[0]).startswith('2024-01-'))
+
+    def test_bar_plots_group_sums(self):
+        fig = TwoVariableXCatYNum().bar(self.df, 'region', 'amount')
+        expected = self.df.groupby('region')['amount'].sum()
+        plotted = dict(zip(fig.data[0].x, np.asarray(fig.data[0].y)))
+        self.assertEqual(set(plotted), set(expected.index))
+        for region, total in expected.items():
+            self.assertAlmostEqual(plotted[region], total, places=4)
+
+    def test_stacked_bar_plots_group_counts(self):
+        fig = TwoVariableCategorical().stacked_bar(self.df, 'region', 'channel')
+        expected = pd.crosstab(self.df['region'], self.df['channel'])
+        for trace in fig.data:
+            plotted = dict(zip(trace.x, np.asarray(trace.y)))
+            for region, count in expected[trace.name].items():
+                self.assertEqual(plotted[region], count)
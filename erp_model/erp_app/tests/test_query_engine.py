@@ -0,0 +1,111 @@
+#base library
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin, make_upload
+from source.components.data_analysis import BasisDataAnalysis, UniVariate
+from source.components.data_cache import load_dataset
+from source.components.data_store import DatasetStore
+from source.components.query_engine import QueryEngine, query_engine
+
+
+class QueryTests(TempStoreMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'amount': rng.normal(100, 20, 1_000),
+            'qty': rng.integers(0, 10, 1_000),
+            'region': rng.choice(['n', 's', 'e'], 1_000),
+        })
+        self.df.loc[::7, 'amount'] = np.nan
+        self.record = SimpleNamespace(file_path=DatasetStore().write(self.df)['file_path'])
+
+    def engines(self):
+        for name in ('arrow', 'pandas'):
+            with self.subTest(backend=name):
+                yield QueryEngine(name)
+
+    def test_collect_with_projection_filters_and_limit(self):
+        expected = self.df[(self.df['qty'] >= 5) & self.df['region'].isin(['n', 's'])][['amount', 'region']]
+        for engine in self.engines():
+            query = engine.scan(self.record).select('amount', 'region').where('qty', '>=', 5).where('region', 'in', ['n', 's'])
+            df = query.collect()
+            self.assertEqual(list(df.columns), ['amount', 'region'])
+            np.testing.assert_allclose(df['amount'].to_numpy(dtype=float, na_value=np.nan),
+                                       expected['amount'].to_numpy(), equal_nan=True)
+            self.assertEqual(query.count(), len(expected))
+            self.assertEqual(len(query.head(3)), 3)
+
+    def test_stats_match_pandas(self):
+        for engine in self.engines():
+            stats = engine.scan(self.record).select('amount', 'region').where('amount', 'not null').stats()
+            amount = stats['columns']['amount']
+            self.assertEqual(amount['count'], self.df['amount'].count())
+            self.assertEqual(amount['nulls'], 0)
+            self.assertAlmostEqual(amount['mean'], self.df['amount'].mean())
+            self.assertAlmostEqual(amount['std'], self.df['amount'].std())
+            self.assertEqual(amount['min'], self.df['amount'].min())
+            self.assertNotIn('mean', stats['columns']['region'])
+
+    def test_count_without_filters_comes_from_the_footer(self):
+        query = query_engine.scan(self.record)
+        self.assertEqual(query.count(), 1_000)
+        self.assertEqual(query.limit(10).count(), 10)
+
+    def test_unsupported_operator_raises(self):
+        with self.assertRaises(ValueError):
+            query_engine.scan(self.record).where('qty', 'like', 1)
+
+    def test_unknown_backend_falls_back_to_pandas(self):
+        with self.assertLogs('source.components.query_engine', level='WARNING'):
+            self.assertEqual(QueryEngine('duckdb').backend.name, 'pandas')
+
+
+class StoredStatisticsTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='pw')
+        rng = np.random.default_rng(1)
+        self.df = pd.DataFrame({'amount': rng.normal(50, 5, 500), 'region': rng.choice(['n', 's'], 500)})
+        self.record = make_upload(self.user, self.df)
+        self.request = SimpleNamespace(user=self.user)
+
+    def test_summary_reads_only_the_preview(self):
+        with mock.patch.object(DatasetStore, 'read', side_effect=AssertionError('full read')):
+            context = BasisDataAnalysis().summarize(self.record)
+        self.assertIn('amount', context['numeric_columns'])
+        self.assertEqual(context['rows'], self.record.rows)
+
+    def test_column_stats(self):
+        stats = BasisDataAnalysis().column_stats(self.record, ['amount'], where=[('region', '==', 'n')])
+        expected = self.df.loc[self.df['region'] == 'n', 'amount']
+        self.assertEqual(stats['rows'], len(expected))
+        self.assertAlmostEqual(stats['columns']['amount']['mean'], expected.mean())
+
+    def test_univariate_moments_of_a_stored_dataset_use_the_query_engine(self):
+        df = load_dataset(self.record)
+        univariate = UniVariate()
+        with mock.patch.object(query_engine.backend, 'stats', wraps=query_engine.backend.stats) as stats:
+            self.assertAlmostEqual(univariate.mean(self.request, df, 'amount'), self.df['amount'].mean())
+            self.assertAlmostEqual(univariate.variance(self.request, df, 'amount'), self.df['amount'].var())
+            self.assertAlmostEqual(univariate.standard_deviation(self.request, df, 'amount'), self.df['amount'].std())
+            self.assertAlmostEqual(univariate.range(self.request, df, 'amount'), np.ptp(self.df['amount']))
+        self.assertEqual(stats.call_count, 4)
+
+        # Derived frames have no stored copy, they are profiled in memory
+        with mock.patch.object(query_engine.backend, 'stats', side_effect=AssertionError('query')):
+            self.assertAlmostEqual(univariate.mean(self.request, df.head(10), 'amount'), self.df['amount'].head(10).mean())
+            self.assertAlmostEqual(univariate.median(self.request, df, 'amount'), self.df['amount'].median())
+            # A cached profile is reused
+            self.assertAlmostEqual(univariate.mean(self.request, df, 'amount'), self.df['amount'].mean())
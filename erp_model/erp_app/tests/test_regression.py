@@ -0,0 +1,82 @@
+#base library
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.regression import RegressionEngine
+
+
+class RegressionEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = RegressionEngine()
+        rng = np.random.default_rng(0)
+        n = 5_000
+        x = rng.uniform(-3, 3, n)
+        self.df = pd.DataFrame({'x': x, 'y': 1.5 * x ** 2 - 2 * x + 4 + rng.normal(0, 1, n)})
+        self.df.loc[[3, 8], 'x'] = np.nan
+        self.df.loc[[5], 'y'] = np.nan
+        self.complete = self.df.dropna()
+
+    def r2(self, coefficients):
+        fitted = np.polyval(coefficients, self.complete['x'])
+        residual = ((self.complete['y'] - fitted) ** 2).sum()
+        return 1 - residual / ((self.complete['y'] - self.complete['y'].mean()) ** 2).sum()
+
+    def test_ols_matches_polyfit(self):
+        result = self.engine.fit(self.df, 'x', 'y', 'ols')
+        expected = np.polyfit(self.complete['x'], self.complete['y'], 1)
+        np.testing.assert_allclose(result['coefficients'], expected[::-1], rtol=1e-9)
+        self.assertAlmostEqual(result['r2'], self.r2(expected), places=9)
+        self.assertEqual(result['n'], len(self.complete))
+
+    def test_polynomial_matches_polyfit(self):
+        for degree in (2, 3, 5):
+            with self.subTest(degree=degree):
+                result = self.engine.fit(self.df, 'x', 'y', 'poly', degree=degree)
+                expected = np.polyfit(self.complete['x'], self.complete['y'], degree)
+                np.testing.assert_allclose(result['coefficients'], expected[::-1], rtol=1e-6, atol=1e-9)
+                self.assertAlmostEqual(result['r2'], self.r2(expected), places=9)
+                np.testing.assert_allclose(result['fit'], np.polyval(expected, result['x']), rtol=1e-9, atol=1e-9)
+                self.assertTrue((result['lower'] <= result['fit']).all() and (result['fit'] <= result['upper']).all())
+
+    def test_date_column_with_missing_dates(self):
+        dates = pd.date_range('2024-01-01', periods=100, freq='D')
+        when = pd.Series(dates).where(np.arange(100) != 40)
+        sales = 10 + 0.5 * np.arange(100)
+        # Built separately, astype to an Arrow timestamp overwrites the NaT of the source frame in pandas 3.0
+        arrow = pd.Series(pa.array(when, type=pa.timestamp('ns')), dtype=pd.ArrowDtype(pa.timestamp('ns')))
+        for column in (when, arrow):
+            frame = pd.DataFrame({'when': column, 'sales': sales})
+            with self.subTest(dtype=str(frame['when'].dtype)):
+                result = self.engine.fit(frame, 'when', 'sales', 'ols')
+                self.assertEqual(result['n'], 99)
+                self.assertAlmostEqual(result['r2'], 1.0, places=9)
+                self.assertEqual(result['x'][0], dates[0])
+                self.assertEqual(result['x'][-1], dates[-1])
+
+    def test_lowess_follows_the_curve(self):
+        result = self.engine.fit(self.df, 'x', 'y', 'lowess', frac=0.2)
+        self.assertIsNone(result['coefficients'])
+        self.assertTrue(np.all(np.diff(result['x']) > 0))
+        truth = 1.5 * result['x'] ** 2 - 2 * result['x'] + 4
+        self.assertLess(np.abs(result['fit'] - truth).mean(), 0.3)
+        self.assertAlmostEqual(result['r2'], self.r2(np.polyfit(self.complete['x'], self.complete['y'], 2)), delta=0.02)
+
+    def test_lowess_on_few_distinct_values(self):
+        df = pd.DataFrame({'year': np.repeat(np.arange(2000, 2010), 50), 'value': np.repeat(np.arange(10.0), 50)})
+        result = self.engine.fit(df, 'year', 'value', 'lowess')
+        np.testing.assert_allclose(result['x'], np.arange(2000, 2010))
+        np.testing.assert_allclose(result['fit'], np.arange(10.0), atol=1e-9)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.engine.fit(self.df, 'x', 'y', 'spline')
+        with self.assertRaises(ValueError):
+            self.engine.fit(self.df, 'x', 'y', 'poly', degree=9)
+        with self.assertRaises(ValueError):
+            self.engine.fit(self.df.head(2), 'x', 'y', 'poly', degree=3)
@@ -0,0 +1,114 @@
+#base library
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+#app Modules
+from erp_app.models import UploadedFile
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_analysis import DataQualityCheck
+from source.components.data_cache import load_dataset
+from source.components.data_ingestion import DataIngestion
+from source.components.sketches import DatasetSketches, HeavyHitters, HyperLogLog, KLLSketch
+
+
+class SketchTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_kll_quantiles_are_within_the_rank_error(self):
+        values = self.rng.lognormal(0, 1, 200_000)
+        sketch = KLLSketch()
+        for block in np.array_split(values, 20):
+            sketch.update(block)
+        ordered = np.sort(values)
+
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+            self.assertLess(abs(rank - q), 0.02)
+        self.assertEqual(sketch.n, len(values))
+
+    def test_merged_sketches_match_one_sketch(self):
+        values = self.rng.normal(size=100_000)
+        left, right = KLLSketch(), KLLSketch()
+        left.update(values[:50_000])
+        right.update(values[50_000:])
+        merged = left.merge(right)
+        self.assertLess(abs(merged.rank(np.median(values)) - 0.5), 0.02)
+
+    def test_hyperloglog_estimate(self):
+        series = pd.Series(self.rng.integers(0, 50_000, 300_000))
+        sketch = HyperLogLog()
+        for start in range(0, len(series), 40_000):
+            sketch.update(series.iloc[start:start + 40_000])
+        exact = series.nunique()
+        self.assertLess(abs(sketch.estimate() - exact) / exact, 0.05)
+
+    def test_heavy_hitters_find_the_frequent_values(self):
+        frequent = np.repeat(['a', 'b', 'c'], [30_000, 20_000, 10_000])
+        series = pd.Series(np.concatenate([frequent, self.rng.integers(0, 100_000, 40_000).astype(str)]))
+        sketch = HeavyHitters()
+        series = series.sample(frac=1, random_state=0)
+        for start in range(0, len(series), 10_000):
+            sketch.update(series.iloc[start:start + 10_000])
+
+        top = sketch.top(3)
+        self.assertEqual([value for value, _ in top], ['a', 'b', 'c'])
+        for (value, count), exact in zip(top, (30_000, 20_000, 10_000)):
+            self.assertLessEqual(count, exact)
+            self.assertGreaterEqual(count, exact - sketch.error_bound())
+
+    def test_bundle_round_trips_through_json(self):
+        df = pd.DataFrame({'n': self.rng.normal(size=1000), 't': self.rng.choice(['x', 'y'], 1000)})
+        sketches = DatasetSketches().update(df)
+        loaded = DatasetSketches.from_dict(sketches.to_dict())
+
+        self.assertEqual(loaded.distinct['t'].estimate(), sketches.distinct['t'].estimate())
+        self.assertEqual(loaded.quantiles['n'].quantile(0.5), sketches.quantiles['n'].quantile(0.5))
+        self.assertNotIn('t', loaded.quantiles)
+
+
+@override_settings(DATASET_SKETCHES=True)
+class ApproximateQualityCheckTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        rng = np.random.default_rng(1)
+        self.source = pd.DataFrame({'city': rng.choice(['paris', 'rome', 'oslo'], 3000, p=[0.6, 0.3, 0.1]),
+                                    'amount': rng.normal(100, 15, 3000)})
+        meta = DataIngestion().store_upload(
+            SimpleUploadedFile('data.csv', self.source.to_csv(index=False).encode('utf-8')))
+        self.df = load_dataset(UploadedFile.objects.create(user=self.user, name='data.csv', **meta))
+        self.request = SimpleNamespace(user=self.user)
+
+    def test_approximate_inconsistency_reports_top_values(self):
+        result = DataQualityCheck().inconsistency(self.request, self.df, 'city', approximate=True)
+
+        self.assertTrue(result['Approximate'])
+        self.assertNotIn('Unique Values', result)
+        self.assertEqual(result['Numer of Unique'], 3)
+        counts = self.source['city'].value_counts()
+        self.assertEqual(result['Top Values'], list(zip(counts.index, counts.tolist())))
+
+    def test_exact_inconsistency_lists_the_distinct_values(self):
+        result = DataQualityCheck().inconsistency(self.request, self.df, 'city')
+        self.assertEqual(sorted(result['Unique Values']), ['oslo', 'paris', 'rome'])
+        self.assertNotIn('Top Values', result)
+
+    def test_approximate_outliers_follow_the_exact_ones(self):
+        check = DataQualityCheck()
+        approximate = check.outlier_statstical(self.request, self.df, 'amount', approximate=True)
+        exact = check.outlier_statstical(self.request, self.df, 'amount')
+
+        self.assertTrue(approximate['Approximate'])
+        self.assertAlmostEqual(approximate['Q1'], exact['Q1'], delta=1.0)
+        self.assertAlmostEqual(approximate['Q3'], exact['Q3'], delta=1.0)
+        self.assertLessEqual(abs(approximate['NumOfOutlier'] - exact['NumOfOutlier']), 10)
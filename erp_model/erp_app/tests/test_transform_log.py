@@ -0,0 +1,78 @@
+#base library
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+#app Modules
+from erp_app.tests.utils import TempStoreMixin, make_upload
+from source.components import data_cache
+from source.components.transform_log import transform_log
+
+
+class TransformLogTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='pw')
+        self.df = pd.DataFrame({
+            'when': ['2024-01-%02d' % day for day in range(1, 21)],
+            'amount': [float(i) if i % 4 else np.nan for i in range(20)],
+            'region': ['n', 's'] * 10,
+        })
+        self.record = make_upload(self.user, self.df)
+
+    def cold_cache(self):
+        self._patch(data_cache.dataframe_cache, '_frames', OrderedDict())
+        self._patch(data_cache.dataframe_cache, '_sizes', {})
+        self._patch(data_cache.dataframe_cache, '_total_bytes', 0)
+
+    def test_record_and_materialize(self):
+        typed = transform_log.record(self.record, 0, 'auto_correct_datatypes')
+        filled = transform_log.record(self.record, typed.id, 'fill_missing', {'column': 'amount', 'method': 'mean'})
+
+        df = transform_log.materialize(self.record, filled.id)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['when']))
+        self.assertEqual(df['amount'].isna().sum(), 0)
+        self.assertAlmostEqual(df['amount'].iloc[0], self.df['amount'].mean())
+        self.assertEqual(list(df['region']), list(self.df['region']))
+        self.assertEqual(data_cache.dataset_key(df), (self.record.dataset_id, filled.id))
+
+    def test_undo_returns_the_parent_version(self):
+        step = transform_log.record(self.record, 0, 'fill_missing', {'column': 'amount', 'method': 'drop'})
+        self.assertEqual(step.rows_before, 20)
+        self.assertEqual(step.rows_after, 15)
+        self.assertEqual(len(transform_log.materialize(self.record, step.id)), 15)
+        self.assertEqual(len(transform_log.materialize(self.record, step.parent_id or 0)), 20)
+        self.assertEqual([s.id for s in transform_log.lineage(self.record, step.id)], [step.id])
+        self.assertIsNone(transform_log.materialize(self.record, step.id + 100))
+
+    def test_cold_rebuild_gives_the_same_frame(self):
+        typed = transform_log.record(self.record, 0, 'auto_correct_datatypes')
+        kept = transform_log.record(self.record, typed.id, 'fill_missing', {'column': 'amount', 'method': 'drop'})
+        filled = transform_log.record(self.record, kept.id, 'fill_missing', {'column': 'region', 'method': 'mode'})
+        warm = transform_log.materialize(self.record, filled.id)
+
+        self.cold_cache()
+        cold = transform_log.materialize(self.record, filled.id)
+        pd.testing.assert_frame_equal(cold.reset_index(drop=True), warm.reset_index(drop=True))
+
+        # Rebuilt from a cached ancestor
+        self._patch(data_cache.dataframe_cache, '_frames',
+                    OrderedDict((key, frame) for key, frame in data_cache.dataframe_cache._frames.items()
+                                if key[1] != filled.id))
+        partial = transform_log.materialize(self.record, filled.id)
+        pd.testing.assert_frame_equal(partial.reset_index(drop=True), warm.reset_index(drop=True))
+
+    def test_unknown_operation_raises(self):
+        with self.assertRaises(ValueError):
+            transform_log.record(self.record, 0, 'nope')
+
+
+@override_settings(DATAFRAME_DTYPE_BACKEND='numpy')
+class NumpyBackendTransformLogTests(TransformLogTests):
+    pass
@@ -0,0 +1,49 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.test import SimpleTestCase
+
+#app Modules
+from source.components.data_transformation import ColumnTranformer
+
+
+class TypeInferenceTests(SimpleTestCase):
+
+    def correct(self, df, **kwargs):
+        corrected, original = ColumnTranformer().auto_correct_datatypes(df, workers=1, compact=False, **kwargs)
+        self.assertIs(original, df)
+        return corrected
+
+    def test_ambiguous_dates_are_month_first(self):
+        corrected = self.correct(pd.DataFrame({'day': ['03/04/2024', '01/02/2024', '12/11/2023']}))
+        self.assertEqual(corrected['day'].tolist(), pd.to_datetime(['2024-03-04', '2024-01-02', '2023-12-11']).tolist())
+
+    def test_unambiguous_values_select_day_first(self):
+        corrected = self.correct(pd.DataFrame({'day': ['03/04/2024', '25/03/2024', '31/12/2023']}))
+        self.assertEqual(corrected['day'].tolist(), pd.to_datetime(['2024-04-03', '2024-03-25', '2023-12-31']).tolist())
+
+    def test_numeric_text_is_converted(self):
+        df = pd.DataFrame({'amount': ['1.5', ' 2', '-3e2', None], 'name': ['a', 'b', 'c', 'd']})
+        corrected = self.correct(df)
+
+        self.assertTrue(pd.api.types.is_float_dtype(corrected['amount']))
+        np.testing.assert_array_equal(corrected['amount'].to_numpy(), [1.5, 2.0, -300.0, np.nan])
+        self.assertEqual(corrected['name'].tolist(), ['a', 'b', 'c', 'd'])
+        # The input frame is left untouched
+        self.assertEqual(df['amount'].iloc[0], '1.5')
+
+    def test_threshold_rejects_mostly_text_columns(self):
+        df = pd.DataFrame({'mixed': ['1', '2', 'three', 'four', '5']})
+        self.assertEqual(self.correct(df)['mixed'].tolist(), ['1', '2', 'three', 'four', '5'])
+        self.assertEqual(self.correct(df, threshold=0.5)['mixed'].tolist()[:2], [1.0, 2.0])
+
+    def test_sampled_classification_matches_a_full_conversion(self):
+        rng = np.random.default_rng(0)
+        dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, 20_000), unit='D')
+        df = pd.DataFrame({'when': dates.strftime('%Y-%m-%d'), 'value': rng.normal(size=20_000).astype(str)})
+        corrected = self.correct(df, sample_size=200)
+
+        self.assertEqual(corrected['when'].tolist(), pd.to_datetime(df['when'], format='%Y-%m-%d').tolist())
+        np.testing.assert_allclose(corrected['value'].to_numpy(), df['value'].astype(float).to_numpy(), rtol=1e-12)
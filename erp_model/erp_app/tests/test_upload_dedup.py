@@ -0,0 +1,143 @@
+#base library
+import hashlib
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+from openpyxl import Workbook
+
+#django library
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+
+#app Modules
+from erp_app.models import UploadedFile
+from erp_app.tests.utils import TempStoreMixin
+from source.components.data_analysis import DataQualityCheck
+from source.components.data_cache import dataset_key, load_dataset
+from source.components.data_ingestion import DataIngestion
+from source.components.data_store import DatasetStore
+from source.pipeline import data_ingestion_pipeline
+
+CSV = b'region,amount\nn,1\ns,2\nn,3\ne,4\n'
+
+
+def xlsx_bytes(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@override_settings(DATASET_SKETCHES=True)
+class IdenticalUploadTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='pw')
+        self.client.force_login(self.user)
+
+    def upload(self, name, content):
+        self.client.post('/upload/', {'file': SimpleUploadedFile(name, content)})
+        return UploadedFile.objects.order_by('-id').first()
+
+    def test_identical_csv_is_parsed_and_stored_once(self):
+        first = self.upload('a.csv', CSV)
+        with mock.patch.object(DataIngestion, 'store_upload', side_effect=AssertionError('parsed again')):
+            second = self.upload('b.csv', CSV)
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(second.name, 'b.csv')
+        self.assertEqual(second.file_path, first.file_path)
+        self.assertEqual((second.rows, second.summary), (first.rows, first.summary))
+        self.assertEqual(second.dataset_id, first.dataset_id)
+        self.assertEqual(len(list(DatasetStore().root.glob('*.parquet'))), 1)
+
+        # Both records share one cached frame
+        self.assertEqual(dataset_key(load_dataset(first)), dataset_key(load_dataset(second)))
+
+    def test_different_content_is_stored_separately(self):
+        first = self.upload('a.csv', CSV)
+        second = self.upload('a.csv', CSV + b'w,5\n')
+        self.assertNotEqual(first.file_path, second.file_path)
+        self.assertNotEqual(first.dataset_id, second.dataset_id)
+
+    def test_missing_stored_copy_is_parsed_again(self):
+        first = self.upload('a.csv', CSV)
+        DatasetStore().delete(first.file_path)
+        second = self.upload('a.csv', CSV)
+        self.assertNotEqual(second.file_path, first.file_path)
+        self.assertTrue(DatasetStore().exists(second.file_path))
+
+    def test_identical_workbook_sheets_are_stored_once(self):
+        content = xlsx_bytes([('region', 'amount'), ('n', 1), ('s', 2)])
+        first = self.upload('book.xlsx', content)
+        with mock.patch.object(DataIngestion, 'store_sheet', side_effect=AssertionError('parsed again')):
+            second = self.upload('copy.xlsx', content)
+        self.assertEqual(second.file_path, first.file_path)
+        self.assertEqual(second.content_hash, DataIngestion.sheet_hash(DataIngestion.content_hash(
+            SimpleUploadedFile('copy.xlsx', content)), 'Sheet'))
+
+    def test_sketches_resolve_from_the_content_keyed_frame(self):
+        self.upload('a.csv', CSV)
+        second = self.upload('b.csv', CSV)
+        df = load_dataset(second)
+        result = DataQualityCheck().inconsistency(SimpleNamespace(user=self.user), df, 'region', approximate=True)
+        self.assertTrue(result['Approximate'])
+        self.assertEqual(dict(result['Top Values'])['n'], 2)
+        self.assertEqual(result['Numer of Unique'], pd.Series(['n', 's', 'e']).nunique())
+
+    def test_upload_is_hashed_while_received(self):
+        with mock.patch.object(InMemoryUploadedFile, 'chunks', autospec=True,
+                               side_effect=InMemoryUploadedFile.chunks) as chunks:
+            record = self.upload('a.csv', CSV)
+        self.assertEqual(chunks.call_count, 1)
+        self.assertEqual(record.content_hash, hashlib.sha256(CSV).hexdigest())
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=8)
+    def test_large_upload_is_hashed_on_disk(self):
+        record = self.upload('a.csv', CSV)
+        self.assertEqual(record.content_hash, hashlib.sha256(CSV).hexdigest())
+        self.assertEqual(record.rows, 4)
+
+
+@override_settings(DATASET_SKETCHES=True)
+class PipelineIngestionTests(TempStoreMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='pw')
+
+    def request(self):
+        request = RequestFactory().post('/upload/')
+        request.user = self.user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def test_csv_shares_the_stored_copy_of_the_view(self):
+        self.client.force_login(self.user)
+        self.client.post('/upload/', {'file': SimpleUploadedFile('a.csv', CSV)})
+        first = UploadedFile.objects.get()
+
+        request = self.request()
+        with mock.patch.object(DataIngestion, 'store_upload', side_effect=AssertionError('parsed again')):
+            data_ingestion_pipeline.ingest_data(request, SimpleUploadedFile('b.csv', b''), CSV)
+        second = UploadedFile.objects.get(id=request.session['uploaded_file_id'])
+        self.assertEqual(second.file_path, first.file_path)
+        self.assertEqual(second.summary, first.summary)
+
+    def test_workbook_is_keyed_per_sheet_with_sketches(self):
+        content = xlsx_bytes([('region', 'amount'), ('n', 1), ('s', 2)])
+        data_ingestion_pipeline.ingest_data(self.request(), SimpleUploadedFile('book.xlsx', b''), content)
+        record = UploadedFile.objects.get()
+        self.assertEqual(record.sheet, 'Sheet')
+        self.assertEqual(record.content_hash, DataIngestion.sheet_hash(hashlib.sha256(content).hexdigest(), 'Sheet'))
+        self.assertEqual(record.summary['rows'], 2)
+        self.assertTrue(DatasetStore().sketch_path(record.file_path).exists())
@@ -0,0 +1,63 @@
+#base library
+import shutil
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from unittest import mock
+
+#django library
+from django.test import override_settings
+
+
+class TempStoreMixin:
+    """
+    Points the dataset store, and every file tier below it, to a temporary
+    directory for each test. The shared per-process instances bound their
+    directories at import time, they are redirected too.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.store_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store_dir, ignore_errors=True)
+        overrides = override_settings(
+            DATASET_STORE_DIR=self.store_dir,
+            DATAFRAME_CACHE_DIR=self.store_dir / 'cache',
+            FIGURE_CACHE_DIR=self.store_dir / 'figures',
+            TRANSFORM_LOG_DIR=self.store_dir / 'steps',
+            JOB_RUNNER_EAGER=True,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        from source.components import data_analysis, data_cache, data_ingestion, figure_cache, job_queue, transform_log
+        from source.components.column_profile import column_profiler
+        from erp_app import views
+        for store in (data_analysis.store, data_ingestion.store, views.store):
+            self._patch(store, 'root', self.store_dir)
+        self._patch(data_cache.dataframe_cache.disk, 'root', self.store_dir / 'cache')
+        self._patch(figure_cache.figure_cache, 'cache_dir', self.store_dir / 'figures')
+        self._patch(transform_log.transform_log.store, 'root', self.store_dir / 'steps')
+        self._patch(job_queue.job_runner, 'eager', True)
+        # Record ids are reused between tests, the memory tiers start empty
+        for target, attribute, value in ((data_cache.dataframe_cache, '_frames', OrderedDict()),
+                                         (data_cache.dataframe_cache, '_sizes', {}),
+                                         (data_cache.dataframe_cache, '_total_bytes', 0),
+                                         (figure_cache.figure_cache, '_figures', OrderedDict()),
+                                         (figure_cache.figure_cache, '_total_bytes', 0),
+                                         (column_profiler, '_profiles', OrderedDict())):
+            self._patch(target, attribute, value)
+
+    def _patch(self, target, attribute, value):
+        patcher = mock.patch.object(target, attribute, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+def make_upload(user, df, name='data.csv', store=None):
+    """``UploadedFile`` of a frame written to the dataset store."""
+    from erp_app.models import UploadedFile
+    from source.components.data_store import DatasetStore
+
+    meta = (store or DatasetStore()).write(df)
+    return UploadedFile.objects.create(user=user, name=name, **meta)
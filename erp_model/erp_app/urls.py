@@ -5,11 +5,17 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('upload/', views.upload_file, name='upload_file'),
+    path('upload/sheets/', views.select_sheets, name='select_sheets'),
+    path('upload/batch/', views.upload_batch, name='upload_batch'),
+    path('upload/batch/<str:batch>/', views.batch_status, name='batch_status'),
     path('contact/', views.contact, name='contact'),
     path('analysis/', views.analysis, name='analysis'),
     path('login/', views.user_login, name='login'),
     path('register/', views.user_register, name='register'),
     path('logout/', views.user_logout, name='logout'),
     path('interactive_analysis/', views.interactive_analysis, name='interactive_analysis'),
-    path('final_report/', views.final_report, name='final_report')
+    path('final_report/', views.final_report, name='final_report'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('figures/<int:job_id>.json', views.figure_json, name='figure_json'),
+    path('figures/templates/<str:name>.json', views.figure_template, name='figure_template'),
 ]
@@ -3,19 +3,29 @@
 import logging
 import sys
 import os
-import io
-import pandas as pd
-import pickle
-import base64
+import json
 from django.views.decorators.csrf import csrf_protect
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from exception import CustomException
 from source.pipeline import data_ingestion_pipeline
+from source.components.data_ingestion import DataIngestion
+from source.components.data_store import DatasetStore
+from source.components.data_cache import load_dataset
+from source.components.job_queue import job_runner
+from source.components.column_profile import column_profiler
+from source.components.data_transformation import is_text_dtype
+from source.components.duplicates import duplicate_engine
+from source.components.outliers import METHODS as OUTLIER_METHODS, numeric_columns, outlier_engine
+from source.components.plotly_calc import THEMES
+from source.components.figure_export import encode_body, plotlyjs_url, template_json
+from source.components.transform_log import transform_log
+from erp_app.models import UploadedFile, AnalysisJob, TransformStep
 from source.components.data_analysis import (
     BasisDataAnalysis,
     DataQualityCheck,
@@ -32,6 +42,8 @@ univariate = UniVariate()
 bivariate_num = BiVariateNumerical()
 bivariate_cat = BiVariateCategorical()
 multivariate = MultiVariate()
+ingestion = DataIngestion()
+store = DatasetStore()
 logger = logging.getLogger(__name__)
 
 # -------------------------------------------------------------------------
@@ -52,34 +64,163 @@ def upload_file(request):
                 messages.error(request, "No file selected.")
                 return redirect('home')
 
-            file_bytes = uploaded_file.read()
-            df = pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8', on_bad_lines='skip')
-            df_json = df.to_json(orient='records')
-
-            # Save JSON string to session
-            request.session['df_json'] = df_json
+            # Parsed once into the dataset store, session only keeps the file id
             request.session['step'] = 'overview'
-            messages.success(request, "File uploaded successfully!")
-            return redirect('analysis')
+            return ingestion.ingest_data(request, uploaded_file)
 
         return render(request, 'home.html')
     except Exception as e:
         raise CustomException(e, sys) #type: ignore
 
 
+@login_required
+def upload_batch(request):
+    """Many CSV / XLSX files (or zip archives) at once, every file is parsed by a background job."""
+    try:
+        if request.method == "POST":
+            uploaded_files = request.FILES.getlist('files')
+            if not uploaded_files:
+                messages.error(request, "No file selected.")
+                return redirect('home')
+            return ingestion.ingest_batch(request, uploaded_files)
+        return redirect('home')
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
+@login_required
+def batch_status(request, batch):
+    """Per file status of a batch upload, a parsed file can be opened for analysis from here."""
+    try:
+        jobs = list(AnalysisJob.objects.filter(user=request.user, kind='ingest', params__batch=batch).order_by('id'))
+        if not jobs:
+            messages.error(request, "Batch not found.")
+            return redirect('home')
+        if request.method == 'POST':
+            chosen = UploadedFile.objects.filter(id=request.POST.get('file_id'), user=request.user).first()
+            if chosen is not None:
+                _clear_session(request)
+                request.session['uploaded_file_id'] = chosen.id
+                return redirect('analysis')
+
+        pending = [job for job in jobs if job.status in (AnalysisJob.QUEUED, AnalysisJob.RUNNING)]
+        failed = [job for job in jobs if job.status == AnalysisJob.FAILED]
+        return render(request, 'batch_status.html', {
+            'jobs': jobs,
+            'pending': len(pending),
+            'failed': len(failed),
+            'done': len(jobs) - len(pending) - len(failed),
+        })
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
+@login_required
+def select_sheets(request):
+    """
+    Sheet choice of an Excel upload. A staged workbook is converted once (the
+    chosen sheets only), afterwards the page switches between the converted sheets.
+    """
+    try:
+        pending = request.session.get('pending_workbook')
+        if pending:
+            if request.method == 'POST':
+                sheets = [sheet for sheet in request.POST.getlist('sheets') if sheet in pending['sheets']]
+                if not sheets:
+                    messages.error(request, "Select at least one sheet.")
+                    return redirect('select_sheets')
+                return ingestion.ingest_sheets(request, pending['workbook'], pending['name'], sheets,
+                                               pending.get('content_hash', ''))
+            return render(request, 'select_sheets.html', {'name': pending['name'], 'sheets': pending['sheets']})
+
+        current = _file_record(request)
+        if current is None or not current.workbook:
+            return redirect('home')
+        converted = UploadedFile.objects.filter(user=request.user, workbook=current.workbook).order_by('id')
+        if request.method == 'POST':
+            chosen = converted.filter(id=request.POST.get('file_id')).first()
+            if chosen is not None:
+                _clear_session(request)
+                request.session['uploaded_file_id'] = chosen.id
+                return redirect('analysis')
+        return render(request, 'select_sheets.html', {'name': current.name, 'converted': converted, 'current': current})
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
 @login_required
 def analysis(request):
+    """Runs the summary as a background job, the page polls it and reloads with ?job=<id> when done."""
     try:
+        job_id = request.GET.get('job')
+        if job_id and job_id.isdigit():
+            job = AnalysisJob.objects.filter(id=job_id, user=request.user, kind='summary').first()
+            if job is None:
+                return redirect('analysis')
+            if job.status == AnalysisJob.DONE:
+                return render(request, 'analysis.html', job.result)
+            if job.status == AnalysisJob.FAILED:
+                messages.error(request, job.error)
+                return redirect('home')
+            return render(request, 'analysis.html', {'job': job, 'next_url': f"?job={job.id}"})
+
         file_id = request.session.get('uploaded_file_id')
-        base = BasisDataAnalysis()
-        result = base.generate_summary(request, file_id)
-        if isinstance(result, HttpResponseRedirect):
-            return result
-        return render(request, 'analysis.html', result) #type: ignore
+        file_record = UploadedFile.objects.filter(id=file_id, user=request.user).first() if file_id else None
+        if file_record is None:
+            messages.error(request, "No file uploaded yet.")
+            return redirect('home')
+
+        job = job_runner.submit(request.user, 'summary', uploaded_file=file_record)
+        return redirect(f"{request.path}?job={job.id}")
     except Exception as e:
         raise CustomException(e, sys) #type: ignore
 
 
+@login_required
+def job_status(request, job_id):
+    """Progress endpoint polled by the templates while a background job runs."""
+    job = AnalysisJob.objects.filter(id=job_id, user=request.user).first()
+    if job is None:
+        return JsonResponse({'error': 'Job not found.'}, status=404)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'error': job.error,
+    })
+
+
+def _compressed_json(request, payload: str, max_age: int, public=False):
+    body, encoding = encode_body(payload, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    response = HttpResponse(body, content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, max_age=max_age, **({'public': True} if public else {'private': True}))
+    return response
+
+
+@login_required
+def figure_json(request, job_id):
+    """Compact figure of a finished plot job, fetched by the page instead of being inlined."""
+    job = AnalysisJob.objects.filter(id=job_id, user=request.user, status=AnalysisJob.DONE).first()
+    if job is None or 'figure' not in (job.result or {}):
+        return JsonResponse({'error': 'Figure not found.'}, status=404)
+    # A job's figure never changes
+    return _compressed_json(request, json.dumps(job.result['figure'], separators=(',', ':')), max_age=3600)
+
+
+def figure_template(request, name):
+    """Theme template shared by every figure, cached by the browser."""
+    try:
+        payload = template_json(name)
+    except ValueError:
+        return JsonResponse({'error': 'Theme not found.'}, status=404)
+    return _compressed_json(request, payload, max_age=86400, public=True)
+
+
 def final_report(request):
     try:
         logger.info("Final Report page opened by user: %s", request.user)
@@ -149,24 +290,117 @@ def user_logout(request):
 SESSION_KEY = 'interactive_df_b64'
 STEP_KEY = 'interactive_step'
 ANALYSIS_RESULT_KEY = 'interactive_analysis_result'
+# Steps recording one operation in the transformation log
+TRANSFORM_STEPS = ('heterogeneous', 'missing', 'duplicate', 'outlier')
 
 
 # Helpers
-def _save_df_to_session(request, df: pd.DataFrame):
-    """Serialize DataFrame and store in Django session safely."""
-    pickled = pickle.dumps(df)
-    encoded = base64.b64encode(pickled).decode('utf-8')
-    request.session['dataframe'] = encoded
+def _file_record(request):
+    file_id = request.session.get('uploaded_file_id', None)
+    if not file_id:
+        return None
+    return UploadedFile.objects.filter(id=file_id, user=request.user).first()
+
+
+def _set_version(request, version, redo=None):
+    """Moves the session to another dataset version, a new step or checkout drops the redo stack."""
+    request.session['df_version'] = int(version or 0)
+    request.session['redo'] = list(redo or [])
+
+
+def _record_step(request, operation, params):
+    """
+    Records a transformation of the current version in the transformation log,
+    the session only keeps a (file id, version) handle of the result.
+    """
+    step = transform_log.record(_file_record(request), request.session.get('df_version', 0),
+                                operation, params, user=request.user)
+    _set_version(request, step.id)
+    return step
+
+
+def _undo(request):
+    version = request.session.get('df_version', 0)
+    step = TransformStep.objects.filter(id=version, uploaded_file_id=request.session.get('uploaded_file_id')).first()
+    if step is None:
+        return False
+    _set_version(request, step.parent_id, request.session.get('redo', []) + [step.id])
+    return True
+
+
+def _redo(request):
+    redo = request.session.get('redo', [])
+    if not redo:
+        return False
+    _set_version(request, redo[-1], redo[:-1])
+    return True
+
+
+def _checkout(request, version):
+    """Switches to any version of the dataset, e.g. another branch of its transformation log."""
+    if version and not TransformStep.objects.filter(
+            id=version, uploaded_file_id=request.session.get('uploaded_file_id')).exists():
+        return False
+    _set_version(request, version)
+    return True
+
 
 def _load_df_from_session(request):
-    df_json = request.session.get('df_json', None)
-    if not df_json:
+    file_record = _file_record(request)
+    if file_record is None:
+        return None
+    version = request.session.get('df_version', 0)
+    if version:
+        df = load_dataset(file_record, version)
+        if df is not None:
+            return df
+        logger.warning("Version %s of file %s is not in its transformation log, using original data.", version, file_record.id)
+        _set_version(request, 0)
+    return load_dataset(file_record)
+
+
+def _submit_job(request, kind, params=None):
+    """Queues a job on the current dataset, the interactive view shows its progress until it finishes."""
+    params = dict(params or {}, version=request.session.get('df_version', 0))
+    job = job_runner.submit(request.user, kind, uploaded_file=_file_record(request), params=params)
+    request.session['pending_job'] = job.id
+    return redirect('interactive_analysis')
+
+
+def _finish_pending_job(request):
+    """
+    Applies the result of the job started by the interactive view, if any.
+    Returns a response while the job is still running or when it produced a chart.
+    """
+    job_id = request.session.get('pending_job')
+    if not job_id:
+        return None
+    job = AnalysisJob.objects.filter(id=job_id, user=request.user).first()
+    if job is not None and job.status in (AnalysisJob.QUEUED, AnalysisJob.RUNNING):
+        return render(request, 'interactive_analysis.html', {'step': 'running', 'job': job})
+
+    del request.session['pending_job']
+    if job is None:
         return None
-    return pd.read_json(io.StringIO(df_json))
+    if job.status == AnalysisJob.FAILED:
+        messages.error(request, f"Background job failed: {job.error}")
+        return None
+    if 'df_version' in job.result:
+        _set_version(request, job.result['df_version'])
+        messages.success(request, "Handled heterogeneous columns successfully.")
+        request.session['step'] = 'transform_choice'
+    if 'figure' in job.result:
+        return render(request, 'interactive_analysis.html', {
+            'step': 'done',
+            'figure_job': job,
+            'figure_theme': job.result['figure'].get('template'),
+            'plotlyjs_url': plotlyjs_url(),
+        })
+    return None
 
 
 def _clear_session(request):
-    for key in ['df_json', 'step']:
+    for key in ['step', 'df_version', 'redo', 'pending_job']:
         if key in request.session:
             del request.session[key]
 
@@ -183,12 +417,20 @@ def interactive_analysis(request):
     """
 
     try:
+        response = _finish_pending_job(request)
+        if response is not None:
+            return response
+
         df = _load_df_from_session(request)
         if df is None:
             messages.error(request, "No dataset found in session. Please upload a file first.")
             return redirect('upload_file')
 
         step = request.session.get('step', 'overview')
+        if request.method == 'POST' and 'back' in request.POST and step in TRANSFORM_STEPS:
+            request.session['step'] = 'transform_choice'
+            return redirect('interactive_analysis')
+
         # STEP 0️⃣: Overview screen
         if step == 'overview':
             if request.method == 'POST':
@@ -199,7 +441,8 @@ def interactive_analysis(request):
 
             df_shape = df.shape
             df_dtypes = df.dtypes.astype(str).to_dict()
-            df_summary = df.describe(include='all').to_html(classes='table table-striped', border=0)
+            # Built from the cached column profiles, one scan per column per dataset version
+            df_summary = column_profiler.describe(df).to_html(classes='table table-striped', border=0, na_rep='')
 
             return render(request, 'interactive_analysis.html', {
                 'step': step,
@@ -222,8 +465,28 @@ def interactive_analysis(request):
                     request.session['step'] = 'outlier'
                 elif choice == 'skip':
                     request.session['step'] = 'analysis'
+                elif choice == 'undo' and not _undo(request):
+                    messages.error(request, "Nothing to undo.")
+                elif choice == 'redo' and not _redo(request):
+                    messages.error(request, "Nothing to redo.")
+                elif choice == 'checkout':
+                    version = request.POST.get('version', '')
+                    if not version.isdigit() or not _checkout(request, int(version)):
+                        messages.error(request, "Unknown dataset version.")
                 return redirect('interactive_analysis')
-            return render(request, 'interactive_analysis.html', {'step': step})
+
+            # Every step of the file, the ones leading to the current version are highlighted
+            version = request.session.get('df_version', 0)
+            file_record = _file_record(request)
+            current = {step.id for step in transform_log.lineage(file_record, version) or []}
+            return render(request, 'interactive_analysis.html', {
+                'step': step,
+                'history': transform_log.history(file_record),
+                'current_steps': current,
+                'df_version': version,
+                'can_undo': bool(version),
+                'can_redo': bool(request.session.get('redo')),
+            })
 
         # STEP 2️⃣: Heterogeneous data detection
         elif step == 'heterogeneous':
@@ -231,25 +494,23 @@ def interactive_analysis(request):
             # Example: hetero_cols = data_pipeline.detect_heterogeneous(df)
             hetero_cols = []  # placeholder
             if request.method == 'POST':
-                # 👉 TODO: Call your base class method to handle transformation
-                # Example: df = data_pipeline.handle_heterogeneous(df)
-                _save_df_to_session(request, df)
-                messages.success(request, "Handled heterogeneous columns successfully.")
-                request.session['step'] = 'transform_choice'
-                return redirect('interactive_analysis')
+                # Type inference runs in the job runner, the result becomes the next df_version
+                return _submit_job(request, 'auto_correct_datatypes')
             return render(request, 'interactive_analysis.html', {'step': step, 'columns': hetero_cols})
 
         # STEP 3️⃣: Missing value check
         elif step == 'missing':
-            # 👉 TODO: Use your own method to detect columns with missing data
-            missing_cols = []  # placeholder
+            missing_cols = list(df.columns[df.isna().any().to_numpy()])
             if request.method == 'POST':
                 column = request.POST.get('column')
                 method = request.POST.get('method')
-                if column and method:
-                    # 👉 TODO: Replace with your missing value handler
-                    # Example: df = data_pipeline.handle_missing(df, column, method)
-                    _save_df_to_session(request, df)
+                if column in missing_cols and method:
+                    try:
+                        # Only the filled column is stored, the other columns are shared with the previous version
+                        _record_step(request, 'fill_missing', {'column': column, 'method': method})
+                    except ValueError as e:
+                        messages.error(request, str(e))
+                        return redirect('interactive_analysis')
                     messages.success(request, f"Missing values in '{column}' handled using {method}.")
                     request.session['step'] = 'transform_choice'
                     return redirect('interactive_analysis')
@@ -257,54 +518,67 @@ def interactive_analysis(request):
 
         # STEP 4️⃣: Duplicate check
         elif step == 'duplicate':
-            # 👉 TODO: Use your own method to detect duplicates
-            dup_count = 0  # placeholder
-            if request.method == 'POST':
-                # 👉 TODO: Replace with your duplicate handler
-                # Example: df = data_pipeline.remove_duplicates(df)
-                _save_df_to_session(request, df)
-                messages.success(request, f"Removed {dup_count} duplicate rows.")
+            text_cols = [col for col in df.columns if is_text_dtype(df[col].dtype)]
+            # Name columns matched loosely ("ACME Inc." = "Acme Incorporated")
+            near = [col for col in request.POST.getlist('near') if col in text_cols]
+            if request.method == 'POST' and 'preview' not in request.POST:
+                # Stored as the positions of the kept rows
+                params = {'near': near, 'threshold': duplicate_engine.threshold} if near else {}
+                removed = _record_step(request, 'drop_duplicates', params)
+                messages.success(request, f"Removed {removed.rows_before - removed.rows_after} duplicate rows.")
                 request.session['step'] = 'transform_choice'
                 return redirect('interactive_analysis')
-            return render(request, 'interactive_analysis.html', {'step': step, 'duplicates': dup_count})
+            report = duplicate_engine.scan(df)
+            context = {
+                'step': step,
+                'duplicates': report['duplicate_rows'],
+                'column_duplicates': report['columns'],
+                'text_columns': text_cols,
+                'near': near,
+            }
+            if near:
+                context['near_duplicates'] = duplicate_engine.scan(df, near=near)['duplicate_rows']
+                context['near_groups'] = {col: duplicate_engine.near_groups(df[col]) for col in near}
+            return render(request, 'interactive_analysis.html', context)
 
         # STEP 5️⃣: Outlier check
         elif step == 'outlier':
-            # 👉 TODO: Detect numeric columns or use your own detection pipeline
-            num_cols = []  # placeholder
-            if request.method == 'POST':
+            num_cols = numeric_columns(df)
+            method = request.POST.get('method')
+            if method not in OUTLIER_METHODS:
+                method = outlier_engine.method
+            if request.method == 'POST' and 'preview' not in request.POST:
                 column = request.POST.get('column')
-                if column:
-                    # 👉 TODO: Replace with your outlier handling pipeline
-                    # Example: df = data_pipeline.handle_outliers(df, column)
-                    _save_df_to_session(request, df)
-                    messages.success(request, f"Outliers handled for '{column}'.")
+                if column in num_cols:
+                    _record_step(request, 'clip_outliers', {'column': column, 'method': method,
+                                                            'factor': OUTLIER_METHODS[method]})
+                    messages.success(request, f"Outliers handled for '{column}' ({method}).")
                     request.session['step'] = 'transform_choice'
                     return redirect('interactive_analysis')
-            return render(request, 'interactive_analysis.html', {'step': step, 'columns': num_cols})
+            # Every numeric column in one pass, the report is cached per dataset version
+            report = outlier_engine.detect(df, num_cols, method)
+            rows = [{'column': col, 'outliers': stats['outliers'], 'lower': stats['lower'], 'upper': stats['upper'],
+                     'percent': round(100 * stats['outliers'] / stats['count'], 2) if stats['count'] else 0}
+                    for col, stats in report['columns'].items()]
+            return render(request, 'interactive_analysis.html', {
+                'step': step,
+                'columns': num_cols,
+                'methods': list(OUTLIER_METHODS),
+                'method': method,
+                'outliers': rows,
+            })
 
         # STEP 6️⃣: Perform Analysis
         elif step == 'analysis':
             if request.method == 'POST':
                 analysis_type = request.POST.get('type')
                 columns = request.POST.getlist('columns')
+                theme = request.POST.get('theme') or None
+
+                # Figure is built by the job runner, see data_analysis_pipeline.build_figure
+                return _submit_job(request, 'plot', {'type': analysis_type, 'columns': columns, 'theme': theme})
 
-                # 👉 TODO: Replace these placeholders with your own plotting pipeline calls
-                # Example:
-                # if analysis_type == 'univariate':
-                #     plot_html = data_pipeline.univariate_analysis(df, columns)
-                # elif analysis_type == 'bivariate':
-                #     plot_html = data_pipeline.bivariate_analysis(df, columns)
-                # elif analysis_type == 'multivariate':
-                #     plot_html = data_pipeline.multivariate_analysis(df, columns)
-
-                plot_html = None  # placeholder
-                return render(request, 'interactive_analysis.html', {
-                    'step': 'done',
-                    'plot_html': plot_html
-                })
-
-            return render(request, 'interactive_analysis.html', {'step': step, 'columns': df.columns})
+            return render(request, 'interactive_analysis.html', {'step': step, 'columns': df.columns, 'themes': THEMES})
 
         # STEP 7️⃣: Done — End of interactive process
         elif step == 'done':
@@ -143,6 +143,61 @@ LOGGING = {
     },
 }
 
+# Parsed uploads are stored as columnar files on disk, not as blobs in SQLite
+DATASET_STORE_DIR = BASE_DIR / 'datasets'
+CSV_CHUNK_ROWS = 100_000    # rows parsed per chunk while streaming CSV uploads into the store
+DATASET_SKETCHES = True     # build quantile / distinct / heavy-hitter sketches during ingestion
+# Uploads are hashed while they are received, identical content is stored once
+FILE_UPLOAD_HANDLERS = [
+    'source.components.data_ingestion.HashingMemoryFileUploadHandler',
+    'source.components.data_ingestion.HashingTemporaryFileUploadHandler',
+]
+
+# Server-side DataFrame cache, the session only carries a (file id, version) handle
+DATAFRAME_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DATAFRAME_CACHE_MAX_ITEMS = 32
+DATAFRAME_CACHE_DIR = DATASET_STORE_DIR / 'cache'   # shared file-backed tier, None to disable
+# 'pyarrow' reads datasets as Arrow-backed frames from memory-mapped IPC copies (shared page cache,
+# dictionary encoded text), 'numpy' as regular pandas frames
+DATAFRAME_DTYPE_BACKEND = 'pyarrow'
+CATEGORY_MAX_RATIO = 0.5    # text columns with at most this share of distinct values become categoricals
+
+# Transformation log, every step stores only the columns / rows it changed
+TRANSFORM_LOG_DIR = DATASET_STORE_DIR / 'steps'
+
+# Near-duplicate rows: estimated Jaccard similarity (character 3-grams) of two names to match
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+# Default outlier method of the outlier step: 'iqr', 'zscore', 'mad' or 'isolation'
+OUTLIER_METHOD = 'iqr'
+
+# Execution backend of the lazy dataset queries ('arrow' pushdown scans, 'pandas' eager fallback)
+QUERY_BACKEND = 'arrow'
+
+# Background jobs (summary, type inference, plots) run in a local process pool
+JOB_WORKERS = os.cpu_count()
+JOB_RUNNER_EAGER = False    # True runs jobs inline in the request, useful for debugging
+JOB_TIMEOUT = 60 * 60       # seconds a running job may go without progress before it is queued again
+
+# Batch uploads, every file (zip archives are expanded) is parsed by its own background job
+BATCH_UPLOAD_MAX_FILES = 200
+BATCH_UPLOAD_MAX_BYTES = 2 * 1024 ** 3     # total size of the files once extracted
+DATA_UPLOAD_MAX_NUMBER_FILES = BATCH_UPLOAD_MAX_FILES
+
+# Column-parallel profiling / type inference, frames narrower than PARALLEL_MIN_COLUMNS stay serial
+# (inside a job worker the column workers are capped to cpu_count // JOB_WORKERS)
+COLUMN_WORKERS = os.cpu_count()
+PARALLEL_MIN_COLUMNS = 32
+
+# Scatter / line figures above this many points are decimated server side (binning, LTTB, sampling)
+PLOT_POINT_BUDGET = 20_000
+PLOT_THEME = 'plotly'   # default Plotly template of the figures
+
+# Built figures (JSON) per dataset version, builder and arguments
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+FIGURE_CACHE_MAX_ITEMS = 256
+FIGURE_CACHE_DIR = DATASET_STORE_DIR / 'figures'   # shared file-backed tier, None to disable
+
 LOGIN_URL = 'login'             # redirect to login if user not authenticated
 LOGIN_REDIRECT_URL = 'home'     # where to go after login
 LOGOUT_REDIRECT_URL = 'login'   # after logout, back to login page
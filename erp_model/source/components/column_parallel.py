@@ -0,0 +1,156 @@
+#base library
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.job_queue import init_django_worker, job_worker_cpus
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_workers = None  # Worker count the shared pool was created with
+_executor_lock = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """Shared column worker pool, created on first use and again when the worker count changes."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_django_worker)
+            _executor_workers = workers
+        return _executor
+
+
+def _setting(name, default):
+    # Settings are optional here, the components are also used from notebooks without Django
+    return getattr(settings, name, default) if settings.configured else default
+
+
+def resolve_workers(workers=None) -> int:
+    """
+    Column workers (processes or threads), ``settings.COLUMN_WORKERS`` by default.
+    Inside a job worker it is capped to that worker's share of the CPUs, the
+    ``JOB_WORKERS`` jobs running side by side would otherwise start
+    ``JOB_WORKERS * COLUMN_WORKERS`` processes.
+    """
+    workers = workers or _setting('COLUMN_WORKERS', None) or os.cpu_count() or 1
+    share = job_worker_cpus()
+    if share is not None:
+        workers = min(int(workers), share)
+    return max(1, int(workers))
+
+
+def _share_frame(df: pd.DataFrame) -> str:
+    """
+    Writes the frame once as an Arrow IPC file (in /dev/shm when available),
+    workers memory-map it instead of receiving a pickled copy.
+    """
+    from source.components.data_store import DatasetStore
+
+    shm = '/dev/shm'
+    directory = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else tempfile.gettempdir()
+    path = os.path.join(directory, f'erp-columns-{uuid.uuid4().hex}.arrow')
+    table = DatasetStore().to_arrow(df)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def _read_slice(path: str, columns: list, dtypes: dict = None) -> pd.DataFrame:
+    """
+    Columns of the shared file, cast back to ``dtypes`` (those of the caller's
+    frame): the Arrow round trip turns nullable, Arrow-backed and categorical
+    columns into numpy ones, the workers see what a serial run sees.
+    """
+    if path.endswith('.parquet'):
+        frame = pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    else:
+        with pa.memory_map(path) as source:
+            frame = pa.ipc.open_file(source).read_all().select(columns).to_pandas()
+    changed = {col: dtype for col, dtype in (dtypes or {}).items() if frame[col].dtype != dtype}
+    return frame.astype(changed) if changed else frame
+
+
+def _run_slice(func, path, columns, kwargs, dtypes=None):
+    return func(_read_slice(path, columns, dtypes), **kwargs)
+
+
+def map_columns(func, df: pd.DataFrame, columns=None, workers=None, source_path=None, **kwargs) -> dict:
+    """
+    Runs ``func(frame_slice, **kwargs) -> {column: result}`` over column slices
+    of ``df`` and merges the results.
+
+    With more than one worker and at least ``PARALLEL_MIN_COLUMNS`` columns the
+    slices run in a process pool. Workers read only their columns, either from
+    ``source_path`` (the dataset's Parquet file) or from a memory-mapped Arrow
+    copy of the frame, so the frame itself is never pickled. The slices keep the
+    dtypes of ``df``, results do not depend on the worker count.
+
+    Parameters:
+
+    func : (callable) : Module level function, it must be importable by the workers.
+    columns : (list | None) : Columns to process, all columns by default.
+    workers : (int | None) : Worker count, ``settings.COLUMN_WORKERS`` by default.
+    source_path : (str | None) : Parquet file holding exactly the data of ``df``.
+    """
+    columns = list(df.columns if columns is None else columns)
+    pool_size = resolve_workers(workers)
+    workers = min(pool_size, len(columns) or 1)
+    min_columns = _setting('PARALLEL_MIN_COLUMNS', 32)
+
+    if workers <= 1 or len(columns) < min_columns:
+        return func(df[columns], **kwargs)
+
+    try:
+        names = {str(col): col for col in columns}
+        shared = source_path is None
+        path = _share_frame(df[columns]) if shared else str(source_path)
+        try:
+            slices = [list(part) for part in np.array_split(np.array(list(names), dtype=object), workers) if len(part)]
+            dtypes = {str(col): df[col].dtype for col in columns}
+            pool = _pool(pool_size)
+            futures = [pool.submit(_run_slice, func, path, part, kwargs, {col: dtypes[col] for col in part})
+                       for part in slices]
+
+            results = {}
+            for future in futures:
+                for key, value in future.result().items():
+                    results[names.get(str(key), key)] = value
+            logger.info(f'{func.__name__} ran on {len(columns)} columns with {len(slices)} workers')
+            return results
+        finally:
+            if shared and os.path.exists(path):
+                os.remove(path)
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
+def shutdown():
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+            _executor_workers = None
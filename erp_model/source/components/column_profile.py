@@ -0,0 +1,180 @@
+#base library
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#app Modules
+from exception import CustomException
+from source.components import column_parallel
+from source.components.data_cache import dataset_key
+from source.components.running_stats import RunningStats
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.25, 0.5, 0.75)
+TOP_K = 10
+BLOCK_SIZE = 1_000_000
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _sorted_values(values: list) -> list:
+    """Sorted like ``Series.mode``, object columns mixing types (1 and 'a') are ordered by their text."""
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)
+
+
+def profile_column(series: pd.Series, top_k: int = TOP_K) -> dict:
+    """
+    Computes every statistic of one column from a single scan of its values.
+
+    Numeric columns get mean and variance from a blocked Welford/Chan merge,
+    quantiles from one partition of the non-null values, and all columns get
+    counts, top-k frequencies, mode and distinct count from one value count.
+
+    Returns:
+        dict : count, nulls, distinct, top (list of (value, count)), mode and,
+               when numeric, min, max, mean, variance, std and quantiles.
+    """
+    nulls = int(series.isna().sum())
+    profile = {'count': len(series) - nulls, 'nulls': nulls}
+
+    counts = series.value_counts(dropna=True, sort=True)
+    profile['distinct'] = len(counts)
+    profile['top'] = [(_scalar(value), int(count)) for value, count in counts.head(top_k).items()]
+    if len(counts):
+        modes = counts[counts == counts.iloc[0]].index
+        profile['mode'] = _sorted_values([_scalar(value) for value in modes])
+    else:
+        profile['mode'] = []
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if values.size:
+            moments = {}
+            for start in range(0, values.size, BLOCK_SIZE):
+                RunningStats.merge_numeric(moments, values[start:start + BLOCK_SIZE])
+            n = moments['numeric_count']
+            variance = moments['m2'] / (n - 1) if n > 1 else np.nan
+            profile.update(
+                min=moments['min'],
+                max=moments['max'],
+                mean=moments['mean'],
+                variance=variance,
+                std=float(np.sqrt(variance)),
+                quantiles=dict(zip(QUANTILES, np.quantile(values, QUANTILES).tolist())),
+            )
+    elif pd.api.types.is_datetime64_any_dtype(series) and profile['count']:
+        profile.update(min=series.min(), max=series.max())
+
+    return profile
+
+
+def _profile_columns(df: pd.DataFrame, top_k: int = TOP_K) -> dict:
+    """Column worker entry point of ``ColumnProfiler.profile_frame``."""
+    return {col: profile_column(df[col], top_k) for col in df.columns}
+
+
+class ColumnProfiler:
+    """
+    Column profile engine with a per dataset version LRU cache.
+
+    Frames handed out by the DataFrame cache carry their ``(dataset_id, version)``,
+    their profiles are computed once and reused by every statistic and table.
+    Untagged frames are profiled on every call.
+    """
+
+    def __init__(self, max_items=2048):
+        self.max_items = max_items
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+            return profile
+
+    def _remember(self, key, profile):
+        with self._lock:
+            self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.max_items:
+                self._profiles.popitem(last=False)
+
+    def profile(self, df: pd.DataFrame, column) -> dict:
+        try:
+            key = dataset_key(df)
+            if key is None:
+                return profile_column(df[column])
+            profile = self._cached((key, column))
+            if profile is None:
+                profile = profile_column(df[column])
+                self._remember((key, column), profile)
+            return profile
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def cached(self, df: pd.DataFrame, column):
+        """Profile computed earlier for this dataset version, None when there is none (nothing is scanned)."""
+        key = dataset_key(df)
+        return self._cached((key, column)) if key is not None else None
+
+    def profile_frame(self, df: pd.DataFrame, columns=None, workers=None) -> dict:
+        """Profiles of all (or the given) columns, missing ones are computed column-parallel."""
+        try:
+            columns = list(df.columns if columns is None else columns)
+            key = dataset_key(df)
+            profiles = {}
+            missing = []
+            for col in columns:
+                cached = self._cached((key, col)) if key is not None else None
+                if cached is None:
+                    missing.append(col)
+                else:
+                    profiles[col] = cached
+            if missing:
+                computed = column_parallel.map_columns(_profile_columns, df, columns=missing, workers=workers)
+                for col, profile in computed.items():
+                    profiles[col] = profile
+                    if key is not None:
+                        self._remember((key, col), profile)
+            return {col: profiles[col] for col in columns}
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def describe(self, df: pd.DataFrame, workers=None) -> pd.DataFrame:
+        """Overview table equivalent to ``df.describe(include='all')``, built from the profiles."""
+        rows = {}
+        for col, profile in self.profile_frame(df, workers=workers).items():
+            quantiles = profile.get('quantiles', {})
+            top = profile['top'][0] if profile['top'] else (None, None)
+            rows[col] = {
+                'count': profile['count'],
+                'nulls': profile['nulls'],
+                'unique': profile['distinct'],
+                'top': top[0],
+                'freq': top[1],
+                'mean': profile.get('mean'),
+                'std': profile.get('std'),
+                'min': profile.get('min'),
+                '25%': quantiles.get(0.25),
+                '50%': quantiles.get(0.5),
+                '75%': quantiles.get(0.75),
+                'max': profile.get('max'),
+            }
+        return pd.DataFrame(rows)
+
+
+# Shared per-process instance
+column_profiler = ColumnProfiler()
@@ -0,0 +1,208 @@
+"""
+Contingency tables of categorical columns without dense cross tabulations.
+
+Every column is factorized once into integer codes; the co-occurrence counts
+of two columns are the distinct values of ``code_x * levels_y + code_y``
+(``np.bincount`` when the table is small, a sort otherwise), so memory is
+proportional to the observed cells, not to ``levels_x * levels_y``. The
+chi-square statistic only needs the observed cells:
+
+    chi2 = n * (sum(O_ij² / (r_i * c_j)) - 1)
+
+which gives the test and Cramér's V of two 50k-level columns from their few
+hundred thousand non-zero cells. Results of frames handed out by the
+DataFrame cache are kept per dataset version.
+"""
+#base library
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.stats import chi2 as chi2_distribution
+
+#app Modules
+from exception import CustomException
+from source.components.data_cache import dataset_key
+from source.components.data_transformation import column_kind
+
+logger = logging.getLogger(__name__)
+
+DENSE_CELLS = 1 << 22       # tables up to this many cells are counted with a dense bincount
+EXPECTED_CELLS = 10_000     # expected frequencies are only returned for tables this small
+
+
+def categorical_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if column_kind(df[col].dtype) == 'Categorical']
+
+
+def codes(series: pd.Series, sort=False):
+    """
+    Integer codes of a column, missing values are -1. Sorted codes order the
+    labels like ``pd.crosstab``.
+
+    Returns:
+        tuple : (codes, labels)
+    """
+    values, labels = pd.factorize(series, sort=sort)
+    return values.astype(np.int64, copy=False), labels
+
+
+def pair_counts(x: np.ndarray, nx: int, y: np.ndarray, ny: int):
+    """
+    Non-zero cells of the contingency table of two code arrays, rows with a
+    missing value in either column are left out.
+
+    Returns:
+        tuple : (row codes, column codes, counts) of the observed cells
+    """
+    valid = (x >= 0) & (y >= 0)
+    cells = x[valid] * ny + y[valid]
+    if nx * ny <= max(DENSE_CELLS, 4 * len(cells)):
+        counts = np.bincount(cells, minlength=nx * ny)
+        cells = np.flatnonzero(counts)
+        counts = counts[cells]
+    else:
+        cells, counts = np.unique(cells, return_counts=True)
+    return cells // ny, cells % ny, counts
+
+
+def _statistic(rows, cols, counts, correction=True) -> dict:
+    """Chi-square test of independence and Cramér's V from the observed cells."""
+    row_totals = np.bincount(rows, counts)
+    col_totals = np.bincount(cols, counts)
+    n = float(counts.sum())
+    levels_x, levels_y = int((row_totals > 0).sum()), int((col_totals > 0).sum())
+    dof = (levels_x - 1) * (levels_y - 1)
+    if n == 0 or dof == 0:
+        return {'chi2': 0.0, 'p_value': 1.0, 'dof': max(dof, 0), 'cramers_v': 0.0,
+                'n': int(n), 'rows': levels_x, 'columns': levels_y, 'cells': len(counts)}
+
+    observed = counts.astype(np.float64)
+    chi2 = n * ((observed ** 2 / (row_totals[rows] * col_totals[cols])).sum() - 1.0)
+    chi2 = max(chi2, 0.0)
+    statistic = chi2
+    if correction and dof == 1:
+        # Yates' continuity correction of 2 x 2 tables, as ``scipy.stats.chi2_contingency``
+        table = np.zeros((2, 2))
+        table[np.unique(rows, return_inverse=True)[1], np.unique(cols, return_inverse=True)[1]] = observed
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+        diff = expected - table
+        table = table + np.minimum(0.5, np.abs(diff)) * np.sign(diff)
+        statistic = float(((table - expected) ** 2 / expected).sum())
+
+    return {
+        'chi2': float(statistic),
+        'p_value': float(chi2_distribution.sf(statistic, dof)),
+        'dof': dof,
+        # Cramér's V is taken from the uncorrected statistic
+        'cramers_v': float(np.sqrt(chi2 / n / min(levels_x - 1, levels_y - 1))),
+        'n': int(n),
+        'rows': levels_x,
+        'columns': levels_y,
+        'cells': len(counts),
+    }
+
+
+class ContingencyEngine:
+    """Sparse contingency tables, chi-square tests and Cramér's V matrices, see the module doc."""
+
+    def __init__(self, max_items=1024):
+        self.max_items = max_items
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def table(self, df: pd.DataFrame, x, y):
+        """
+        Sparse contingency table of two columns.
+
+        Returns:
+            tuple : (``scipy.sparse.csr_matrix`` of counts, row labels, column labels)
+        """
+        try:
+            cx, labels_x = codes(df[x], sort=True)
+            cy, labels_y = codes(df[y], sort=True)
+            rows, cols, counts = pair_counts(cx, len(labels_x), cy, len(labels_y))
+            matrix = coo_matrix((counts, (rows, cols)), shape=(len(labels_x), len(labels_y))).tocsr()
+            return matrix, labels_x, labels_y
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def chi_square(self, df: pd.DataFrame, x, y, correction=True) -> dict:
+        """
+        Chi-square test of independence of two categorical columns.
+
+        Returns:
+            dict : {'chi2', 'p_value', 'dof', 'cramers_v', 'n', 'rows', 'columns', 'cells'},
+                   rows / columns are the observed levels and cells the non-zero cells.
+        """
+        try:
+            key = dataset_key(df)
+            key = (key, 'chi2', x, y, correction) if key is not None else None
+            result = self._cached(key)
+            if result is None:
+                cx, labels_x = codes(df[x])
+                cy, labels_y = codes(df[y])
+                result = _statistic(*pair_counts(cx, len(labels_x), cy, len(labels_y)), correction=correction)
+                self._remember(key, result)
+            return result
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def expected(self, df: pd.DataFrame, x, y) -> np.ndarray:
+        """Dense expected frequencies of the observed levels, only for tables up to ``EXPECTED_CELLS`` cells."""
+        matrix, _, _ = self.table(df, x, y)
+        row_totals = np.asarray(matrix.sum(axis=1)).ravel()
+        col_totals = np.asarray(matrix.sum(axis=0)).ravel()
+        row_totals, col_totals = row_totals[row_totals > 0], col_totals[col_totals > 0]
+        if len(row_totals) * len(col_totals) > EXPECTED_CELLS:
+            raise ValueError(f"Contingency table of '{x}' and '{y}' is too large for dense expected frequencies")
+        return np.outer(row_totals, col_totals) / row_totals.sum()
+
+    def association_matrix(self, df: pd.DataFrame, columns=None) -> pd.DataFrame:
+        """
+        Cramér's V of every pair of categorical ``columns`` (all by default),
+        every column is factorized once.
+        """
+        try:
+            columns = categorical_columns(df) if columns is None else list(columns)
+            key = dataset_key(df)
+            key = (key, 'cramers_v', tuple(columns)) if key is not None else None
+            matrix = self._cached(key)
+            if matrix is None:
+                coded = [codes(df[col]) for col in columns]
+                values = np.eye(len(columns))
+                for i in range(len(columns)):
+                    for j in range(i + 1, len(columns)):
+                        (cx, labels_x), (cy, labels_y) = coded[i], coded[j]
+                        counts = pair_counts(cx, len(labels_x), cy, len(labels_y))
+                        values[i, j] = values[j, i] = _statistic(*counts, correction=False)['cramers_v']
+                matrix = pd.DataFrame(values, index=columns, columns=columns)
+                self._remember(key, matrix)
+            return matrix.copy()
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def _remember(self, key, result):
+        if key is None:
+            return
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_items:
+                self._results.popitem(last=False)
+
+
+# Shared per-process instance
+contingency_engine = ContingencyEngine()
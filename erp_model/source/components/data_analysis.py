@@ -1,16 +1,23 @@
 from exception import CustomException
-import io
 import logging
 import sys
+import numpy as np
 import pandas as pd
-from scipy.stats import chi2_contingency
-import plotly.express as px
 
 from django.shortcuts import redirect
 from erp_app.models import UploadedFile
 from django.contrib import messages
 
 from source.components import data_transformation, plotly_calc
+from source.components.data_store import DatasetStore
+from source.components.column_profile import column_profiler
+from source.components.contingency import EXPECTED_CELLS, contingency_engine
+from source.components.data_cache import dataset_key
+from source.components.duplicates import duplicate_engine
+from source.components.figure_cache import figure_cache
+from source.components.outliers import outlier_engine
+from source.components.query_engine import query_engine
+from source.components.sketches import load_sketches
 
 #obejcts Creation
 logger = logging.getLogger(__name__)
@@ -18,6 +25,7 @@ datainfo = data_transformation.DataInfo()
 onevariable = plotly_calc.OneVariable()
 twovariable = plotly_calc.TwoVariable()
 regression = plotly_calc.Regression()
+store = DatasetStore()
 
 
 class BasisDataAnalysis:
@@ -32,32 +40,38 @@ class BasisDataAnalysis:
             messages.error(request, "File not found.")
             return redirect('home')
 
-        file_stream = io.BytesIO(file_record.data)
-        df = None
+        if not store.exists(file_record.file_path):
+            messages.error(request, "Stored dataset is missing, please upload the file again.")
+            return redirect('home')
 
         try:
-            if file_record.name.endswith('.csv'):
-                df = pd.read_csv(file_stream, encoding='utf-8', on_bad_lines='skip')
-            else:
-                df = pd.read_excel(file_stream)
-        except pd.errors.EmptyDataError:
-            messages.error(request, "Uploaded file is empty or invalid CSV format.")
+            return self.summarize(file_record)
+        except ValueError as e:
+            messages.error(request, str(e))
             return redirect('home')
         except Exception as e:
             messages.error(request, f"Error reading file: {e}")
             return redirect('home')
 
+    def summarize(self, file_record):
+        """
+        Builds the summary context of a stored dataset, no request needed so it can run as a background job.
+        Only the first rows are read, the column types come from the same (typed) preview.
+        """
+        query = query_engine.scan(file_record, store)
+        df = query.head(5)
+
         if df is None or df.empty:
-            messages.error(request, "The file contains no readable data.")
-            return redirect('home')
+            raise ValueError("The file contains no readable data.")
 
         # Continue processing...
-        summary_html = df.head(5).to_html(classes='table table-dark table-striped')
+        summary_html = df.to_html(classes='table table-dark table-striped')
         column_data_info = datainfo.get_datatype(df)
 
         context = {
-            'file_name': file_record.name,
-            'rows': len(df),
+            'file_name': f'{file_record.name} [{file_record.sheet}]' if file_record.sheet else file_record.name,
+            'workbook': bool(file_record.workbook),
+            'rows': file_record.rows,
             'numeric_columns': column_data_info['Numeric'],
             'categorical_columns': column_data_info['Categorical'],
             'datetime_columns': column_data_info['DateTime'],
@@ -66,57 +80,128 @@ class BasisDataAnalysis:
 
         return context
 
+    def column_stats(self, file_record, columns, where=None):
+        """
+        Count, nulls, min, max, mean and std of some columns of a stored dataset,
+        streamed from the store without loading the other columns.
+
+        Parameters:
+
+        file_record : (UploadedFile) : Dataset to read.
+        columns : (list) : Columns to summarize.
+        where : (list | None) : Row filters as ``(column, op, value)`` tuples, see ``Query.where``.
+        """
+        try:
+            query = query_engine.scan(file_record, store).select(*columns)
+            for column, op, value in where or []:
+                query = query.where(column, op, value)
+            return query.stats()
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+def _dataset_record(df: pd.DataFrame):
+    """Stored upload of an unchanged copy of the ingested dataset, None for transformed or derived frames."""
+    key = dataset_key(df)
+    if key is None or key[1] != 0:
+        return None
+    # Frames are keyed by ``UploadedFile.dataset_id``, the content hash or the id of older uploads
+    records = UploadedFile.objects.filter(id=key[0]) if key[0].isdigit() else UploadedFile.objects.filter(content_hash=key[0])
+    return records.exclude(file_path='').first()
+
+
+def _dataset_sketches(df: pd.DataFrame):
+    """Sketches built at ingestion, only valid for an unchanged copy of the uploaded dataset."""
+    file_record = _dataset_record(df)
+    if file_record is None:
+        return None
+    return load_sketches(str(store.sketch_path(file_record.file_path)))
+
+
+def _stored_column_stats(df: pd.DataFrame, column):
+    """
+    Count, min, max, mean, variance and std of a numeric column of an unchanged
+    stored dataset, streamed by the query engine from that column only. None
+    for other frames and columns.
+    """
+    series = df[column]
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return None
+    file_record = _dataset_record(df)
+    if file_record is None or not store.exists(file_record.file_path):
+        return None
+    stats = BasisDataAnalysis().column_stats(file_record, [column])['columns'].get(str(column))
+    return stats if stats and 'mean' in stats else None
+
+
 class DataQualityCheck:
     def check_missing(self,df, column):
         try:
             pass
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
-    def handle_missing(self,df, column):
+    def handle_missing(self,df, column, mode='mean'):
+        """Returns ``column`` with its missing values filled, see ``ColumnTranformer.handle_missing``."""
         try:
-            df[column].fillna(df[column].mean()) 
-
-        
+            return data_transformation.ColumnTranformer().handle_missing(df, column, mode)
+        except ValueError:
+            raise
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
         
     def duplicate_values(self,df : pd.DataFrame , request, column):
+        """Duplicated rows and duplicated values of every column, see ``DuplicateEngine.scan``."""
         try:
             logger.info(f'Duplicate Values checked by user {request.user}')
-            duplicate_value = {}
-
-            for col in df.columns:
-                duplicate_value[col] = df[col].duplicated().sum()
-            return duplicate_value
+            return duplicate_engine.scan(df)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
             
-    def outlier_boxplot(self,request, df: pd.DataFrame , column : str):
+    def outlier_boxplot(self,request, df: pd.DataFrame , column : str, theme=None):
         try:
             logger.info(f'Outlier Boxplot Accessed by user : {request.user}')
-            return onevariable.boxplot(df)
+            return onevariable.boxplot(df, column, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
     
-    def outlier_statstical(self, request,df: pd.DataFrame, column):
+    def outlier_statstical(self, request,df: pd.DataFrame, column, approximate=False):
+        """
+        IQR outlier statistics of a column. With ``approximate=True`` the quartiles
+        and the outlier count come from the ingestion-time quantile sketch
+        (rank error ~1%) instead of rescanning the column.
+        """
         try:
             logger.info(f'Outlier Statistical accessed by user {request.user}')
-            data = df[column]
-            Q1 = data.quantile(0.25)
-            Q3 = data.quantile(0.75)
-
-            IQR = Q3 -Q1
-
-            LOWERBOUND = Q1 - (1.5 * IQR)
-            UPPERBOUND = Q3 - (1.5 * IQR)
-
+            if approximate:
+                sketches = _dataset_sketches(df)
+                sketch = sketches.quantiles.get(str(column)) if sketches else None
+                if sketch is not None and sketch.n:
+                    Q1, Q3 = sketch.quantile([0.25, 0.75])
+                    IQR = Q3 - Q1
+                    LOWERBOUND = Q1 - (1.5 * IQR)
+                    UPPERBOUND = Q3 + (1.5 * IQR)
+                    outside = sketch.rank(LOWERBOUND) + (1 - sketch.rank(np.nextafter(UPPERBOUND, np.inf)))
+                    return {
+                        'Q1' : Q1,
+                        'Q3' : Q3,
+                        'IQR' : IQR,
+                        'LOWERBOUND' : LOWERBOUND,
+                        'UPPERBOUND' : UPPERBOUND,
+                        'NumOfOutlier' : int(round(outside * sketch.n)),
+                        'Approximate' : True,
+                    }
+                logger.info(f'No quantile sketch for {column}, computing exact outliers')
+
+            # Shares the cached report of the outlier step and the box plots
+            report = outlier_engine.detect(df, [column], 'iqr')['columns'][column]
             context = {
-                'Q1' : Q1,
-                'Q3' : Q3,
-                'IQR' : IQR,
-                'LOWERBOUND' : LOWERBOUND,
-                'UPPERBOUND' : UPPERBOUND,
-                'NumOfOutlier' : len(data[(data < LOWERBOUND | data > UPPERBOUND)]) 
+                'Q1' : report['q1'],
+                'Q3' : report['q3'],
+                'IQR' : report['q3'] - report['q1'] if report['count'] else None,
+                'LOWERBOUND' : report['lower'],
+                'UPPERBOUND' : report['upper'],
+                'NumOfOutlier' : report['outliers'],
             }
 
             return context
@@ -124,42 +209,80 @@ class DataQualityCheck:
         except Exception as e:
             raise CustomException(e, sys) #type: ignore    
         
-    def inconsistency(self,request, df : pd.DataFrame, column : str):
+    def inconsistency(self,request, df : pd.DataFrame, column : str, approximate=False):
+        """
+        Distinct values of a column. With ``approximate=True`` the distinct count
+        comes from the HyperLogLog sketch (~1.6% error) built at ingestion and
+        'Top Values' holds the most frequent values with their estimated counts
+        from the heavy-hitter sketch, instead of the full list of distinct values.
+        """
         try:
             logger.info(f'inconsistency func is accessed by {request.user}')
+            if approximate:
+                sketches = _dataset_sketches(df)
+                if sketches and str(column) in sketches.distinct:
+                    return {
+                        'Top Values' : sketches.heavy[str(column)].top(),
+                        'Numer of Unique' : sketches.distinct[str(column)].estimate(),
+                        'Approximate' : True,
+                    }
+                logger.info(f'No distinct sketch for {column}, computing exact values')
+
+            unique = df[column].unique()
             return {
-                'Unique Values' : df[column].unique(),
-                'Numer of Unique' : len(df[column].unique())
+                'Unique Values' : unique,
+                'Numer of Unique' : len(unique)
             }
         
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
         
 class UniVariate:
+    """
+    Single column statistics, all served from one cached column profile instead of a scan per statistic.
+    Moments of an unchanged stored dataset without a profile yet come from the query engine.
+    """
+
+    def _profile(self, df: pd.DataFrame, column : str):
+        profile = column_profiler.cached(df, column)
+        if profile is None:
+            profile = _stored_column_stats(df, column) or column_profiler.profile(df, column)
+        return profile
+
+    def _numeric_profile(self, df: pd.DataFrame, column : str):
+        profile = self._profile(df, column)
+        return profile if 'mean' in profile else None
+
     def mean(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Mean function accessed by {request.user}')
-            return df[column].mean()
+            profile = self._numeric_profile(df, column)
+            return profile['mean'] if profile else df[column].mean()
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
     def mode(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Mode function accessed by {request.user}')
-            return df[column].mode()
+            profile = column_profiler.profile(df, column)
+            return pd.Series(profile['mode'], name=column)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
     def median(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Median function accessed by {request.user}')
-            return df[column].median()
+            profile = column_profiler.profile(df, column)
+            return profile['quantiles'][0.5] if 'quantiles' in profile else df[column].median()
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
     def range(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Range function accessed by {request.user}')
+            profile = self._profile(df, column)
+            if 'max' in profile:
+                return profile['max'] - profile['min']
             return df[column].max() - df[column].min()
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
@@ -167,72 +290,78 @@ class UniVariate:
     def variance(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Variance function accessed by {request.user}')
-            return df[column].var()
+            profile = self._numeric_profile(df, column)
+            return profile['variance'] if profile else df[column].var()
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
     def standard_deviation(self, request, df: pd.DataFrame, column : str):
         try:
             logger.info(f'Std. Variance function accessed by {request.user}')
-            return df[column].std()
+            profile = self._numeric_profile(df, column)
+            return profile['std'] if profile else df[column].std()
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
-    def Visualization(self, request, df : pd.DataFrame, column : str, visual : str):
+    @figure_cache.cached
+    def Visualization(self, request, df : pd.DataFrame, column : str, visual : str, theme=None):
         try:
             logger.info(f'Visualization function accessed by {request.user}')
             if visual == 'Histogram':
-                return onevariable.histogram(df,column)
+                return onevariable.histogram(df,column, theme=theme)
 
             elif visual == 'Boxplot':
-                return onevariable.boxplot(df,column)
+                return onevariable.boxplot(df,column, theme=theme)
             
             elif visual == 'Violin':
-                return onevariable.violin(df,column)
+                return onevariable.violin(df,column, theme=theme)
             
             elif visual == 'Bar':
-                return onevariable.bar(df,column)
+                return onevariable.bar(df,column, theme=theme)
             
             elif visual == 'Pie':
-                return onevariable.pie(df,column)    
+                return onevariable.pie(df,column, theme=theme)    
             
             elif visual == 'Donut':
-                return onevariable.donut(df,column)
+                return onevariable.donut(df,column, theme=theme)
             
             elif visual == 'Line_unsorted':
-                return onevariable.line_unsorted(df,column)
+                return onevariable.line_unsorted(df,column, theme=theme)
             
             elif visual == 'Line_sorted':
-                return onevariable.line_sorted(df,column)      
+                return onevariable.line_sorted(df,column, theme=theme)      
 
         except Exception as e:
             raise CustomException(e, sys) #type: ignore 
         
 class BiVariateNumerical:
-    def Visualization(self, df : pd.DataFrame,visual : str, column1, column2):
+    @figure_cache.cached
+    def Visualization(self, df : pd.DataFrame,visual : str, column1, column2, theme=None):
         try:
             if visual == 'Scatter':
-                return twovariable.scatter(df, x = column1,y = column2)
+                return twovariable.scatter(df, x = column1,y = column2, theme=theme)
             
             elif visual == 'Line':
-                return twovariable.line(df, x = column1, y = column2)
+                return twovariable.line(df, x = column1, y = column2, theme=theme)
 
             elif visual == 'Area':
-                return twovariable.area(df, x = column1, y = column2)
+                return twovariable.area(df, x = column1, y = column2, theme=theme)
 
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
     
-    def correlation_heatmap(self, df: pd.DataFrame, cols: list):
+    @figure_cache.cached
+    def correlation_heatmap(self, df: pd.DataFrame, cols: list, theme=None):
         try:
-            return twovariable.correlation_heatmap(df, cols)
+            return twovariable.correlation_heatmap(df, cols, theme=theme)
 
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
     
-    def regression_analysis(self, df : pd.DataFrame , cols):
+    @figure_cache.cached
+    def regression_analysis(self, df : pd.DataFrame , cols, theme=None, kind='ols'):
         try:
-            return regression.RegressionPlot(df, cols=cols)
+            return regression.RegressionPlot(df, cols=cols, theme=theme, kind=kind)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
@@ -242,15 +371,22 @@ class BiVariateCategorical:
     """Handles bivariate analysis where both variables are categorical or a mix of categorical + numeric."""
 
     def chisquaretest(self, df: pd.DataFrame, cols: list):
-        """Performs Chi-square test for independence between two categorical variables."""
+        """
+        Performs Chi-square test for independence between two categorical variables.
+        Computed from the sparse contingency table, the dense expected frequencies
+        are only returned for small tables (None otherwise).
+        """
         try:
-            contingency_table = pd.crosstab(df[cols[0]], df[cols[1]])
-            chi2, p_value, dof, expected = chi2_contingency(contingency_table)
+            result = contingency_engine.chi_square(df, cols[0], cols[1])
+            expected = None
+            if result['rows'] * result['columns'] <= EXPECTED_CELLS:
+                expected = contingency_engine.expected(df, cols[0], cols[1])
 
             return {
-                "Chi-Square Statistic": chi2,
-                "P-value": p_value,
-                "Degrees of Freedom": dof,
+                "Chi-Square Statistic": result['chi2'],
+                "P-value": result['p_value'],
+                "Degrees of Freedom": result['dof'],
+                "Cramer's V": result['cramers_v'],
                 "Expected Frequencies": expected
             }
 
@@ -258,7 +394,8 @@ class BiVariateCategorical:
             raise CustomException(e, sys)  # type: ignore
 
 
-    def Visualization(self, df: pd.DataFrame, cols: list, dtypes: list, visual: str):
+    @figure_cache.cached
+    def Visualization(self, df: pd.DataFrame, cols: list, dtypes: list, visual: str, theme=None):
         """
         Creates visualizations depending on the datatype of columns.
         Supports:
@@ -267,40 +404,37 @@ class BiVariateCategorical:
         - (Numeric + Numeric)
         """
         try:
+            # Any numpy, nullable, compact or Arrow dtype (or its name), e.g. 'int8', 'category'
+            kinds = sorted(data_transformation.column_kind(pd.api.types.pandas_dtype(dtype)) for dtype in dtypes)
+
             # Case 1: Categorical + Numeric
-            if (dtypes == ['int64', 'object'] or dtypes == ['float64', 'object'] or
-                dtypes == ['object', 'int64'] or dtypes == ['object', 'float64']):
+            if kinds == ['Categorical', 'Numeric']:
                 
                 if visual == 'Bar':
-                    return twovariable.bar(df, x=cols[0], y=cols[1])
+                    return twovariable.bar(df, x=cols[0], y=cols[1], theme=theme)
                 elif visual == 'Column':
-                    return twovariable.column(df, x=cols[0], y=cols[1])
+                    return twovariable.column(df, x=cols[0], y=cols[1], theme=theme)
                 elif visual == 'Lollipop':
-                    return twovariable.lollipop(df, x=cols[0], y=cols[1])
+                    return twovariable.lollipop(df, x=cols[0], y=cols[1], theme=theme)
             
             # Case 2: Numeric + Numeric
-            elif (dtypes == ['int64', 'int64'] or dtypes == ['float64', 'float64'] or
-                  dtypes == ['int64', 'float64'] or dtypes == ['float64', 'int64']):
+            elif kinds == ['Numeric', 'Numeric']:
                 
                 if visual == 'Scatter':
-                    return twovariable.scatter(df, x=cols[0], y=cols[1])
+                    return twovariable.scatter(df, x=cols[0], y=cols[1], theme=theme)
                 elif visual == 'Line':
-                    return twovariable.line(df, x=cols[0], y=cols[1])
+                    return twovariable.line(df, x=cols[0], y=cols[1], theme=theme)
                 elif visual == 'Area':
-                    return twovariable.area(df, x=cols[0], y=cols[1])
+                    return twovariable.area(df, x=cols[0], y=cols[1], theme=theme)
                 elif visual == 'CorrelationHeatmap':
-                    return twovariable.correlation_heatmap(df, cols)
+                    return twovariable.correlation_heatmap(df, cols, theme=theme)
             
             # Case 3: Categorical + Categorical
-            elif dtypes == ['object', 'object']:
+            elif kinds == ['Categorical', 'Categorical']:
                 if visual == 'Stacked Bar':
-                    fig = px.bar(df, x=cols[0], color=cols[1], title=f"Stacked Bar of {cols[1]} by {cols[0]}")
-                    fig.update_layout(barmode='stack')
-                    return fig
+                    return twovariable.stacked_bar(df, x=cols[0], color=cols[1], theme=theme)
                 elif visual == 'Grouped Bar':
-                    fig = px.bar(df, x=cols[0], color=cols[1], title=f"Grouped Bar of {cols[1]} by {cols[0]}")
-                    fig.update_layout(barmode='group')
-                    return fig
+                    return twovariable.grouped_bar(df, x=cols[0], color=cols[1], theme=theme)
             
             else:
                 raise ValueError("Unsupported combination of datatypes for visualization.")
@@ -325,73 +459,80 @@ class MultiVariate:
     # 3-column combinations
     # -------------------------------
 
-    def scatter_color(self, request, df, x=None, y=None, cat=None):
+    @figure_cache.cached
+    def scatter_color(self, request, df, x=None, y=None, cat=None, theme=None):
         """
         3-column: Numeric + Numeric + Categorical → scatter plot colored by category
         """
         try:
             logger.info(f"3-Col scatter_color accessed by {request.user}")
-            return self.multiplot.scatter_color(df, x, y, cat)
+            return self.multiplot.scatter_color(df, x, y, cat, theme=theme)
         except Exception as e:
             raise CustomException(e, sys)#type: ignore
 
-    def bubble(self, request, df, x=None, y=None, size=None):
+    @figure_cache.cached
+    def bubble(self, request, df, x=None, y=None, size=None, theme=None):
         """
         3-column: Numeric + Numeric + Numeric → bubble chart
         """
         try:
             logger.info(f"3-Col bubble accessed by {request.user}")
-            return self.multiplot.bubble(df, x, y, size)
+            return self.multiplot.bubble(df, x, y, size, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def box_by_cat(self, request, df, cat=None, num=None, color=None):
+    @figure_cache.cached
+    def box_by_cat(self, request, df, cat=None, num=None, color=None, theme=None):
         """
         3-column: Box plot by category, colored by another categorical variable
         """
         try:
             logger.info(f"3-Col box_by_cat accessed by {request.user}")
-            return self.multiplot.box_by_cat(df, cat, num, color)
+            return self.multiplot.box_by_cat(df, cat, num, color, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def line_time_group(self, request, df, time_col=None, val=None, cat=None):
+    @figure_cache.cached
+    def line_time_group(self, request, df, time_col=None, val=None, cat=None, theme=None):
         """
         3-column: Datetime + Numeric + Categorical → time series by category
         """
         try:
             logger.info(f"3-Col line_time_group accessed by {request.user}")
-            return self.multiplot.line_time_group(df, time_col, val, cat)
+            return self.multiplot.line_time_group(df, time_col, val, cat, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def area_time_group(self, request, df, time_col=None, val=None, cat=None):
+    @figure_cache.cached
+    def area_time_group(self, request, df, time_col=None, val=None, cat=None, theme=None):
         """
         3-column: Datetime + Numeric + Categorical → area chart by category
         """
         try:
             logger.info(f"3-Col area_time_group accessed by {request.user}")
-            return self.multiplot.area_time_group(df, time_col, val, cat)
+            return self.multiplot.area_time_group(df, time_col, val, cat, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def grouped_bar(self, request, df, cat1=None, cat2=None, val=None):
+    @figure_cache.cached
+    def grouped_bar(self, request, df, cat1=None, cat2=None, val=None, theme=None):
         """
         3-column: Categorical + Categorical + Numeric → grouped bar
         """
         try:
             logger.info(f"3-Col grouped_bar accessed by {request.user}")
-            return self.multiplot.grouped_bar(df, cat1, cat2, val)
+            return self.multiplot.grouped_bar(df, cat1, cat2, val, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def heatmap_pivot(self, request, df, cat1=None, cat2=None, val=None):
+    @figure_cache.cached
+    def heatmap_pivot(self, request, df, cat1=None, cat2=None, val=None, theme=None):
         """
         3-column: Categorical + Categorical + Numeric → heatmap (pivoted mean)
         """
         try:
             logger.info(f"3-Col heatmap_pivot accessed by {request.user}")
-            return self.multiplot.heatmap_pivot(df, cat1, cat2, val)
+            return self.multiplot.heatmap_pivot(df, cat1, cat2, val, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
@@ -399,53 +540,58 @@ class MultiVariate:
     # 4-column combinations
     # -------------------------------
 
-    def box_color_facet(self, request, df, num1=None, num2=None, cat1=None, cat2=None):
+    @figure_cache.cached
+    def box_color_facet(self, request, df, num1=None, num2=None, cat1=None, cat2=None, theme=None):
         """
         4-column: Two numerics + two categoricals → faceted box plot
         """
         try:
             logger.info(f"4-Col box_color_facet accessed by {request.user}")
-            return self.multiplot.box_color_facet(df, num1, num2, cat1, cat2)
+            return self.multiplot.box_color_facet(df, num1, num2, cat1, cat2, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def faceted_bar(self, request, df, num=None, cat1=None, cat2=None):
+    @figure_cache.cached
+    def faceted_bar(self, request, df, num=None, cat1=None, cat2=None, theme=None):
         """
         4-column: Numeric + two categoricals → faceted bar chart
         """
         try:
             logger.info(f"4-Col faceted_bar accessed by {request.user}")
-            return self.multiplot.faceted_bar(df, num, cat1, cat2)
+            return self.multiplot.faceted_bar(df, num, cat1, cat2, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def scatter_size_color(self, request, df, x=None, y=None, size=None, cat=None):
+    @figure_cache.cached
+    def scatter_size_color(self, request, df, x=None, y=None, size=None, cat=None, theme=None):
         """
         4-column: Numeric + Numeric + Numeric + Categorical → scatter with color and size encoding
         """
         try:
             logger.info(f"4-Col scatter_size_color accessed by {request.user}")
-            return self.multiplot.scatter_size_color(df, x, y, size, cat)
+            return self.multiplot.scatter_size_color(df, x, y, size, cat, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def parallel_coordinates(self, request, df, col1=None, col2=None, col3=None, col4=None):
+    @figure_cache.cached
+    def parallel_coordinates(self, request, df, col1=None, col2=None, col3=None, col4=None, theme=None):
         """
         4-column: Parallel coordinates plot
         """
         try:
             logger.info(f"4-Col parallel_coordinates accessed by {request.user}")
-            return self.multiplot.parallel_coordinates(df, col1, col2, col3, col4)
+            return self.multiplot.parallel_coordinates(df, col1, col2, col3, col4, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def scatter_geo(self, request, df, lat=None, lon=None, cat=None, val=None):
+    @figure_cache.cached
+    def scatter_geo(self, request, df, lat=None, lon=None, cat=None, val=None, theme=None):
         """
         4-column: Geo scatter → latitude, longitude, color, size
         """
         try:
             logger.info(f"4-Col scatter_geo accessed by {request.user}")
-            return self.multiplot.scatter_geo(df, lat, lon, cat, val)
+            return self.multiplot.scatter_geo(df, lat, lon, cat, val, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
@@ -453,42 +599,57 @@ class MultiVariate:
     # Many-column combinations (5+)
     # -------------------------------
 
-    def parallel_coords(self, request, df):
+    @figure_cache.cached
+    def parallel_coords(self, request, df, columns=None, theme=None):
         """
         5+ columns: Parallel coordinate matrix
         """
         try:
             logger.info(f"Many-Col parallel_coords accessed by {request.user}")
-            return self.multiplot.parallel_coords(df)
+            return self.multiplot.parallel_coords(df, columns, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def scatter_matrix(self, request, df):
+    @figure_cache.cached
+    def scatter_matrix(self, request, df, columns=None, theme=None):
         """
         5+ columns: Scatter matrix for pairwise relationships
         """
         try:
             logger.info(f"Many-Col scatter_matrix accessed by {request.user}")
-            return self.multiplot.scatter_matrix(df)
+            return self.multiplot.scatter_matrix(df, columns, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def treemap_sunburst(self, request, df):
+    @figure_cache.cached
+    def treemap_sunburst(self, request, df, cat1=None, cat2=None, val=None, theme=None):
         """
         5+ columns: Treemap / sunburst for categorical hierarchy + numeric value
         """
         try:
             logger.info(f"Many-Col treemap_sunburst accessed by {request.user}")
-            return self.multiplot.treemap_sunburst(df)
+            return self.multiplot.treemap_sunburst(df, cat1, cat2, val, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
-    def correlation_heatmap(self, request, df):
+    @figure_cache.cached
+    def correlation_heatmap(self, request, df, theme=None):
         """
         5+ columns: Correlation heatmap of numeric variables
         """
         try:
             logger.info(f"Many-Col correlation_heatmap accessed by {request.user}")
-            return self.multiplot.correlation_heatmap(df)
+            return self.multiplot.correlation_heatmap(df, theme=theme)
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    @figure_cache.cached
+    def association_heatmap(self, request, df, columns=None, theme=None):
+        """
+        2+ categorical columns: Cramer's V heatmap of every pair
+        """
+        try:
+            logger.info(f"Many-Col association_heatmap accessed by {request.user}")
+            return self.multiplot.association_heatmap(df, columns, theme=theme)
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
@@ -0,0 +1,168 @@
+#base library
+import logging
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.data_store import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+# id(frame) -> (dataset_id, version) for frames handed out by the cache
+_dataset_keys = {}
+
+
+def tag_dataset(df: pd.DataFrame, key: tuple):
+    """
+    Marks a frame as an unchanged copy of ``(dataset_id, version)`` so derived
+    results (profiles, figures, ...) can be cached per dataset version. Frames
+    derived from it (filters, fills, ...) are not tagged.
+    """
+    _dataset_keys[id(df)] = key
+    weakref.finalize(df, _dataset_keys.pop, id(df), None)
+    return df
+
+
+def dataset_key(df: pd.DataFrame):
+    """Returns the ``(dataset_id, version)`` of a frame handed out by the cache, or None."""
+    return _dataset_keys.get(id(df))
+
+
+class DataFrameCache:
+    """
+    Per-process LRU cache of DataFrames keyed by ``(dataset_id, version)``.
+
+    Entries are evicted when either the item count or the total in-memory size
+    exceeds its budget. When a spill directory is configured, transformed
+    versions are also written to disk as Parquet so that other worker processes
+    (and this one, after eviction) can load them without recomputing.
+
+    Parameters:
+
+    max_bytes : (int) : Memory budget for all cached frames.
+    max_items : (int) : Maximum number of cached frames.
+    spill_dir : (str | Path | None) : Directory of the shared file-backed tier.
+    """
+
+    def __init__(self, max_bytes=None, max_items=None, spill_dir=None):
+        self.max_bytes = max_bytes or getattr(settings, 'DATAFRAME_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        self.max_items = max_items or getattr(settings, 'DATAFRAME_CACHE_MAX_ITEMS', 32)
+        spill_dir = spill_dir or getattr(settings, 'DATAFRAME_CACHE_DIR', None)
+        self.disk = DatasetStore(root=spill_dir) if spill_dir else None
+
+        self._frames = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(dataset_id, version=0) -> tuple:
+        return (str(dataset_id), int(version))
+
+    @staticmethod
+    def _disk_name(key) -> str:
+        return f'{key[0]}-v{key[1]}{DatasetStore.extension}'
+
+    #---- Memory tier ----#
+    def _remember(self, key, df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._frames:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._frames[key]
+            self._frames[key] = df
+            self._sizes[key] = size
+            self._total_bytes += size
+            while self._frames and (len(self._frames) > self.max_items or self._total_bytes > self.max_bytes):
+                old_key, _ = self._frames.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+                logger.info(f'DataFrame cache evicted {old_key}')
+
+    def get(self, dataset_id, version=0):
+        """Returns the cached frame (memory first, then disk tier) or None."""
+        try:
+            key = self.key(dataset_id, version)
+            with self._lock:
+                df = self._frames.get(key)
+                if df is not None:
+                    self._frames.move_to_end(key)
+            if df is None and self.disk and self.disk.exists(self._disk_name(key)):
+                df = self.disk.read(self._disk_name(key))
+                self._remember(key, df)
+            # Copy-on-write shallow copy, callers can assign columns without touching the cache
+            return tag_dataset(df.copy(deep=False), key) if df is not None else None
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def put(self, dataset_id, version, df: pd.DataFrame, persist=False):
+        """
+        Caches a frame. ``persist=True`` also writes it to the disk tier, used
+        for transformed versions that cannot be rebuilt from the dataset store.
+        """
+        try:
+            key = self.key(dataset_id, version)
+            self._remember(key, df.copy(deep=False))
+            if persist and self.disk:
+                self.disk.write(df, self._disk_name(key))
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def get_or_load(self, dataset_id, version, loader):
+        """Returns the cached frame, calling ``loader()`` and caching its result on a miss."""
+        df = self.get(dataset_id, version)
+        if df is None:
+            df = loader()
+            if df is not None:
+                self.put(dataset_id, version, df)
+                tag_dataset(df, self.key(dataset_id, version))
+        return df
+
+    def invalidate(self, dataset_id):
+        """Drops every cached version of a dataset from both tiers."""
+        dataset_id = str(dataset_id)
+        with self._lock:
+            for key in [k for k in self._frames if k[0] == dataset_id]:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._frames[key]
+        if self.disk and self.disk.root.exists():
+            for path in Path(self.disk.root).glob(f'{dataset_id}-v*{DatasetStore.extension}'):
+                path.unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'items': len(self._frames), 'bytes': self._total_bytes}
+
+
+# Shared per-process instance
+dataframe_cache = DataFrameCache()
+
+
+def load_dataset(file_record, version=0, cache=None):
+    """
+    Returns the requested version of an uploaded dataset.
+
+    Version 0 is the ingested data and is read from the dataset store on a miss,
+    transformed versions are rebuilt from the transformation log on a miss.
+    Returns None when unavailable.
+    """
+    cache = cache or dataframe_cache
+    if version:
+        df = cache.get(file_record.dataset_id, version)
+        if df is not None:
+            return df
+        from source.components.transform_log import transform_log
+        return transform_log.materialize(file_record, version)
+    store = DatasetStore()
+    if not store.exists(file_record.file_path):
+        return None
+    # Keyed by content, uploads of the same data share one cached frame
+    return cache.get_or_load(file_record.dataset_id, 0, lambda: store.read(file_record.file_path))
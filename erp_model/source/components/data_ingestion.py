@@ -1,20 +1,345 @@
 #base library
+import functools
+import hashlib
+import io
+import os
+import uuid
+import zipfile
 import pandas as pd
 import numpy as np
 
 #django library
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.contrib import messages
+from django.core.files import File
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
 
 #app Modules
 from erp_app.models import UploadedFile
 from exception import CustomException
+from source.components import excel_reader
+from source.components.data_store import DatasetStore
+from source.components.job_queue import job_runner
+from source.components.running_stats import RunningStats
+from source.components.sketches import DatasetSketches
 import logging
 
 logger = logging.getLogger(__name__)
+store = DatasetStore()
+
+# Fields of an ingested upload describing its stored copy, shared by uploads of identical content
+STORED_FIELDS = ('file_path', 'file_format', 'rows', 'columns', 'size_bytes', 'summary')
+# Extensions of the files a batch upload (or a zip archive inside it) may contain
+BATCH_EXTENSIONS = ('.csv', '.xlsx')
+
+
+class UploadStream(io.RawIOBase):
+    """Read-only file object over Django's ``UploadedFile.chunks()``, the upload is never read into memory at once."""
+
+    def __init__(self, uploaded_file):
+        self._chunks = uploaded_file.chunks()
+        self._buffer = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class HashingUploadMixin:
+    """
+    Hashes an upload (sha256) while Django receives it, the finished file
+    carries the hex digest as ``content_hash``. Only the handler that keeps
+    the data hashes it, chunks passed on to the next handler are skipped.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self._digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            self._digest.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.content_hash = self._digest.hexdigest()
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
 
 class DataIngestion:
+    #---- Content addressing ----#
+    @staticmethod
+    def content_hash(uploaded_file) -> str:
+        """
+        sha256 of an upload. Requests uploads are hashed while they are received
+        (``FILE_UPLOAD_HANDLERS``), other files are streamed over ``chunks()``.
+        """
+        if getattr(uploaded_file, 'content_hash', None):
+            return uploaded_file.content_hash
+        digest = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def sheet_hash(workbook_hash: str, sheet: str) -> str:
+        """Content key of one worksheet, derived from the workbook hash and the sheet name."""
+        return hashlib.sha256(f'{workbook_hash}/{sheet}'.encode('utf-8')).hexdigest()
+
+    def find_stored(self, content_hash: str):
+        """
+        Stored copy of content that was already ingested, as ``UploadedFile`` fields.
+
+        The new record points to the same Parquet file, so its Arrow copy,
+        sketches and summary are reused, and ``UploadedFile.dataset_id`` makes it
+        share the cached frames, profiles and figures too. None when the content
+        is new or its stored copy is gone.
+        """
+        if not content_hash:
+            return None
+        record = UploadedFile.objects.filter(content_hash=content_hash).exclude(file_path='').order_by('-id').first()
+        if record is None or not store.exists(record.file_path):
+            return None
+        logger.info(f'Upload matches stored dataset {record.file_path}, parsing skipped')
+        return {field: getattr(record, field) for field in STORED_FIELDS}
+
+    def _store_chunks(self, chunks) -> dict:
+        """Writes parsed chunks to the store while collecting running stats and sketches."""
+        stats = RunningStats()
+        sketches = DatasetSketches() if getattr(settings, 'DATASET_SKETCHES', True) else None
+
+        def on_chunk(chunk):
+            stats.update(chunk)
+            if sketches is not None:
+                sketches.update(chunk)
+
+        meta = store.write_chunks(chunks, on_chunk=on_chunk)
+        meta['summary'] = stats.to_dict()
+        if sketches is not None:
+            sketches.save(store.sketch_path(meta['file_path']))
+        return meta
+
+    def store_upload(self, uploaded_file) -> dict:
+        """
+        Parses a CSV upload into the dataset store and returns the ``UploadedFile`` fields.
+
+        ``chunks()`` feeds a chunked ``pd.read_csv`` whose chunks are written to
+        Parquet one by one while running column stats are collected, so peak
+        memory is bounded by ``CSV_CHUNK_ROWS`` and not the file size.
+        """
+        reader = pd.read_csv(
+            io.BufferedReader(UploadStream(uploaded_file)),
+            encoding='utf-8',
+            on_bad_lines='skip',
+            # Nullable dtypes, integer columns with blanks stay exact integers
+            dtype_backend='numpy_nullable',
+            chunksize=settings.CSV_CHUNK_ROWS)
+        return self._store_chunks(reader)
+
+    #---- Staging ----#
+    def _stage(self, chunks, suffix):
+        """
+        Copies byte chunks to the staging area of the store, hashing the content on the way.
+
+        Returns:
+            tuple : (staged id, staged path, content hash)
+        """
+        staged = uuid.uuid4().hex
+        path = store.root / 'uploads' / f'{staged}{suffix}'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with open(path, 'wb') as target:
+            for chunk in chunks:
+                digest.update(chunk)
+                target.write(chunk)
+        return staged, path, digest.hexdigest()
+
+    #---- Excel workbooks ----#
+    def stage_workbook(self, uploaded_file):
+        """
+        Copies an Excel upload to the staging area of the store, chunk by chunk.
+
+        Returns:
+            tuple : (workbook id, staged path, content hash)
+        """
+        return self._stage(uploaded_file.chunks(), '.xlsx')
+
+    def store_sheet(self, path, sheet) -> dict:
+        """Streams one worksheet into the dataset store, see ``excel_reader.read_sheet_chunks``."""
+        return self._store_chunks(excel_reader.read_sheet_chunks(path, sheet))
+
+    def ingest_sheets(self, request, workbook, name, sheets, content_hash=''):
+        """
+        Converts the chosen sheets of a staged workbook (one ``UploadedFile`` each)
+        and removes the staged xlsx, analysis only reads the store afterwards.
+        Sheets of a workbook ingested before are not converted again.
+        """
+        path = store.root / 'uploads' / f'{workbook}.xlsx'
+        records = []
+        try:
+            for sheet in sheets:
+                sheet_hash = self.sheet_hash(content_hash, sheet) if content_hash else ''
+                try:
+                    meta = self.find_stored(sheet_hash) or self.store_sheet(path, sheet)
+                except pd.errors.EmptyDataError:
+                    messages.warning(request, f"Sheet '{sheet}' is empty and was skipped.")
+                    continue
+                records.append(UploadedFile.objects.create(
+                    user=request.user, name=name, sheet=sheet, workbook=workbook, content_hash=sheet_hash, **meta))
+        except Exception as e:
+            messages.error(request, f"Error reading file: {e}")
+            return redirect('home')
+        finally:
+            path.unlink(missing_ok=True)
+            request.session.pop('pending_workbook', None)
+
+        if not records:
+            messages.error(request, "The selected sheets contain no data.")
+            return redirect('home')
+        return self._activate(request, records[0])
+
+    #---- Batch uploads ----#
+    def _batch_members(self, uploaded_files):
+        """Yields ``(name, chunks)`` of every file of a batch upload, zip archives are expanded."""
+        for uploaded_file in uploaded_files:
+            if not uploaded_file.name.lower().endswith('.zip'):
+                yield uploaded_file.name, uploaded_file.chunks()
+                continue
+            with zipfile.ZipFile(uploaded_file) as archive:
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    # Folders and the metadata files some archivers add are not uploads
+                    if member.is_dir() or not name or name.startswith('.') or member.filename.startswith('__MACOSX/'):
+                        continue
+                    with archive.open(member) as source:
+                        yield name, iter(functools.partial(source.read, 1024 * 1024), b'')
+
+    def stage_batch(self, uploaded_files):
+        """
+        Stages the CSV / XLSX files of a batch upload.
+
+        Returns:
+            tuple : (list of (name, staged relative path, content hash), names of the skipped files)
+        """
+        max_files = getattr(settings, 'BATCH_UPLOAD_MAX_FILES', 200)
+        max_bytes = getattr(settings, 'BATCH_UPLOAD_MAX_BYTES', 2 * 1024 ** 3)
+        staged, skipped, total = [], [], 0
+
+        def limited(chunks):
+            nonlocal total
+            for chunk in chunks:
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ValueError(f'The batch is larger than {max_bytes // 1024 ** 2} MB once extracted.')
+                yield chunk
+
+        try:
+            for name, chunks in self._batch_members(uploaded_files):
+                suffix = os.path.splitext(name)[1].lower()
+                if suffix not in BATCH_EXTENSIONS:
+                    skipped.append(name)
+                    continue
+                if len(staged) >= max_files:
+                    raise ValueError(f'A batch holds at most {max_files} files.')
+                _, path, content_hash = self._stage(limited(chunks), suffix)
+                staged.append((name, str(path.relative_to(store.root)), content_hash))
+            return staged, skipped
+        except Exception:
+            for _, relative_path, _ in staged:
+                store.full_path(relative_path).unlink(missing_ok=True)
+            raise
+
+    def ingest_batch(self, request, uploaded_files):
+        """
+        Stages every file of a batch upload and queues one 'ingest' job per
+        file, the job runner parses them concurrently in its worker pool.
+        Redirects to the batch status page.
+        """
+        try:
+            staged, skipped = self.stage_batch(uploaded_files)
+        except Exception as e:
+            messages.error(request, f"Error reading batch: {e}")
+            return redirect('home')
+        for name in skipped:
+            messages.warning(request, f"'{name}' is not a CSV or Excel file and was skipped.")
+        if not staged:
+            messages.error(request, "The batch contains no CSV or Excel file.")
+            return redirect('home')
+
+        batch = uuid.uuid4().hex
+        for name, relative_path, content_hash in staged:
+            job_runner.submit(request.user, 'ingest', params={
+                'batch': batch, 'name': name, 'path': relative_path, 'content_hash': content_hash})
+        logger.info(f'Batch {batch}: {len(staged)} file(s) queued by {request.user}')
+        return redirect('batch_status', batch=batch)
+
+    def ingest_staged(self, user, relative_path, name, content_hash=''):
+        """
+        Parses one staged file of a batch into the dataset store, runs inside
+        a job worker. A workbook gives one ``UploadedFile`` per non empty sheet.
+        The staged file is removed afterwards.
+
+        Returns:
+            list : the new UploadedFile records
+        """
+        path = store.full_path(relative_path)
+        try:
+            if path.suffix == '.csv':
+                meta = self.find_stored(content_hash)
+                if meta is None:
+                    with open(path, 'rb') as source:
+                        meta = self.store_upload(File(source))
+                return [UploadedFile.objects.create(user=user, name=name, content_hash=content_hash, **meta)]
+
+            records = []
+            for sheet in excel_reader.sheet_names(path):
+                sheet_hash = self.sheet_hash(content_hash, sheet) if content_hash else ''
+                try:
+                    meta = self.find_stored(sheet_hash) or self.store_sheet(path, sheet)
+                except pd.errors.EmptyDataError:
+                    continue
+                records.append(UploadedFile.objects.create(
+                    user=user, name=name, sheet=sheet, workbook=path.stem, content_hash=sheet_hash, **meta))
+            if not records:
+                raise pd.errors.EmptyDataError('Every sheet of the workbook is empty')
+            return records
+        finally:
+            path.unlink(missing_ok=True)
+
+    def _activate(self, request, uploaded_instance):
+        """Makes an ingested dataset the one the analysis views work on."""
+        request.session['uploaded_file_id'] = uploaded_instance.id #type: ignore
+        request.session['df_version'] = 0
+        request.session.modified = True
+        request.session.save() 
+        print("SESSION FILE ID:", request.session['uploaded_file_id'])
+        label = f"{uploaded_instance.name} [{uploaded_instance.sheet}]" if uploaded_instance.sheet else uploaded_instance.name
+        messages.success(request, f"✅ File '{label}' uploaded successfully!")
+        return redirect('analysis')
+
     def ingest_data(self, request, uploaded_file = None):
         if not uploaded_file:
                     messages.error(request, "Please upload a file.")
@@ -24,15 +349,39 @@ class DataIngestion:
             messages.error(request, "Only CSV and Excel files are allowed.")
             return redirect('home')
         
-        file_data = uploaded_file.read()
+        if uploaded_file.name.endswith('.xlsx'):
+            # Staged once, the user picks the sheets to convert when there is more than one
+            try:
+                workbook, path, content_hash = self.stage_workbook(uploaded_file)
+                sheets = excel_reader.sheet_names(path)
+            except Exception as e:
+                messages.error(request, f"Error reading file: {e}")
+                return redirect('home')
+            if len(sheets) == 1:
+                return self.ingest_sheets(request, workbook, uploaded_file.name, sheets, content_hash)
+            previous = request.session.get('pending_workbook')
+            if previous:
+                (store.root / 'uploads' / f"{previous['workbook']}.xlsx").unlink(missing_ok=True)
+            request.session['pending_workbook'] = {'workbook': workbook, 'name': uploaded_file.name,
+                                                   'sheets': sheets, 'content_hash': content_hash}
+            return redirect('select_sheets')
+
+        # Parse once and keep a columnar copy, later reads never touch the raw upload again.
+        # Content that was uploaded before is not parsed nor stored a second time, the hash
+        # was taken while the request was received so the upload is read once.
+        try:
+            content_hash = self.content_hash(uploaded_file)
+            meta = self.find_stored(content_hash) or self.store_upload(uploaded_file)
+        except pd.errors.EmptyDataError:
+            messages.error(request, "Uploaded file is empty or invalid CSV format.")
+            return redirect('home')
+        except Exception as e:
+            messages.error(request, f"Error reading file: {e}")
+            return redirect('home')
+
         uploaded_instance = UploadedFile.objects.create(
             user=request.user,
             name=uploaded_file.name,
-            data=file_data)
-        
-        request.session['uploaded_file_id'] = uploaded_instance.id #type: ignore
-        request.session.modified = True
-        request.session.save() 
-        print("SESSION FILE ID:", request.session['uploaded_file_id'])
-        messages.success(request, f"✅ File '{uploaded_instance.name}' uploaded successfully!")
-        return redirect('analysis')
\ No newline at end of file
+            content_hash=content_hash,
+            **meta)
+        return self._activate(request, uploaded_instance)
\ No newline at end of file
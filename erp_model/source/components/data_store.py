@@ -0,0 +1,318 @@
+#base library
+import logging
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetStore:
+    """
+    Columnar on-disk store for parsed uploads.
+
+    Every upload is parsed once at ingestion time and written as a Parquet file
+    under ``settings.DATASET_STORE_DIR``. The database only keeps the relative
+    path and a little metadata, later reads are memory-mapped column reads.
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.DATASET_STORE_DIR)
+
+    def full_path(self, relative_path: str) -> Path:
+        return self.root / relative_path
+
+    def sketch_path(self, relative_path: str) -> Path:
+        """Location of the sketches built for a dataset during ingestion."""
+        return self.full_path(relative_path).with_suffix('.sketches.json')
+
+    def new_path(self) -> str:
+        """Returns a fresh relative path for a dataset file."""
+        return uuid.uuid4().hex + self.extension
+
+    #---- Write ----#
+    def to_arrow(self, df: pd.DataFrame) -> pa.Table:
+        """
+        Converts a DataFrame to an Arrow table.
+
+        Object columns holding mixed python types (e.g. numbers and text in the
+        same column) cannot be stored as-is, such columns are kept as text.
+        """
+        df = df.copy(deep=False)
+        df.columns = [str(col) for col in df.columns]
+        arrays = []
+        for col in df.columns:
+            try:
+                arrays.append(pa.array(df[col], from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                text = df[col].astype(str).where(df[col].notna(), None)
+                arrays.append(pa.array(text, type=pa.string(), from_pandas=True))
+        return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+    def write(self, df: pd.DataFrame, relative_path: str = None) -> dict:
+        """
+        Writes the DataFrame into the store.
+
+        Returns:
+            dict : ``file_path`` (relative), ``rows``, ``columns`` and ``size_bytes``.
+        """
+        try:
+            relative_path = relative_path or self.new_path()
+            target = self.full_path(relative_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            table = self.to_arrow(df)
+            pq.write_table(table, target)
+            logger.info(f'Dataset written to store: {relative_path} ({table.num_rows} rows)')
+
+            return {
+                'file_path': relative_path,
+                'rows': table.num_rows,
+                'columns': table.column_names,
+                'size_bytes': os.path.getsize(target),
+            }
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def write_chunks(self, chunks, relative_path: str = None, on_chunk=None) -> dict:
+        """
+        Writes an iterator of DataFrame chunks (e.g. ``pd.read_csv(chunksize=...)``)
+        incrementally, so only one chunk is held in memory at a time.
+
+        The first chunk gives the file schema. When a later chunk does not fit
+        it (text in a numeric column, decimals in an integer one, ...) the column
+        is widened (see ``_unify``) and the rows written so far are rewritten
+        batch by batch with the wider schema, values are never coerced away.
+
+        Parameters:
+
+        chunks : (iterable of pd.DataFrame) : Parsed chunks of one dataset.
+        on_chunk : (callable | None) : Called with every chunk, e.g. to update running statistics.
+        """
+        writer = None
+        try:
+            relative_path = relative_path or self.new_path()
+            target = self.full_path(relative_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            rows = 0
+            schema = None
+            for chunk in chunks:
+                if on_chunk:
+                    on_chunk(chunk)
+                table = self.to_arrow(chunk)
+                if writer is None:
+                    schema = table.schema
+                    writer = pq.ParquetWriter(target, schema)
+                elif not table.schema.equals(schema):
+                    wider = self._unify(schema, table.schema)
+                    if not wider.equals(schema):
+                        writer.close()
+                        writer = self._rewrite(target, wider)
+                        schema = wider
+                writer.write_table(self._conform(table, schema))
+                rows += table.num_rows
+            if writer is None:
+                raise pd.errors.EmptyDataError('No columns to parse from file')
+            writer.close()
+            writer = None
+            logger.info(f'Dataset streamed to store: {relative_path} ({rows} rows)')
+
+            return {
+                'file_path': relative_path,
+                'rows': rows,
+                'columns': schema.names,
+                'size_bytes': os.path.getsize(target),
+            }
+        except pd.errors.EmptyDataError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def _unify(schema: pa.Schema, other: pa.Schema) -> pa.Schema:
+        """
+        Narrowest schema holding the values of both: integers stay int64,
+        integers and decimals become float64, null columns take the other type
+        and any other mismatch (text in a numeric or date column) becomes text.
+        """
+        types = {field.name: field.type for field in other}
+        fields = []
+        for field in schema:
+            new = types.get(field.name, field.type)
+            if new.equals(field.type) or pa.types.is_null(new):
+                pass
+            elif pa.types.is_null(field.type):
+                field = field.with_type(new)
+            elif pa.types.is_integer(field.type) and pa.types.is_integer(new):
+                field = field.with_type(pa.int64())
+            elif (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)) \
+                    and (pa.types.is_integer(new) or pa.types.is_floating(new)):
+                field = field.with_type(pa.float64())
+            elif pa.types.is_timestamp(field.type) and pa.types.is_timestamp(new):
+                field = field.with_type(pa.timestamp('ns', field.type.tz or new.tz))
+            else:
+                field = field.with_type(pa.string())
+            fields.append(field)
+        known = set(schema.names)
+        fields += [field for field in other if field.name not in known]
+        return pa.schema(fields)
+
+    def _rewrite(self, target: Path, schema: pa.Schema) -> pq.ParquetWriter:
+        """Copies the rows written so far to a new file of ``schema``, returns its open writer."""
+        previous = target.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        target.replace(previous)
+        writer = pq.ParquetWriter(target, schema)
+        try:
+            written = pq.ParquetFile(previous)
+            for batch in written.iter_batches():
+                writer.write_table(self._conform(pa.Table.from_batches([batch]), schema))
+            written.close()
+        except Exception:
+            writer.close()
+            raise
+        finally:
+            previous.unlink(missing_ok=True)
+        logger.info(f'Columns of {target.name} widened while streaming, rows written so far were rewritten')
+        return writer
+
+    @staticmethod
+    def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+        """Casts a chunk to the (unified) file schema, columns widened to text keep the pandas formatting."""
+        if table.schema.equals(schema):
+            return table
+        arrays = []
+        for field in schema:
+            if field.name not in table.column_names:
+                arrays.append(pa.nulls(table.num_rows, field.type))
+                continue
+            column = table.column(field.name)
+            if column.type.equals(field.type):
+                arrays.append(column)
+            elif pa.types.is_string(field.type) and not pa.types.is_null(column.type):
+                values = column.to_pandas(types_mapper=pd.ArrowDtype)
+                text = values.astype(str).where(values.notna(), None)
+                arrays.append(pa.array(text, type=pa.string(), from_pandas=True))
+            else:
+                arrays.append(column.cast(field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    #---- Read ----#
+    @staticmethod
+    def dtype_backend(dtype_backend=None) -> str:
+        """'pyarrow' (Arrow-backed frames) or 'numpy', ``settings.DATAFRAME_DTYPE_BACKEND`` by default."""
+        return dtype_backend or getattr(settings, 'DATAFRAME_DTYPE_BACKEND', 'numpy')
+
+    @classmethod
+    def to_pandas(cls, table: pa.Table, dtype_backend=None) -> pd.DataFrame:
+        """
+        Converts an Arrow table to a DataFrame. With the 'pyarrow' backend the
+        columns keep their Arrow buffers (``pd.ArrowDtype``, no copy) and
+        dictionary columns become pandas categoricals.
+        """
+        if cls.dtype_backend(dtype_backend) != 'pyarrow':
+            return table.to_pandas()
+        return table.to_pandas(types_mapper=_arrow_dtype)
+
+    def arrow_path(self, relative_path: str) -> Path:
+        """Uncompressed Arrow IPC copy of a dataset, memory-mapped by the 'pyarrow' backend."""
+        return self.full_path(relative_path).with_suffix('.arrow')
+
+    def write_arrow(self, relative_path: str) -> Path:
+        """
+        Writes the Arrow IPC copy of a stored dataset. Text columns with few
+        distinct values (``CATEGORY_MAX_RATIO`` of the rows at most) are
+        dictionary encoded.
+        """
+        try:
+            table = pq.read_table(self.full_path(relative_path), memory_map=True)
+            max_ratio = getattr(settings, 'CATEGORY_MAX_RATIO', 0.5)
+            for index, field in enumerate(table.schema):
+                if (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)) and table.num_rows \
+                        and pc.count_distinct(table.column(index)).as_py() <= max_ratio * table.num_rows:
+                    table = table.set_column(index, field.name, _sorted_dictionary(table.column(index)))
+
+            target = self.arrow_path(relative_path)
+            # Written under a temporary name first, other processes may be mapping the file
+            temp = target.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+            with pa.OSFile(str(temp), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            temp.replace(target)
+            logger.info(f'Arrow copy written to store: {target.name}')
+            return target
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def read_arrow(self, relative_path: str, columns: list = None) -> pa.Table:
+        """Memory-mapped Arrow table of a stored dataset, pages are shared by every process reading it."""
+        try:
+            target = self.arrow_path(relative_path)
+            if not target.exists() or target.stat().st_mtime < self.full_path(relative_path).stat().st_mtime:
+                self.write_arrow(relative_path)
+            table = pa.ipc.open_file(pa.memory_map(str(target))).read_all()
+            return table.select(columns) if columns is not None else table
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def read(self, relative_path: str, columns: list = None, dtype_backend: str = None) -> pd.DataFrame:
+        """Reads the dataset (or only the requested columns) back as a DataFrame."""
+        try:
+            if self.dtype_backend(dtype_backend) == 'pyarrow':
+                return self.to_pandas(self.read_arrow(relative_path, columns), 'pyarrow')
+            table = pq.read_table(self.full_path(relative_path), columns=columns, memory_map=True)
+            return table.to_pandas()
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def schema(self, relative_path: str) -> pa.Schema:
+        return pq.read_schema(self.full_path(relative_path))
+
+    def exists(self, relative_path: str) -> bool:
+        return bool(relative_path) and self.full_path(relative_path).exists()
+
+    def delete(self, relative_path: str):
+        for target in (self.full_path(relative_path), self.sketch_path(relative_path), self.arrow_path(relative_path)):
+            if target.exists():
+                target.unlink()
+        logger.info(f'Dataset removed from store: {relative_path}')
+
+
+def _sorted_dictionary(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Dictionary encodes a text column with sorted values, categories come out in the same order as a groupby."""
+    values = pc.unique(column)
+    values = values.filter(values.is_valid())
+    values = values.take(pc.sort_indices(values))
+    indices = pc.index_in(column, value_set=values)
+    return pa.chunked_array(
+        [pa.DictionaryArray.from_arrays(chunk.cast(pa.int32()), values) for chunk in indices.chunks],
+        type=pa.dictionary(pa.int32(), values.type))
+
+
+def _arrow_dtype(arrow_type):
+    """``types_mapper`` of Arrow-backed frames, dictionary columns are left to pandas (categorical)."""
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def parse_upload(name: str, stream) -> pd.DataFrame:
+    """Parses a CSV/XLSX upload (file object or byte stream) into a DataFrame."""
+    if name.endswith('.csv'):
+        return pd.read_csv(stream, encoding='utf-8', on_bad_lines='skip')
+    return pd.read_excel(stream)
@@ -1,82 +1,192 @@
 from re import L
+import logging
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from django.conf import settings
 from exception import CustomException
+from source.components import column_parallel
 import sys
 
+logger = logging.getLogger(__name__)
+
 class ColumnTranformer:
     def __init__(self):
         pass
     
-    def auto_correct_datatypes(self, df : pd.DataFrame , threshold = 0.05):
+    # Candidate formats tried on the sample, the best parsing one is used for the full column.
+    # Month-first comes before day-first (dateutil's default), ties keep the earlier format, so
+    # day-first only wins when the sample holds values like 25/03/2024 that month-first rejects.
+    DATE_FORMATS = [
+        '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d',
+        '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%d-%m-%Y', '%d.%m.%Y',
+        '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M', '%d-%b-%Y', '%d %b %Y', '%b %d, %Y',
+    ]
+    NUMERIC_PATTERN = r'^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$'
+    DATE_HINT_PATTERN = r'^\d{1,4}[-/. ][A-Za-z0-9]{1,9}[-/., ]+\d{1,4}'
+
+    def _infer_date_format(self, sample: pd.Series, threshold):
+        """Returns the date format parsing (almost) the whole sample, or None."""
+        best_format, best_share = None, 0.0
+        for fmt in self.DATE_FORMATS:
+            share = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+            if share > best_share:
+                best_format, best_share = fmt, share
+            if share == 1.0:
+                break
+        return best_format if best_share >= 1 - threshold else None
+
+    def infer_column_type(self, series: pd.Series, threshold = 0.05, sample_size = 1000):
+        """
+        Classifies a text column on a random sample of its non-null values.
+
+        Returns:
+            tuple : ('numeric', None), ('datetime', format) or (None, None).
+        """
+        values = series.dropna()
+        if values.empty:
+            return (None, None)
+        if len(values) > sample_size:
+            values = values.sample(sample_size, random_state=0)
+        sample = values.astype(str).str.strip()
+
+        if sample.str.match(self.NUMERIC_PATTERN).mean() >= 1 - threshold:
+            return ('numeric', None)
+
+        if sample.str.match(self.DATE_HINT_PATTERN).mean() >= 1 - threshold:
+            fmt = self._infer_date_format(sample, threshold)
+            if fmt:
+                return ('datetime', fmt)
+        return (None, None)
+
+    def correct_columns(self, df : pd.DataFrame, threshold = 0.05, sample_size = 1000) -> dict:
+        """Converts the text columns of ``df`` that pass the threshold, returns {column: converted Series}."""
+        converted_columns = {}
+        for col in df.columns:
+            if not is_text_dtype(df[col].dtype):
+                continue
+
+            kind, fmt = self.infer_column_type(df[col], threshold, sample_size)
+            if kind is None:
+                continue
+
+            text = df[col].astype(str).str.strip().where(df[col].notna())
+            if kind == 'numeric':
+                converted = pd.to_numeric(text, errors = 'coerce')
+            else:
+                converted = pd.to_datetime(text, format = fmt, errors = 'coerce')
+
+            #calculate NA values before and after the conversion
+            original_missing_values = df[col].isna().sum()
+            convereted_missing_values = converted.isna().sum()
+
+            #check number of values that are miss convereted
+            failed_conversion = convereted_missing_values - original_missing_values
+
+            #find total number of valid values in dataframe
+            total_valid_original = len(df) - original_missing_values
+
+            #check the threshold on the full column:
+            if total_valid_original > 0 and (failed_conversion/total_valid_original) < threshold:
+                converted_columns[col] = converted
+                label = 'Numeric' if kind == 'numeric' else f'DATETIME ({fmt})'
+                print(f"✅ Column '{col}' converted to {label}.")
+        return converted_columns
+
+    def auto_correct_datatypes(self, df : pd.DataFrame , threshold = 0.05, sample_size = 1000, workers = None, source_path = None, compact = True):
 
         """
            It automatically handles Hetrogeneous data, infers and converts data types.
-           
+
+           Each text column is first classified on a small random sample with regex
+           and explicit-format checks, only candidate columns get the full conversion
+           (with the inferred ``format=``, no per-cell dateutil fallback). Columns are
+           independent, wide frames are split into column slices run on ``workers`` cores.
+
            Parameters:
-           
-           df : (pd.DataFrame) : Input DataFrame.
-           threshold : (float) : Maximum allowed fraction of data that can become 'NaN/NaT' 
-                       during conversion before we reject the conversion. 
-                       0.05 means we allow 5% of valid data to be lost to typos        
+
+           df : (pd.DataFrame) : Input DataFrame, it is not modified.
+           threshold : (float) : Maximum allowed fraction of data that can become 'NaN/NaT'
+                       during conversion before we reject the conversion.
+                       0.05 means we allow 5% of valid data to be lost to typos
+           sample_size : (int) : Number of values used to classify each column.
+           workers : (int) : Column worker processes, ``settings.COLUMN_WORKERS`` by default.
+           source_path : (str) : Parquet file of ``df`` in the dataset store, lets workers read their columns directly.
+           compact : (bool) : Downcast numbers and turn low-cardinality text into categories afterwards, see ``compact_columns``.
+
+           Returns:
+               list : [corrected DataFrame, original DataFrame]
         """
-        
+
         try:
-            original_df = df.copy()
-      
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    #---- 01. Convert to Date Columns Data types ----
-                    # errors='coerce' will turn incompatible values (like 'Unknown') into NaT
-    
-                    date_corrected = pd.to_datetime(df[col], errors = 'coerce')
-    
-                    #calculate NA values in the original dataframe column
-                    original_missing_values = df[col].isna().sum()
-    
-                    #calculate NA values in the converted dataframe column
-                    convereted_missing_values = df[col].isna().sum()
-    
-                    #check number of values that are miss convereted
-                    failed_conversion = original_missing_values - convereted_missing_values
-    
-                    #find total number of valid values in dataframe
-                    total_valid_original = len(df) - original_missing_values
-    
-                    #check the threshold:
-                    if total_valid_original > 0 and (failed_conversion/total_valid_original) < threshold:
-                        df[col] = date_corrected
-                        print(f"✅ Column '{col}' converted to DATETIME.")
-                        continue
-    
-                    #---- 02. Convert to Numerical Data Column values ----
-                    # errors='coerce' will turn incompatible values (like 'Unknown') into NaN
-                    numeric_corrected = pd.to_numeric(df[col], errors = 'coerce')
-                    
-                    #original NA values 
-                    original_missing_values = original_df[col].isna().sum()
-    
-                    #convereted missing values
-                    convereted_missing_values = numeric_corrected.isna().sum()
-    
-                    #failed to convert
-                    failed_conversion = original_missing_values - convereted_missing_values
-    
-                    #find the total number of the valid points
-                    total_valid_original = len(df) - original_missing_values 
-    
-                    if total_valid_original > 0 and ( failed_conversion / total_valid_original) < threshold:
-                        df[col] = numeric_corrected
-                        print(f"✅ Column '{col}' converted to Numeric.")
-                    
-            return [df, original_df]
+            # Shallow copy, converted columns are replaced and the input frame stays untouched
+            corrected = df.copy(deep=False)
+
+            text_columns = [col for col in df.columns if is_text_dtype(df[col].dtype)]
+            converted = column_parallel.map_columns(
+                _correct_columns, df, columns=text_columns, workers=workers, source_path=source_path,
+                threshold=threshold, sample_size=sample_size)
+
+            for col, values in converted.items():
+                corrected[col] = values.set_axis(df.index)
+
+            if compact:
+                before = corrected.memory_usage(deep=True).sum()
+                for col, values in self.compact_columns(corrected).items():
+                    corrected[col] = values
+                logger.info(f'Compacted dtypes: {before / 2**20:.1f} MB -> '
+                            f'{corrected.memory_usage(deep=True).sum() / 2**20:.1f} MB')
+
+            return [corrected, df]
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
 
+    def compact_columns(self, df : pd.DataFrame, category_max_ratio = None) -> dict:
+        """
+        Smallest safe dtype of every column, only columns that change are returned.
+
+        Integer columns (and float columns holding only whole numbers, e.g. ids
+        with blanks) get the narrowest integer width, nullable when they have
+        missing values. Floats become float32 only when every value survives
+        the round trip. Text columns with at most ``category_max_ratio`` distinct
+        values per row become categories. Arrow-backed columns stay Arrow-backed.
+
+        Parameters:
+
+        df : (pd.DataFrame) : Frame to compact, it is not modified.
+        category_max_ratio : (float) : ``settings.CATEGORY_MAX_RATIO`` by default.
+
+        Returns:
+            dict : {column: compacted Series}
+        """
+        try:
+            if category_max_ratio is None:
+                category_max_ratio = getattr(settings, 'CATEGORY_MAX_RATIO', 0.5)
+            compacted = {}
+            for col in df.columns:
+                series = df[col]
+                if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series.dtype):
+                    continue
+                if column_kind(series.dtype) == 'Numeric':
+                    values = _downcast_numeric(series)
+                elif is_text_dtype(series.dtype) and len(series) \
+                        and series.nunique() <= category_max_ratio * len(series):
+                    values = series.astype('category')
+                else:
+                    values = None
+                if values is not None:
+                    compacted[col] = values
+            return compacted
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
     def handle_missing(self, df : pd.DataFrame, column, mode = None):
         """
         Handle Missing Values Function handles Missing Values of Column with Different Modes such as Mean, Mode, Median
 
+        Only the column is filled, the frame is neither copied nor modified.
+
         Parameters : 
         
         df: DataFrame,
@@ -84,23 +194,110 @@ class ColumnTranformer:
         Column: Column of DataFrame which NA values to be filled.
 
         mode: Mode of value tp be filled option mean, mode and median.             
-        
+
+        Returns:
+            pd.Series : the filled column
         """
         try:
-            if mode == 'mean' or mode == 'Mean':
-                df[column].fillna(df[column].mean())
-            
-            elif mode == 'Mode' or mode == 'mode':
-                df[column].fillna(df[column].mode())
-            
-            else:
-                df[column].fillna(df[column].median())
+            values = df[column]
+            if mode == 'Mode' or mode == 'mode':
+                modes = values.mode(dropna=True)
+                return values.fillna(modes.iloc[0]) if len(modes) else values
+
+            if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                raise ValueError(f"Column '{column}' is not numeric, only 'mode' can fill it")
+            fill = values.mean() if mode == 'mean' or mode == 'Mean' else values.median()
+            if pd.api.types.is_integer_dtype(values) and not float(fill).is_integer():
+                # Compact integer columns cannot hold a fractional fill value
+                values = values.astype('float64')
+            return values.fillna(fill)
 
+        except ValueError:
+            raise
         except Exception as e:
             raise CustomException(e, sys) #type: ignore
 
 
 
+def _correct_columns(df : pd.DataFrame, threshold = 0.05, sample_size = 1000) -> dict:
+    """Column worker entry point of ``ColumnTranformer.auto_correct_datatypes``."""
+    return ColumnTranformer().correct_columns(df, threshold, sample_size)
+
+
+def _itemsize(dtype) -> int:
+    if isinstance(dtype, pd.ArrowDtype):
+        return max(dtype.pyarrow_dtype.bit_width // 8, 1)
+    return getattr(dtype, 'itemsize', 8)
+
+
+def _numeric_dtype(width: str, series: pd.Series, has_nulls: bool):
+    """``width`` ('int8', 'float32', ...) in the flavour of ``series``: Arrow, nullable or plain numpy."""
+    if isinstance(series.dtype, pd.ArrowDtype):
+        return pd.ArrowDtype(pa.from_numpy_dtype(np.dtype(width)))
+    if (has_nulls and width.startswith('int')) or isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return width.capitalize()
+    return width
+
+
+def _downcast_numeric(series: pd.Series):
+    """Narrowest safe numeric dtype of a column, None when it already is."""
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if not present.size or not np.isfinite(present).all():
+        return None
+    has_nulls = present.size < values.size
+
+    if pd.api.types.is_integer_dtype(series.dtype) or np.array_equal(present, np.trunc(present)):
+        # Exact bounds, float64 loses precision above 2**53
+        low, high = (int(series.min()), int(series.max())) if pd.api.types.is_integer_dtype(series.dtype) \
+            else (int(present.min()), int(present.max()))
+        for width in ('int8', 'int16', 'int32', 'int64'):
+            info = np.iinfo(width)
+            if info.min <= low and high <= info.max:
+                break
+        else:
+            return None
+        if pd.api.types.is_integer_dtype(series.dtype) and np.dtype(width).itemsize >= _itemsize(series.dtype):
+            return None
+        return series.astype(_numeric_dtype(width, series, has_nulls))
+
+    if _itemsize(series.dtype) > 4 and np.array_equal(present.astype('float32').astype('float64'), present):
+        return series.astype(_numeric_dtype('float32', series, has_nulls))
+    return None
+
+
+def is_text_dtype(dtype) -> bool:
+    """Object, string (numpy, pandas or Arrow backed) and categorical-of-text dtypes."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return is_text_dtype(dtype.categories.dtype)
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+def column_kind(dtype) -> str:
+    """
+    'Numeric', 'Categorical' or 'DateTime' for any numpy, nullable or Arrow dtype.
+    Booleans count as categorical.
+    """
+    if isinstance(dtype, pd.ArrowDtype):
+        arrow_type = dtype.pyarrow_dtype
+        if pa.types.is_dictionary(arrow_type):
+            arrow_type = arrow_type.value_type
+        if pa.types.is_boolean(arrow_type):
+            return 'Categorical'
+        if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+            return 'Numeric'
+        if pa.types.is_temporal(arrow_type):
+            return 'DateTime'
+        return 'Categorical'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'Categorical'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'Numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        return 'DateTime'
+    return 'Categorical'
+
+
 class DataInfo:
     def get_datatype(self, data):
         
@@ -111,12 +308,7 @@ class DataInfo:
                 "DateTime" : []
             }
             for col in data.columns:
-                if data[col].dtype in ('int64', 'float64'):
-                    context['Numeric'].append(col)
-                elif data[col].dtype in ('object', 'str'):
-                    context['Categorical'].append(col)
-                else:
-                    context['DateTime'].append(col)
+                context[column_kind(data[col].dtype)].append(col)
             return context
         
         except Exception as e:
@@ -0,0 +1,149 @@
+#base library
+import numpy as np
+import pandas as pd
+
+#django library
+from django.conf import settings
+
+DEFAULT_POINT_BUDGET = 20_000
+
+
+def point_budget(budget=None) -> int:
+    """Maximum number of points a figure may carry, ``settings.PLOT_POINT_BUDGET`` by default."""
+    if budget:
+        return int(budget)
+    # Settings are optional here, the plot helpers are also used from notebooks without Django
+    return int(getattr(settings, 'PLOT_POINT_BUDGET', DEFAULT_POINT_BUDGET)) if settings.configured else DEFAULT_POINT_BUDGET
+
+
+def _as_float(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype='float64')
+    return values.to_numpy(dtype='float64')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line sorted by ``x``.
+    Returns the indices of the ``n_out`` points keeping the visual shape.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Point of this bucket forming the largest triangle with the last pick and the next bucket average
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def decimate_line(df: pd.DataFrame, x, y, budget=None):
+    """
+    Sorts by ``x`` and reduces the line to at most ``budget`` points with LTTB.
+
+    Returns:
+        tuple : (frame to plot, original row count)
+    """
+    total = len(df)
+    budget = point_budget(budget)
+    if total <= budget:
+        return df, total
+
+    data = df.dropna(subset=[x, y]).sort_values(by=x)
+    x_values, y_values = data[x], data[y]
+    if (pd.api.types.is_numeric_dtype(x_values) or pd.api.types.is_datetime64_any_dtype(x_values)) \
+            and pd.api.types.is_numeric_dtype(y_values):
+        index = lttb(_as_float(x_values), _as_float(y_values), budget)
+    else:
+        index = np.linspace(0, len(data) - 1, budget).astype(np.int64)
+    return data.iloc[index], total
+
+
+def sample_rows(df: pd.DataFrame, budget=None, by=None, seed=0):
+    """
+    Random sample of at most ``budget`` rows. With ``by`` the sample is
+    stratified, every group keeps its share and at least one row.
+
+    Returns:
+        tuple : (frame to plot, original row count)
+    """
+    total = len(df)
+    budget = point_budget(budget)
+    if total <= budget:
+        return df, total
+    if by is None:
+        return df.sample(budget, random_state=seed).sort_index(), total
+
+    # Rows are shuffled once, each group keeps its first ``quota`` rows in that order
+    codes = pd.factorize(df[by], use_na_sentinel=False)[0]
+    order = np.random.default_rng(seed).permutation(total)
+    shuffled = codes[order]
+    rank = pd.Series(shuffled).groupby(shuffled).cumcount().to_numpy()
+    quota = np.maximum(1, np.round(np.bincount(codes) * budget / total)).astype(np.int64)
+    keep = np.sort(order[rank < quota[shuffled]])
+    return df.iloc[keep], total
+
+
+def bin_2d(df: pd.DataFrame, x, y, bins=200):
+    """
+    2D histogram of two numeric columns.
+
+    Returns:
+        tuple : (x bin centers, y bin centers, counts with shape (len(y), len(x)), zero bins as NaN)
+    """
+    data = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(_as_float(data[x]), _as_float(data[y]), bins=bins)
+    counts = counts.T
+    counts[counts == 0] = np.nan
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts
+
+
+def annotate(fig, shown: int, total: int, method: str, bins=None):
+    """
+    Surfaces the original row count on a decimated figure (title suffix and ``layout.meta``).
+    Binned figures pass the rows falling into the bins as ``shown`` and the non-empty bin count as ``bins``.
+    """
+    title = fig.layout.title.text or ''
+    if bins is not None:
+        fig.update_layout(
+            title=f"{title} ({method}: {shown:,} of {total:,} rows in {bins:,} bins)",
+            meta={'total_rows': total, 'shown_rows': shown, 'bins': bins, 'decimation': method})
+        return fig
+    if shown >= total:
+        return fig
+    fig.update_layout(
+        title=f"{title} ({method}: {shown:,} of {total:,} rows)",
+        meta={'total_rows': total, 'shown_points': shown, 'decimation': method})
+    return fig
+
+
+def histogram(series: pd.Series, bins=20):
+    """
+    Server side histogram of a numeric or datetime column.
+
+    Returns:
+        tuple : (bin centers, bin widths, counts, bin edges), datetime columns get datetime centers and edges
+    """
+    values = series.dropna()
+    is_datetime = pd.api.types.is_datetime64_any_dtype(values)
+    counts, edges = np.histogram(_as_float(values), bins=bins)
+    centers, widths = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+    if is_datetime:
+        unit = values.dt.unit
+        # Plotly takes bar widths on a date axis in milliseconds
+        widths = widths * (pd.Timedelta(1, unit=unit) / pd.Timedelta(1, unit='ms'))
+        centers = pd.to_datetime(centers.astype('int64'), unit=unit)
+        edges = pd.to_datetime(edges.astype('int64'), unit=unit)
+    return centers, widths, counts, edges
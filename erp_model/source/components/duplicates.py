@@ -0,0 +1,249 @@
+"""
+Duplicate detection on row hashes.
+
+Every key column becomes one 64-bit key per row (category codes, factorized
+text, ``hash_pandas_object`` of the other dtypes); the keys give the
+duplicates of the column and are mixed into one hash per row, so whole-row
+duplicates are found on a single ``uint64`` array instead of by comparing
+values. Memory stays proportional to the row count, not to the text held in
+the rows. Two different rows share a hash with a probability around
+n² / 2**65 (~3e-6 for 10M rows).
+
+Near-duplicate mode matches loose spellings of names ("ACME Inc.", "Acme
+Incorporated", "acme, inc"). The distinct values of a column are normalized
+(case, accents, punctuation, legal suffixes, token order), then values whose
+character 3-gram MinHash signatures agree on at least ``threshold`` of their
+permutations are merged (LSH banding). Only distinct values are compared,
+every row gets the code of its cluster.
+"""
+#base library
+import logging
+import re
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.data_cache import dataset_key
+
+logger = logging.getLogger(__name__)
+
+# Name tokens ignored by the near-duplicate keys
+LEGAL_SUFFIXES = frozenset({
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd', 'limited', 'llc', 'llp',
+    'plc', 'pvt', 'private', 'pte', 'gmbh', 'ag', 'sa', 'bv', 'nv', 'the', 'and',
+})
+SHINGLE = 3             # characters per MinHash shingle
+SIGNATURE_BLOCK = 4096  # keys hashed at once, bounds the (shingles x permutations) matrix
+_PRIME = 2_147_483_647  # 2**31 - 1, permutations are (a * shingle + b) % _PRIME
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_DIGITS = re.compile(r'\d+')
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer (in place), spreads integer codes over the 64-bit range."""
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+def _combine(h: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Folds one column of keys into the running row hashes ``h`` (in place)."""
+    h *= np.uint64(0x100000001B3)
+    h ^= keys.astype(np.uint64, copy=False)
+    return _mix(h)
+
+
+class DuplicateEngine:
+    """
+    Exact and near-duplicate detection, results of frames handed out by the
+    DataFrame cache are kept per dataset version.
+
+    Parameters:
+
+    threshold : (float) : Estimated Jaccard similarity of two names to be near duplicates,
+                ``settings.NEAR_DUPLICATE_THRESHOLD`` by default.
+    num_perm : (int) : MinHash permutations, a multiple of ``band_rows``.
+    band_rows : (int) : Signature rows per LSH band.
+    """
+
+    def __init__(self, threshold=None, num_perm=64, band_rows=4, max_items=256):
+        self.threshold = threshold or getattr(settings, 'NEAR_DUPLICATE_THRESHOLD', 0.7)
+        self.num_perm = num_perm
+        self.band_rows = band_rows
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+
+        self.max_items = max_items
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    #---- Column keys ----#
+    @staticmethod
+    def column_keys(series: pd.Series) -> np.ndarray:
+        """
+        One 64-bit key per value, equal values (missing ones included) share their key.
+        Text is factorized, which is cheaper than hashing the strings.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.cat.codes.to_numpy(np.int64)
+        if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            return pd.factorize(series, use_na_sentinel=False)[0]
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+    @staticmethod
+    def normalize(values) -> np.ndarray:
+        """Matching keys of names: ascii lower case, punctuation and legal suffixes dropped, tokens sorted."""
+        keys = []
+        for value in values:
+            text = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii').lower()
+            tokens = [token for token in _NON_WORD.split(text) if token and token not in LEGAL_SUFFIXES]
+            keys.append(' '.join(sorted(tokens)) or ' '.join(_NON_WORD.split(text)).strip())
+        return np.asarray(keys, dtype=object)
+
+    def _signatures(self, keys: np.ndarray) -> np.ndarray:
+        """MinHash signatures (keys x permutations) of the character shingles, keys are ascii."""
+        signatures = np.full((len(keys), self.num_perm), _PRIME, dtype=np.int64)
+        ids = np.flatnonzero(np.fromiter((len(key) >= SHINGLE for key in keys), bool, len(keys)))
+        for start in range(0, len(ids), SIGNATURE_BLOCK):
+            block = ids[start:start + SIGNATURE_BLOCK]
+            # Keys joined with NUL separators, shingles crossing a separator are dropped
+            data = np.frombuffer('\x00'.join(keys[block]).encode('ascii'), np.uint8).astype(np.int64)
+            shingles = (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+            valid = (data[:-2] != 0) & (data[1:-1] != 0) & (data[2:] != 0)
+            owner = np.cumsum(data == 0)[:-2][valid]
+            hashed = (shingles[valid][:, None] * self._a + self._b) % _PRIME
+            starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            signatures[block[owner[starts]]] = np.minimum.reduceat(hashed, starts, axis=0)
+        return signatures
+
+    def _clusters(self, keys: np.ndarray, threshold: float) -> np.ndarray:
+        """
+        Cluster label of every distinct key. Candidates share one LSH band,
+        they are merged when their signatures agree on ``threshold`` of the
+        permutations and they hold the same numbers ("Store 12" is not "Store 13").
+        """
+        n = len(keys)
+        if n < 2:
+            return np.arange(n)
+        signatures = self._signatures(keys)
+        # Keys too short for a shingle keep the empty signature, they only match exactly
+        hashed = signatures[:, 0] < _PRIME
+        digits, _ = pd.factorize(np.asarray([' '.join(_DIGITS.findall(key)) for key in keys], dtype=object))
+        left, right = [], []
+        for band in range(self.num_perm // self.band_rows):
+            bucket = np.zeros(n, dtype=np.uint64)
+            for column in signatures[:, band * self.band_rows:(band + 1) * self.band_rows].T:
+                bucket = _combine(bucket, column)
+            # Neighbours in bucket order, a bucket of k keys gives k - 1 candidate pairs
+            order = np.argsort(bucket, kind='stable')
+            same = bucket[order[1:]] == bucket[order[:-1]]
+            i, j = order[:-1][same], order[1:][same]
+            similar = ((signatures[i] == signatures[j]).mean(axis=1) >= threshold) \
+                & (digits[i] == digits[j]) & hashed[i] & hashed[j]
+            left.append(i[similar])
+            right.append(j[similar])
+        left, right = np.concatenate(left), np.concatenate(right)
+        if not len(left):
+            return np.arange(n)
+        graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+        return connected_components(graph, directed=False)[1]
+
+    def near_codes(self, series: pd.Series, threshold=None) -> np.ndarray:
+        """Codes of a text column where loose spellings of the same name share one code, missing values are -1."""
+        codes, uniques = pd.factorize(series)
+        key_codes, keys = pd.factorize(self.normalize(uniques))
+        labels = self._clusters(np.asarray(keys, dtype=object), threshold or self.threshold)
+        # Appended -1 is picked up by the -1 codes of missing values
+        return np.append(labels[key_codes], -1)[codes]
+
+    def near_groups(self, series: pd.Series, threshold=None, limit=5) -> list:
+        """Largest groups of distinct spellings merged by the near-duplicate mode, for previews."""
+        try:
+            uniques = pd.Series(series.dropna().unique()).astype(str)
+            labels = self.near_codes(uniques, threshold)
+            groups = uniques.groupby(labels).agg(list)
+            groups = groups[groups.str.len() > 1]
+            return groups.iloc[np.argsort(-groups.str.len().to_numpy(), kind='stable')].head(limit).tolist()
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    #---- Rows ----#
+    def _hash_rows(self, df: pd.DataFrame, columns=None, near=(), threshold=None, counts=None) -> np.ndarray:
+        """Row hashes over ``columns`` (all by default), ``counts`` collects the duplicates of every column."""
+        columns = list(df.columns if columns is None else columns)
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        for column in columns:
+            keys = self.column_keys(df[column])
+            if counts is not None:
+                counts[column] = len(keys) - len(pd.unique(keys))
+            if column in near:
+                keys = self.near_codes(df[column], threshold)
+            hashes = _combine(hashes, keys)
+        return hashes
+
+    def row_hashes(self, df: pd.DataFrame, columns=None, near=(), threshold=None) -> np.ndarray:
+        """One ``uint64`` per row, equal rows (loosely equal on the ``near`` columns) share their hash."""
+        try:
+            return self._hash_rows(df, columns, near, threshold)
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def duplicated(self, df: pd.DataFrame, columns=None, near=(), threshold=None, keep='first') -> np.ndarray:
+        """Boolean mask of the duplicated rows, ``keep`` as in ``DataFrame.duplicated``."""
+        try:
+            return pd.Series(self._hash_rows(df, columns, near, threshold)).duplicated(keep=keep).to_numpy()
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def scan(self, df: pd.DataFrame, columns=None, near=(), threshold=None) -> dict:
+        """
+        Duplicates of the rows and of every column from one pass over the columns.
+
+        Returns:
+            dict : {'rows', 'duplicate_rows', 'columns': {column: duplicated values}}
+        """
+        try:
+            threshold = threshold or self.threshold
+            key = dataset_key(df)
+            if key is not None:
+                key = (key, tuple(columns) if columns is not None else None, tuple(near), threshold)
+                with self._lock:
+                    report = self._reports.get(key)
+                    if report is not None:
+                        self._reports.move_to_end(key)
+                        return report
+
+            counts = {}
+            hashes = self._hash_rows(df, columns, near, threshold, counts)
+            report = {
+                'rows': len(df),
+                'duplicate_rows': int(pd.Series(hashes).duplicated().sum()),
+                'columns': counts,
+            }
+            if key is not None:
+                with self._lock:
+                    self._reports[key] = report
+                    while len(self._reports) > self.max_items:
+                        self._reports.popitem(last=False)
+            return report
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+
+# Shared per-process instance
+duplicate_engine = DuplicateEngine()
@@ -0,0 +1,98 @@
+"""
+Streaming Excel reader used at upload time.
+
+Workbooks are read once, sheet by sheet, and written into the dataset store;
+analysis never opens the xlsx again. The calamine engine (``python-calamine``)
+is used when installed, otherwise read-only openpyxl streams the rows in
+``CSV_CHUNK_ROWS`` sized chunks without loading the whole workbook.
+"""
+#base library
+import logging
+import sys
+from itertools import islice
+
+import pandas as pd
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+
+try:
+    import python_calamine  # noqa: F401 , backs pandas' 'calamine' engine
+    ENGINE = 'calamine'
+except ImportError:  # optional, openpyxl is used without it
+    ENGINE = 'openpyxl'
+
+logger = logging.getLogger(__name__)
+
+
+def sheet_names(path) -> list:
+    """Sheet names of a workbook, read from its index without loading any cells."""
+    try:
+        if ENGINE == 'calamine':
+            return list(python_calamine.CalamineWorkbook.from_path(str(path)).sheet_names)
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
+def _header(row) -> list:
+    """Column names like ``pd.read_excel``: blanks become 'Unnamed: i', repeats get '.1', '.2', ..."""
+    names, seen = [], {}
+    for index, value in enumerate(row):
+        name = f'Unnamed: {index}' if value is None or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_sheet_chunks(path, sheet, chunk_rows=None):
+    """
+    Yields the rows of one sheet as DataFrame chunks, the first row is the header.
+    Blank rows are skipped. Columns get nullable dtypes, integer columns with
+    blanks stay exact integers and columns mixing types are left to the store.
+    """
+    chunk_rows = chunk_rows or getattr(settings, 'CSV_CHUNK_ROWS', 100_000)
+    if ENGINE == 'calamine':
+        df = pd.read_excel(path, sheet_name=sheet, engine='calamine', dtype_backend='numpy_nullable').dropna(how='all')
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # Formatted but empty cells at the end of the header are not columns
+        while header and header[-1] is None:
+            header = header[:-1]
+        columns = _header(header)
+        width = len(columns)
+        while True:
+            block = list(islice(rows, chunk_rows))
+            if not block:
+                break
+            # Read-only rows can be ragged, they are padded / cut to the header width
+            records = [row[:width] + (None,) * (width - len(row)) for row in block if any(v is not None for v in row)]
+            if records:
+                # Typed column by column, from_records would turn integers with blanks into floats
+                yield pd.DataFrame({col: pd.array(list(values)) for col, values in zip(columns, zip(*records))},
+                                   columns=columns)
+    finally:
+        workbook.close()
@@ -0,0 +1,150 @@
+#base library
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import plotly.io as pio
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.data_cache import dataset_key
+
+logger = logging.getLogger(__name__)
+
+# Builder arguments that never change the figure
+IGNORED_ARGUMENTS = ('self', 'request')
+
+
+class FigureCache:
+    """
+    Cache of built Plotly figures, stored as figure JSON.
+
+    Entries are keyed by the ``(dataset_id, version)`` of the frame, the builder
+    name and its remaining arguments (columns, chart name, theme, ...). The
+    in-memory tier is an LRU bounded by item count and total JSON size, the
+    optional disk tier keeps one JSON file per figure and is shared by the web
+    and job worker processes.
+
+    Parameters:
+
+    max_bytes : (int) : Memory budget for all cached figures.
+    max_items : (int) : Maximum number of figures kept in memory.
+    cache_dir : (str | Path | None) : Directory of the disk tier, disabled when None.
+    """
+
+    def __init__(self, max_bytes=None, max_items=None, cache_dir=None):
+        self.max_bytes = max_bytes or getattr(settings, 'FIGURE_CACHE_MAX_BYTES', 128 * 1024 * 1024)
+        self.max_items = max_items or getattr(settings, 'FIGURE_CACHE_MAX_ITEMS', 256)
+        cache_dir = cache_dir or getattr(settings, 'FIGURE_CACHE_DIR', None)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+        self._figures = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(dataset, builder: str, params: dict) -> str:
+        """``{dataset_id}-v{version}-{digest}``, the prefix lets a dataset's figures be dropped together."""
+        payload = json.dumps([builder, sorted(params.items())], default=repr)
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return f'{dataset[0]}-v{dataset[1]}-{digest}'
+
+    def _path(self, key) -> Path:
+        return self.cache_dir / f'{key}.json'
+
+    #---- Memory tier ----#
+    def _remember(self, key, payload: str):
+        with self._lock:
+            if key in self._figures:
+                self._total_bytes -= len(self._figures.pop(key))
+            self._figures[key] = payload
+            self._total_bytes += len(payload)
+            while self._figures and (len(self._figures) > self.max_items or self._total_bytes > self.max_bytes):
+                _, old = self._figures.popitem(last=False)
+                self._total_bytes -= len(old)
+
+    def get(self, key):
+        """Returns the cached figure (memory first, then disk tier) or None."""
+        try:
+            with self._lock:
+                payload = self._figures.get(key)
+                if payload is not None:
+                    self._figures.move_to_end(key)
+            if payload is None and self.cache_dir and self._path(key).exists():
+                payload = self._path(key).read_text(encoding='utf-8')
+                self._remember(key, payload)
+            return pio.from_json(payload, skip_invalid=True) if payload is not None else None
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def put(self, key, fig):
+        try:
+            payload = fig.to_json()
+            self._remember(key, payload)
+            if self.cache_dir:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Written under a temporary name first, readers never see half a file
+                temp = self._path(key).with_suffix('.tmp')
+                temp.write_text(payload, encoding='utf-8')
+                temp.replace(self._path(key))
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def invalidate(self, dataset_id, version=None):
+        """Drops the figures of every (or one) version of a dataset from both tiers."""
+        prefix = f'{dataset_id}-v' if version is None else f'{dataset_id}-v{version}-'
+        with self._lock:
+            for key in [k for k in self._figures if k.startswith(prefix)]:
+                self._total_bytes -= len(self._figures.pop(key))
+        if self.cache_dir and self.cache_dir.exists():
+            for path in self.cache_dir.glob(f'{prefix}*.json'):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'items': len(self._figures), 'bytes': self._total_bytes}
+
+    def cached(self, func):
+        """
+        Decorator for figure builders taking a DataFrame argument. Frames handed
+        out by the DataFrame cache are looked up by dataset version, any other
+        frame (filtered, sampled, ...) is built as usual.
+        """
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            frames = [value for value in bound.arguments.values() if isinstance(value, pd.DataFrame)]
+            dataset = dataset_key(frames[0]) if len(frames) == 1 else None
+            if dataset is None:
+                return func(*args, **kwargs)
+
+            params = {name: value for name, value in bound.arguments.items()
+                      if name not in IGNORED_ARGUMENTS and not isinstance(value, pd.DataFrame)}
+            key = self.key(dataset, func.__qualname__, params)
+            fig = self.get(key)
+            if fig is not None:
+                logger.info(f'{func.__qualname__} served from the figure cache')
+                return fig
+            fig = func(*args, **kwargs)
+            # Builders return None when the figure could not be built, that is not cached
+            if fig is not None:
+                self.put(key, fig)
+            return fig
+        return wrapper
+
+
+# Shared per-process instance
+figure_cache = FigureCache()
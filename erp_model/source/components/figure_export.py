@@ -0,0 +1,166 @@
+#base library
+import base64
+import functools
+import gzip
+import json
+import logging
+import sys
+
+import numpy as np
+import plotly.io as pio
+from plotly.offline import get_plotlyjs_version
+
+#app Modules
+from exception import CustomException
+from source.components.plotly_calc import THEMES
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Plain JSON number lists shorter than this are not worth a typed array
+MIN_TYPED_LENGTH = 8
+# Trace attributes holding data arrays
+DATA_KEYS = ('x', 'y', 'z', 'lat', 'lon', 'values', 'customdata', 'width', 'base')
+# Data arrays shown as-is in hovers and callbacks, floats are never narrowed
+EXACT_KEYS = ('customdata',)
+# Largest float32 rounding error accepted, relative to the range of the values
+FLOAT32_TOLERANCE = 1e-6
+
+
+def _typed(values: np.ndarray, narrow: bool = True) -> dict:
+    """
+    plotly.js typed array spec ``{'dtype', 'bdata'}`` in the narrowest dtype for drawing.
+
+    Integers (and integer valued floats) get the smallest integer type. Other
+    floats are sent as float32 when ``narrow`` is set and the rounding stays
+    within ``FLOAT32_TOLERANCE`` of their range (far below screen resolution),
+    as float64 otherwise.
+    """
+    if values.dtype.kind == 'f':
+        finite = values[np.isfinite(values)]
+        if finite.size == values.size and finite.size and np.array_equal(finite, np.round(finite)) \
+                and np.abs(finite).max() < 2 ** 31:
+            values = values.astype('i8')
+        elif narrow and _fits_float32(finite):
+            values = values.astype('f4')
+    if values.dtype.kind in 'iub':
+        low, high = (int(values.min()), int(values.max())) if values.size else (0, 0)
+        for dtype in ('i1', 'i2', 'i4'):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                values = values.astype(dtype)
+                break
+        else:
+            # plotly.js has no 64-bit integer arrays
+            values = values.astype('f8')
+    typed = {'dtype': values.dtype.str.lstrip('<|='), 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        typed['shape'] = ','.join(str(size) for size in values.shape)
+    return typed
+
+
+def _fits_float32(finite: np.ndarray) -> bool:
+    """True when float32 holds the values within ``FLOAT32_TOLERANCE`` of their range (or magnitude)."""
+    if not finite.size:
+        return True
+    if np.abs(finite).max() >= np.finfo('f4').max:
+        return False
+    scale = float(np.ptp(finite)) or float(np.abs(finite).max())
+    error = np.abs(finite.astype('f4').astype('f8') - finite).max()
+    return error <= FLOAT32_TOLERANCE * scale
+
+
+def _as_number_array(value):
+    """
+    Numeric array of a trace attribute, either a JSON list (or list of equal
+    length rows, e.g. heatmap ``z``) of plain numbers (no bools, no None) or a
+    typed array already written by plotly. None otherwise.
+    """
+    if isinstance(value, dict) and 'bdata' in value:
+        values = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+        if 'shape' in value:
+            values = values.reshape([int(size) for size in str(value['shape']).split(',')])
+        return values
+    if not isinstance(value, list) or not value:
+        return None
+    items = value
+    if all(isinstance(row, list) for row in value):
+        if len({len(row) for row in value}) != 1:
+            return None
+        items = [item for row in value for item in row]
+    if len(items) < MIN_TYPED_LENGTH:
+        return None
+    if not all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in items):
+        return None
+    return np.asarray(value)
+
+
+def template_name(fig):
+    """Name of the ``THEMES`` template applied to the figure, None for a custom one."""
+    for name in THEMES:
+        if fig.layout.template == pio.templates[name]:
+            return name
+    return None
+
+
+def plotlyjs_url() -> str:
+    """CDN build of the plotly.js version matching the installed plotly package."""
+    return f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'
+
+
+@functools.lru_cache(maxsize=len(THEMES))
+def template_json(name: str) -> str:
+    """Template of one theme as JSON, served once and cached by the browser."""
+    if name not in THEMES:
+        raise ValueError(f"Unknown theme '{name}'")
+    return json.dumps(pio.templates[name].to_plotly_json(), separators=(',', ':'))
+
+
+def compact_figure(fig) -> dict:
+    """
+    Figure dict trimmed for transfer.
+
+    Numeric trace arrays are sent as narrowed base64 typed arrays and the theme
+    template is replaced by its name (``layout.template`` is restored in the
+    browser from ``template_json``). Dates stay ISO strings, they compress
+    better than epoch numbers.
+
+    Returns:
+        dict : {'data', 'layout', 'template'}
+    """
+    try:
+        theme = template_name(fig)
+        figure = json.loads(fig.to_json())
+        layout = figure.get('layout', {})
+        if theme is not None:
+            layout.pop('template', None)
+
+        for trace in figure.get('data', []):
+            for key in DATA_KEYS:
+                value = trace.get(key)
+                numbers = _as_number_array(value)
+                if numbers is not None:
+                    trace[key] = _typed(numbers, narrow=key not in EXACT_KEYS)
+        return {'data': figure.get('data', []), 'layout': layout, 'template': theme}
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
+
+
+def encode_body(payload: str, accept_encoding: str = ''):
+    """
+    Compresses a JSON body with brotli (when installed and accepted) or gzip.
+
+    Returns:
+        tuple : (body bytes, Content-Encoding value or None)
+    """
+    data = payload.encode('utf-8')
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(data, quality=5), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(data, compresslevel=6), 'gzip'
+    return data, None
@@ -0,0 +1,300 @@
+#base library
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.utils import timezone
+
+#app Modules
+from exception import CustomException
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(job, progress) returning a JSON serializable result
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Registers a function as the handler of one job kind."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+class JobContext:
+    """Request stand-in handed to the analysis classes inside a job, they only read ``.user`` for logging."""
+
+    def __init__(self, user):
+        self.user = user
+
+
+class JobProgress:
+    """Callable handed to job handlers to report progress (0 - 100) and a short status message."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def __call__(self, progress, message=''):
+        from erp_app.models import AnalysisJob
+        # updated_at doubles as the heartbeat of the job, see ``JobRunner.reclaim_stalled``
+        AnalysisJob.objects.filter(id=self.job_id).update(
+            progress=int(progress), message=message[:255], updated_at=timezone.now())
+
+
+def init_django_worker():
+    """Pool initializer, sets up Django in spawned worker processes."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'erp_model.settings')
+    django.setup()
+
+
+_job_worker = False
+
+
+def init_job_worker():
+    """Initializer of the job pool, marks the process so nested pools take only its share of the CPUs."""
+    global _job_worker
+    init_django_worker()
+    _job_worker = True
+
+
+def job_worker_cpus():
+    """CPUs one job worker may use for its own pools, None outside the job pool."""
+    if not _job_worker:
+        return None
+    jobs = getattr(settings, 'JOB_WORKERS', None) or os.cpu_count() or 1
+    return max(1, (os.cpu_count() or 1) // jobs)
+
+
+def run_job(job_id):
+    """
+    Executes one queued job. Runs inside a pool worker process.
+
+    The job row is claimed with a conditional update, so a job resubmitted by
+    several web processes is still executed exactly once.
+    """
+    from erp_app.models import AnalysisJob
+
+    claimed = AnalysisJob.objects.filter(id=job_id, status=AnalysisJob.QUEUED).update(
+        status=AnalysisJob.RUNNING, progress=0, worker_pid=os.getpid(), updated_at=timezone.now())
+    if not claimed:
+        return job_id
+
+    job = AnalysisJob.objects.select_related('user', 'uploaded_file').get(id=job_id)
+    try:
+        handler = JOB_HANDLERS[job.kind]
+        result = handler(job, JobProgress(job_id))
+        AnalysisJob.objects.filter(id=job_id).update(
+            status=AnalysisJob.DONE, progress=100, message='', result=result, updated_at=timezone.now())
+        logger.info(f'Job #{job_id} ({job.kind}) finished')
+    except Exception as e:
+        logger.exception(f'Job #{job_id} ({job.kind}) failed')
+        AnalysisJob.objects.filter(id=job_id).update(status=AnalysisJob.FAILED, error=str(e), updated_at=timezone.now())
+    return job_id
+
+
+def _worker_alive(pid) -> bool:
+    """Whether the process ``pid`` of this host still runs."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """
+    Local background job runner, no external broker needed.
+
+    ``AnalysisJob`` rows in the database are the queue, a process pool of
+    ``JOB_WORKERS`` workers executes them. With ``JOB_RUNNER_EAGER`` jobs run
+    inline in the calling process, which is handy for tests and debugging.
+
+    A job already queued or running for the same dataset, kind and parameters
+    is returned instead of queuing it twice. Jobs left running by a worker that
+    died, or silent for ``JOB_TIMEOUT`` seconds, are queued again when the pool
+    starts.
+    """
+
+    def __init__(self, max_workers=None, eager=None):
+        self.max_workers = max_workers or getattr(settings, 'JOB_WORKERS', None) or os.cpu_count()
+        self.eager = getattr(settings, 'JOB_RUNNER_EAGER', False) if eager is None else eager
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is not None:
+                return self._executor, False
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_job_worker)
+            return self._executor, True
+
+    def _dispatch(self, job_id):
+        if self.eager:
+            run_job(job_id)
+            return
+        executor, started = self._pool()
+        executor.submit(run_job, job_id)
+        if started:
+            self.resume_pending(exclude=job_id)
+
+    @staticmethod
+    def active_job(user, kind, uploaded_file, params=None):
+        """
+        Queued or running job of ``user`` with the same kind and parameters (the
+        dataset version among them) on the same dataset, None when there is none.
+        Records of identical content (``UploadedFile.dataset_id``) share their jobs.
+        """
+        from erp_app.models import AnalysisJob
+
+        jobs = AnalysisJob.objects.filter(
+            user=user, kind=kind, status__in=(AnalysisJob.QUEUED, AnalysisJob.RUNNING))
+        if uploaded_file.content_hash:
+            jobs = jobs.filter(uploaded_file__content_hash=uploaded_file.content_hash)
+        else:
+            jobs = jobs.filter(uploaded_file=uploaded_file)
+        params = params or {}
+        return next((job for job in jobs.order_by('id') if job.params == params), None)
+
+    def submit(self, user, kind, uploaded_file=None, params=None):
+        """Queues a job and returns the ``AnalysisJob`` row, poll it through the job status endpoint."""
+        try:
+            from erp_app.models import AnalysisJob
+
+            if kind not in JOB_HANDLERS:
+                raise ValueError(f"Unknown job kind '{kind}'")
+            if uploaded_file is not None:
+                job = self.active_job(user, kind, uploaded_file, params)
+                if job is not None:
+                    logger.info(f'Job #{job.id} ({kind}) already {job.status}, not queued again')
+                    return job
+            job = AnalysisJob.objects.create(
+                user=user, kind=kind, uploaded_file=uploaded_file, params=params or {})
+            logger.info(f'Job #{job.id} ({kind}) queued by {user}')
+            self._dispatch(job.id)
+            return job
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def reclaim_stalled(self) -> list:
+        """
+        Queues again the running jobs whose worker died (a crash or a restart) or
+        that reported no progress for ``JOB_TIMEOUT`` seconds. Returns their ids.
+        """
+        from erp_app.models import AnalysisJob
+
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_TIMEOUT', 3600))
+        reclaimed = []
+        for job in AnalysisJob.objects.filter(status=AnalysisJob.RUNNING).only('id', 'worker_pid', 'updated_at'):
+            if job.updated_at >= cutoff and _worker_alive(job.worker_pid):
+                continue
+            # Conditional on the row being unchanged, the worker may have just finished or reported
+            requeued = AnalysisJob.objects.filter(
+                id=job.id, status=AnalysisJob.RUNNING, updated_at=job.updated_at).update(
+                status=AnalysisJob.QUEUED, worker_pid=None, message='Queued again, its worker stopped',
+                updated_at=timezone.now())
+            if requeued:
+                logger.warning(f'Job #{job.id} was left running by worker {job.worker_pid}, queued again')
+                reclaimed.append(job.id)
+        return reclaimed
+
+    def resume_pending(self, exclude=None):
+        """Re-dispatches jobs left queued or running (see ``reclaim_stalled``) by a previous process."""
+        from erp_app.models import AnalysisJob
+
+        self.reclaim_stalled()
+        pending = AnalysisJob.objects.filter(status=AnalysisJob.QUEUED).exclude(id=exclude)
+        for job_id in pending.values_list('id', flat=True):
+            self._dispatch(job_id)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# Shared per-process instance
+job_runner = JobRunner()
+
+
+#-----------------------------------------------------------
+#---- Job Handlers -----------------------------------------
+#-----------------------------------------------------------
+def _dataset(job):
+    from source.components.data_cache import load_dataset
+
+    df = load_dataset(job.uploaded_file, job.params.get('version', 0))
+    if df is None:
+        raise ValueError('Dataset is no longer available, please upload the file again.')
+    return df
+
+
+@job_handler('ingest')
+def ingest_job(job, progress):
+    """Parses one file of a batch upload, see ``DataIngestion.ingest_batch``."""
+    from source.components.data_ingestion import DataIngestion
+
+    progress(10, f"Parsing {job.params['name']}")
+    records = DataIngestion().ingest_staged(
+        job.user, job.params['path'], job.params['name'], job.params.get('content_hash', ''))
+    return {'files': [{'id': record.id, 'sheet': record.sheet, 'rows': record.rows, 'columns': len(record.columns)}
+                      for record in records]}
+
+
+@job_handler('summary')
+def summary_job(job, progress):
+    from source.components.data_analysis import BasisDataAnalysis
+
+    progress(10, 'Reading dataset')
+    return BasisDataAnalysis().summarize(job.uploaded_file)
+
+
+@job_handler('auto_correct_datatypes')
+def auto_correct_datatypes_job(job, progress):
+    """Infers column types, recorded as a step of the transformation log."""
+    from source.components.data_store import DatasetStore
+    from source.components.transform_log import transform_log
+
+    progress(10, 'Inferring column types')
+    version = job.params.get('version', 0)
+    # The original upload can be read column-wise by the column workers straight from the store
+    source_path = None if version else DatasetStore().full_path(job.uploaded_file.file_path)
+    step = transform_log.record(job.uploaded_file, version, 'auto_correct_datatypes',
+                                user=job.user, source_path=source_path)
+    return {
+        'df_version': step.id,
+        'columns': step.columns,
+    }
+
+
+@job_handler('plot')
+def plot_job(job, progress):
+    """Builds the figure for the selected analysis type and columns."""
+    from source.components.figure_export import compact_figure
+    from source.pipeline import data_analysis_pipeline
+
+    progress(10, 'Reading dataset')
+    df = _dataset(job)
+    progress(40, 'Building figure')
+    fig = data_analysis_pipeline.build_figure(
+        JobContext(job.user), df,
+        job.params.get('type'), job.params.get('columns', []), job.params.get('visual'),
+        job.params.get('theme'))
+    if fig is None:
+        raise ValueError('No chart is available for the selected columns.')
+    # Served compressed by the figure endpoint, the page only embeds its URL
+    return {'figure': compact_figure(fig)}
@@ -0,0 +1,296 @@
+"""
+Whole-frame outlier detection.
+
+The numeric columns are stacked into one float matrix (in column blocks of
+``BLOCK_BYTES``) and every statistic is computed for all of them at once:
+quartiles, median, MAD, mean and standard deviation come from batched
+``nan*`` reductions instead of one quantile scan per column. Methods:
+
+    iqr       : outside ``[Q1 - factor*IQR, Q3 + factor*IQR]`` (Tukey fences)
+    zscore    : ``|x - mean| / std > factor``
+    mad       : modified z-score ``0.6745 * |x - median| / MAD > factor``
+    isolation : score of a one dimensional isolation forest ``> factor``
+
+Every column gets its bounds, its whiskers (smallest / largest inlier, the
+box plot whiskers) and a packed bitmap of its outlier rows (n / 8 bytes).
+Reports of frames handed out by the DataFrame cache are kept per dataset
+version, the box plot builders reuse them.
+"""
+#base library
+import logging
+import math
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components import decimation
+from source.components.data_cache import dataset_key
+
+logger = logging.getLogger(__name__)
+
+# method -> default cut-off
+METHODS = {'iqr': 1.5, 'zscore': 3.0, 'mad': 3.5, 'isolation': 0.7}
+BLOCK_BYTES = 256 * 1024 * 1024     # float matrix size of one column block
+ISOLATION_TREES = 100
+ISOLATION_SAMPLE = 256
+
+
+def numeric_columns(df: pd.DataFrame) -> list:
+    """Numeric, non boolean columns."""
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _average_path(n) -> float:
+    """Average path length of an unsuccessful search in a binary search tree of ``n`` points."""
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (math.log(n - 1) + 0.5772156649) - 2.0 * (n - 1) / n
+
+
+def _grow(values: np.ndarray, depth: int, limit: int, rng, splits: list, paths: list):
+    """
+    One dimensional isolation tree over sorted ``values``. The leaves partition
+    the line, ``splits`` collects their boundaries and ``paths`` their path
+    lengths from left to right.
+    """
+    if depth >= limit or len(values) <= 1 or values[0] == values[-1]:
+        paths.append(depth + _average_path(len(values)))
+        return
+    split = rng.uniform(values[0], values[-1])
+    cut = np.searchsorted(values, split, side='left')
+    _grow(values[:cut], depth + 1, limit, rng, splits, paths)
+    splits.append(split)
+    _grow(values[cut:], depth + 1, limit, rng, splits, paths)
+
+
+def isolation_scores(values: np.ndarray, trees=ISOLATION_TREES, sample=ISOLATION_SAMPLE, seed=0) -> np.ndarray:
+    """
+    Isolation forest anomaly scores (0 - 1, around 0.5 for ordinary values) of one column.
+
+    A one dimensional tree is a step function of the value, so the trees are
+    merged into one grid of boundaries with the summed path length of every
+    cell and all rows are scored with a single ``searchsorted``. The seed is
+    fixed, scores are reproducible.
+    """
+    scores = np.zeros(len(values))
+    finite = values[~np.isnan(values)]
+    if finite.size < 2 or finite.min() == finite.max():
+        return scores
+    rng = np.random.default_rng(seed)
+    size = min(sample, finite.size)
+    limit = math.ceil(math.log2(size))
+    forest = []
+    for _ in range(trees):
+        splits, paths = [], []
+        _grow(np.sort(finite[rng.integers(0, finite.size, size)]), 0, limit, rng, splits, paths)
+        forest.append((np.asarray(splits), np.asarray(paths)))
+
+    grid = np.unique(np.concatenate([splits for splits, _ in forest]))
+    # Left end of every grid cell, the first cell starts at -inf
+    cells = np.concatenate([[-np.inf], grid])
+    total = np.zeros(len(cells))
+    for splits, paths in forest:
+        total += paths[np.searchsorted(splits, cells, side='right')]
+    depth = total[np.searchsorted(grid, values, side='right')] / trees
+    scores = 2.0 ** (-depth / _average_path(size))
+    scores[np.isnan(values)] = 0.0
+    return scores
+
+
+class OutlierEngine:
+    """
+    Outlier bounds, counts and bitmaps of every numeric column, see the module doc.
+
+    Parameters:
+
+    method : (str) : Default method, ``settings.OUTLIER_METHOD``.
+    """
+
+    def __init__(self, method=None, max_items=1024):
+        self.method = method or getattr(settings, 'OUTLIER_METHOD', 'iqr')
+        self.max_items = max_items
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def factor(method, factor=None) -> float:
+        if method not in METHODS:
+            raise ValueError(f"Unknown outlier method '{method}', expected one of {list(METHODS)}")
+        return float(factor if factor is not None else METHODS[method])
+
+    #---- Batched statistics ----#
+    def _block(self, X: np.ndarray, method: str, factor: float) -> list:
+        """Reports of the columns of one float block (rows x columns)."""
+        missing = np.isnan(X)
+        count = (~missing).sum(axis=0)
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            # All-NaN columns (e.g. empty after filtering) are expected, their reductions are NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            q1, median, q3 = np.nanquantile(X, [0.25, 0.5, 0.75], axis=0)
+            mean = np.nanmean(X, axis=0)
+            std = np.nanstd(X, axis=0, ddof=1)
+
+            if method == 'iqr':
+                lower, upper = q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+            elif method == 'zscore':
+                lower, upper = mean - factor * std, mean + factor * std
+            elif method == 'mad':
+                mad = np.nanmedian(np.abs(X - median), axis=0)
+                # Constant majority (MAD = 0): mean absolute deviation on the MAD scale, for normal data
+                # sigma = 1.2533 * MeanAD and MAD = 0.6745 * sigma
+                mad = np.where(mad > 0, mad, np.nanmean(np.abs(X - median), axis=0) * 1.2533 * 0.6745)
+                lower, upper = median - factor * mad / 0.6745, median + factor * mad / 0.6745
+            if method == 'isolation':
+                scores = np.column_stack([isolation_scores(X[:, j]) for j in range(X.shape[1])])
+                mask = scores > factor
+            else:
+                mask = (X < lower) | (X > upper)
+
+            inlier = np.where(mask | missing, np.nan, X)
+            low_whisker, high_whisker = np.nanmin(inlier, axis=0), np.nanmax(inlier, axis=0)
+        if method == 'isolation':
+            lower, upper = low_whisker, high_whisker
+
+        reports = []
+        for j in range(X.shape[1]):
+            reports.append({
+                'count': int(count[j]),
+                'outliers': int(mask[:, j].sum()),
+                'lower': _float(lower[j]),
+                'upper': _float(upper[j]),
+                'q1': _float(q1[j]),
+                'median': _float(median[j]),
+                'q3': _float(q3[j]),
+                'mean': _float(mean[j]),
+                'std': _float(std[j]),
+                'lowerfence': _float(low_whisker[j]),
+                'upperfence': _float(high_whisker[j]),
+                'bitmap': np.packbits(mask[:, j]),
+            })
+        return reports
+
+    def detect(self, df: pd.DataFrame, columns=None, method=None, factor=None) -> dict:
+        """
+        Outliers of the numeric ``columns`` (all by default).
+
+        Returns:
+            dict : {'method', 'factor', 'rows', 'columns': {column: report}}, a report holds
+                   count, outliers, lower, upper, q1, median, q3, mean, std, lowerfence,
+                   upperfence and bitmap (``np.packbits`` of the outlier rows).
+        """
+        try:
+            method = method or self.method
+            factor = self.factor(method, factor)
+            columns = numeric_columns(df) if columns is None else list(columns)
+            key = dataset_key(df)
+
+            reports, missing = {}, []
+            for col in columns:
+                cached = self._cached((key, col, method, factor)) if key is not None else None
+                if cached is None:
+                    missing.append(col)
+                else:
+                    reports[col] = cached
+
+            per_block = max(1, BLOCK_BYTES // max(1, 8 * len(df)))
+            for start in range(0, len(missing), per_block):
+                block = missing[start:start + per_block]
+                X = np.column_stack([_as_float(df[col]) for col in block]) if len(df) else np.empty((0, len(block)))
+                for col, report in zip(block, self._block(X, method, factor)):
+                    reports[col] = report
+                    if key is not None:
+                        self._remember((key, col, method, factor), report)
+            return {'method': method, 'factor': factor, 'rows': len(df),
+                    'columns': {col: reports[col] for col in columns}}
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    @staticmethod
+    def mask(report: dict, rows: int) -> np.ndarray:
+        """Boolean outlier mask of one column report."""
+        return np.unpackbits(report['bitmap'], count=rows).astype(bool)
+
+    def _cached(self, key):
+        with self._lock:
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+            return report
+
+    def _remember(self, key, report):
+        with self._lock:
+            self._reports[key] = report
+            while len(self._reports) > self.max_items:
+                self._reports.popitem(last=False)
+
+    #---- Box plots ----#
+    def box_stats(self, df: pd.DataFrame, value, by=None, budget=None) -> pd.DataFrame:
+        """
+        Precomputed box plot of ``value``, one row per group of the ``by`` columns.
+
+        Columns q1, median, q3, mean, sd, lowerfence, upperfence (Tukey
+        whiskers) and points, the values beyond the whiskers sampled down to
+        the point budget.
+        """
+        try:
+            values = _as_float(df[value])
+            budget = decimation.point_budget(budget)
+            if not by:
+                report = self.detect(df, [value], 'iqr')['columns'][value]
+                stats = pd.DataFrame([{'q1': report['q1'], 'median': report['median'], 'q3': report['q3'],
+                                       'mean': report['mean'], 'sd': report['std'],
+                                       'lowerfence': report['lowerfence'], 'upperfence': report['upperfence']}],
+                                     index=pd.Index([str(value)]))
+                points = np.flatnonzero(self.mask(report, len(df)))
+                codes = np.zeros(len(df), dtype=np.int64)
+            else:
+                grouped = pd.Series(values, index=df.index).groupby([df[col] for col in by], observed=True, sort=True)
+                quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+                stats = pd.DataFrame({'q1': quartiles[0.25], 'median': quartiles[0.5], 'q3': quartiles[0.75],
+                                      'mean': grouped.mean(), 'sd': grouped.std()})
+                # Rows with a missing key have no group (NaN), they take the -1 code
+                codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+                iqr = (stats['q3'] - stats['q1']).to_numpy()
+                lower = np.append(stats['q1'].to_numpy() - 1.5 * iqr, np.nan)[codes]
+                upper = np.append(stats['q3'].to_numpy() + 1.5 * iqr, np.nan)[codes]
+                valid = (codes >= 0) & ~np.isnan(values)
+                outside = valid & ((values < lower) | (values > upper))
+                inside = valid & ~outside
+                whiskers = pd.Series(values[inside]).groupby(codes[inside])
+                stats['lowerfence'] = whiskers.min().reindex(range(len(stats))).to_numpy()
+                stats['upperfence'] = whiskers.max().reindex(range(len(stats))).to_numpy()
+                points = np.flatnonzero(outside)
+
+            if len(points) > budget:
+                points = np.sort(np.random.default_rng(0).choice(points, budget, replace=False))
+            by_group = pd.Series(values[points]).groupby(codes[points]).agg(list)
+            stats['points'] = [by_group.get(i, []) for i in range(len(stats))]
+            return stats
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+
+def _float(value):
+    return None if value is None or not np.isfinite(value) else float(value)
+
+
+# Shared per-process instance
+outlier_engine = OutlierEngine()
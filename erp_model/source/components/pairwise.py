@@ -0,0 +1,244 @@
+"""
+Pairwise statistics of many columns at once.
+
+    numeric x numeric         : Pearson or Spearman correlation
+    categorical x categorical : Cramér's V (``ContingencyEngine``)
+    numeric x categorical     : correlation ratio (eta, of the ranks with Spearman)
+
+The numeric columns are read in row chunks, shifted and scaled by the first
+chunk in float64, then narrowed to float32 (NaN as 0). Every chunk adds four
+matrix products to float64 accumulators:
+
+    S = X'X, A = X'M, B = (X*X)'M, N = M'M      (M: 1 where a value is present)
+
+which give the pairwise-complete correlation of every pair like
+``DataFrame.corr()``. Spearman ranks every column once, pairs of columns
+missing different rows are then re-ranked on the rows both hold, as
+``DataFrame.corr('spearman')`` does. The correlation ratio uses the same chunks: the
+one-hot matrix of a categorical column times the chunk gives the group sums
+of all numeric columns in one sparse product. Chunks can run on a thread
+pool (the matrix products release the GIL). Matrices of frames handed out by
+the DataFrame cache are kept per dataset version, heatmaps of any subset of
+their columns are sliced from them.
+"""
+#base library
+import logging
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.stats import rankdata
+
+#app Modules
+from exception import CustomException
+from source.components.column_parallel import resolve_workers
+from source.components.contingency import codes, contingency_engine
+from source.components.data_cache import dataset_key
+from source.components.data_transformation import column_kind
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('pearson', 'spearman')
+CHUNK_BYTES = 64 * 1024 * 1024  # float32 size of one row chunk of the numeric columns
+
+
+def _chunk(values: pd.DataFrame, start: int, stop: int, shift: np.ndarray, scale: np.ndarray):
+    """Shifted and scaled float32 rows ``start:stop``, NaN as 0, and the presence mask (None without NaN)."""
+    # Shifted and scaled in float64 before narrowing, large values (1e8 +- 5) keep their spread
+    X = ((values.iloc[start:stop].to_numpy(dtype=np.float64, na_value=np.nan) - shift) / scale).astype(np.float32)
+    missing = np.isnan(X)
+    if not missing.any():
+        return X, None
+    X[missing] = 0.0
+    return X, (~missing).astype(np.float32)
+
+
+def _accumulate(values, start, stop, shift, scale, groups) -> dict:
+    """Matrix products of one row chunk, see the module doc."""
+    X, M = _chunk(values, start, stop, shift, scale)
+    rows = stop - start
+    partial = {'S': (X.T @ X).astype(np.float64)}
+    if M is None:
+        column_sums = X.sum(axis=0, dtype=np.float64)
+        squares = (X * X).sum(axis=0, dtype=np.float64)
+        partial['A'] = np.broadcast_to(column_sums[:, None], partial['S'].shape)
+        partial['B'] = np.broadcast_to(squares[:, None], partial['S'].shape)
+        partial['N'] = np.full(partial['S'].shape, float(rows))
+    else:
+        partial['A'] = (X.T @ M).astype(np.float64)
+        partial['B'] = ((X * X).T @ M).astype(np.float64)
+        partial['N'] = (M.T @ M).astype(np.float64)
+
+    partial['groups'] = []
+    for group_codes, levels in groups:
+        chunk_codes = group_codes[start:stop]
+        valid = np.flatnonzero(chunk_codes >= 0)
+        one_hot = csr_matrix((np.ones(len(valid), dtype=np.float32), (chunk_codes[valid], valid)),
+                             shape=(levels, rows))
+        present = one_hot @ M if M is not None else np.repeat(np.asarray(one_hot.sum(axis=1)), X.shape[1], axis=1)
+        partial['groups'].append((np.asarray(one_hot @ X, dtype=np.float64),
+                                  np.asarray(one_hot @ (X * X), dtype=np.float64),
+                                  np.asarray(present, dtype=np.float64)))
+    return partial
+
+
+def _rerank_pairs(values: pd.DataFrame, corr: np.ndarray):
+    """
+    Spearman of the pairs whose columns miss different rows, ranked again on
+    their complete rows. Columns missing the same rows keep the shared ranks.
+    """
+    present = values.notna().to_numpy()
+    patterns = [np.packbits(present[:, j]).tobytes() for j in range(present.shape[1])]
+    raw = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    for i in range(len(patterns)):
+        for j in range(i + 1, len(patterns)):
+            if patterns[i] == patterns[j]:
+                continue
+            rows = present[:, i] & present[:, j]
+            x, y = rankdata(raw[rows, i]), rankdata(raw[rows, j])
+            if len(x) < 2 or x.std() == 0 or y.std() == 0:
+                corr[i, j] = corr[j, i] = np.nan
+            else:
+                corr[i, j] = corr[j, i] = np.clip(np.corrcoef(x, y)[0, 1], -1.0, 1.0)
+
+
+def _correlation_ratio(sums, squares, counts) -> np.ndarray:
+    """Eta of every numeric column from its per-group sums, squares and counts (levels x columns)."""
+    n = counts.sum(axis=0)
+    total = sums.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = np.where(counts > 0, sums ** 2 / counts, 0.0).sum(axis=0) - total ** 2 / n
+        within = squares.sum(axis=0) - total ** 2 / n
+        eta = np.sqrt(np.clip(between / within, 0.0, 1.0))
+    return np.where((n > 1) & (within > 0), eta, np.nan)
+
+
+class PairwiseEngine:
+    """
+    Pairwise statistics matrices, see the module doc.
+
+    Parameters:
+
+    workers : (int) : Threads running the row chunks, ``settings.COLUMN_WORKERS`` by default.
+    """
+
+    def __init__(self, workers=None, max_items=64):
+        self.workers = workers
+        self.max_items = max_items
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def kinds(df: pd.DataFrame, columns=None) -> dict:
+        """Numeric and categorical columns, date / time columns have no pairwise statistic here."""
+        columns = list(df.columns if columns is None else columns)
+        kinds = {col: column_kind(df[col].dtype) for col in columns}
+        return {'Numeric': [col for col in columns if kinds[col] == 'Numeric'],
+                'Categorical': [col for col in columns if kinds[col] == 'Categorical']}
+
+    def matrix(self, df: pd.DataFrame, columns=None, method='pearson') -> pd.DataFrame:
+        """
+        Symmetric matrix of the pairwise statistics of ``columns`` (all numeric
+        and categorical columns by default), NaN where a pair has no variance.
+        """
+        try:
+            if method not in METHODS:
+                raise ValueError(f"Unknown correlation method '{method}', expected one of {list(METHODS)}")
+            key = dataset_key(df)
+            subset = None if columns is None else tuple(columns)
+            matrix = self._covering(key, method, subset) if key is not None else None
+            if matrix is None:
+                matrix = self._compute(df, self.kinds(df, columns), method)
+                if key is not None:
+                    self._remember((key, method, subset), matrix)
+            elif subset is not None:
+                wanted = [col for col in subset if col in matrix.index]
+                matrix = matrix.loc[wanted, wanted]
+            return matrix.copy()
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def _compute(self, df: pd.DataFrame, kinds: dict, method: str) -> pd.DataFrame:
+        numeric, categorical = kinds['Numeric'], kinds['Categorical']
+        columns = numeric + categorical
+        result = pd.DataFrame(np.nan, index=columns, columns=columns)
+        if categorical:
+            result.loc[categorical, categorical] = contingency_engine.association_matrix(df, categorical).to_numpy()
+        if not numeric:
+            return result
+
+        values = df[numeric]
+        if method == 'spearman':
+            # Average ranks of each column, pairs missing different rows are re-ranked below
+            values = values.rank()
+        groups = []
+        for col in categorical:
+            group_codes, labels = codes(df[col])
+            groups.append((group_codes, len(labels)))
+
+        rows = len(df)
+        step = max(1024, CHUNK_BYTES // (4 * len(numeric)))
+        head = values.iloc[:step].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings():
+            # All-NaN columns in the first chunk are expected, they are shifted by 0
+            warnings.simplefilter('ignore', RuntimeWarning)
+            shift = np.nan_to_num(np.nanmean(head, axis=0))
+            scale = np.nan_to_num(np.nanstd(head, axis=0), nan=1.0)
+        scale = np.where(scale > 0, scale, 1.0)
+
+        starts = list(range(0, rows, step))
+        workers = min(resolve_workers(self.workers), len(starts))
+        run = lambda start: _accumulate(values, start, min(start + step, rows), shift, scale, groups)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                partials = list(pool.map(run, starts))
+        else:
+            partials = [run(start) for start in starts]
+
+        if partials:
+            S, A, B, N = (sum(partial[name] for partial in partials) for name in 'SABN')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                covariance = S - A * A.T / N
+                variance_x, variance_y = B - A ** 2 / N, (B - A ** 2 / N).T
+                corr = covariance / np.sqrt(variance_x * variance_y)
+            corr = np.where((N > 1) & (variance_x > 0) & (variance_y > 0), np.clip(corr, -1.0, 1.0), np.nan)
+            if method == 'spearman' and df[numeric].isna().any().any():
+                _rerank_pairs(df[numeric], corr)
+            np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+            result.loc[numeric, numeric] = corr
+
+            for index, col in enumerate(categorical):
+                sums, squares, counts = (sum(partial['groups'][index][part] for partial in partials) for part in range(3))
+                eta = _correlation_ratio(sums, squares, counts)
+                result.loc[numeric, col] = eta
+                result.loc[col, numeric] = eta
+        logger.info(f'Pairwise {method} matrix of {len(columns)} columns over {rows} rows')
+        return result
+
+    def _covering(self, key, method, subset):
+        """Cached matrix of this dataset version holding every column of ``subset``."""
+        with self._lock:
+            for (cached_key, cached_method, cached_subset), matrix in reversed(self._matrices.items()):
+                if cached_key != key or cached_method != method:
+                    continue
+                if cached_subset is None or (subset is not None and set(subset) <= set(cached_subset)):
+                    self._matrices.move_to_end((cached_key, cached_method, cached_subset))
+                    return matrix
+            return None
+
+    def _remember(self, key, matrix):
+        with self._lock:
+            self._matrices[key] = matrix
+            while len(self._matrices) > self.max_items:
+                self._matrices.popitem(last=False)
+
+
+# Shared per-process instance
+pairwise_engine = PairwiseEngine()
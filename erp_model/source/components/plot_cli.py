@@ -0,0 +1,116 @@
+"""
+Console front end of the plot builders.
+
+    python -m source.components.plot_cli data.csv
+
+The prompts that used to live in ``plotly_calc.fundamental`` are kept here, the
+builders themselves take columns and theme as arguments.
+"""
+#base library
+import sys
+from typing import List
+
+import pandas as pd
+
+#app Modules
+from source.components.plotly_calc import CHARTS, THEMES, plot
+
+
+class ConsolePrompts:
+    """Interactive column, theme and chart selection on stdin."""
+
+    #---- Select Theme ----#
+    def select_theme(self):
+        print("\nSelect Theme for Plot:")
+        for i, t in enumerate(THEMES, start=1):
+            print(f"{i}: {t}")
+        try:
+            theme_index = int(input("\nEnter theme number: "))
+            return THEMES[theme_index - 1]
+        except (ValueError, IndexError):
+            print(f"⚠️ Invalid choice! Defaulting to '{THEMES[0]}'")
+            return THEMES[0]
+
+    def _show_columns(self, df: pd.DataFrame):
+        print('Data columns:\n')
+        for i, col in enumerate(df.columns, start=1):
+            print(f"{i}: {col}")
+
+    #---- Select One Variable ----#
+    def select_onevariable(self, df: pd.DataFrame):
+        self._show_columns(df)
+        x = int(input('Select column number: '))
+        return df.columns[x - 1]
+
+    #---- Select Two Variable ----#
+    def select_twovariable(self, df : pd.DataFrame):
+        self._show_columns(df)
+        x = int(input('Select column number for X: '))
+        y = int(input('Select column number for Y: '))
+        return [df.columns[x - 1], df.columns[y-1]]
+
+    #---- Select N Variables ----#
+    def select_n_variables(self, df: pd.DataFrame, n: int) -> List[str]:
+        self._show_columns(df)
+        picks = []
+        for j in range(1, n+1):
+            idx = int(input(f'Select column number {j}: '))
+            picks.append(df.columns[idx-1])
+        return picks
+
+    #---- Select Any Number Of Variables ----#
+    def select_many(self, df: pd.DataFrame) -> List[str]:
+        print('Select columns (enter numbers one by one, blank to finish):')
+        self._show_columns(df)
+        picks = []
+        while True:
+            s = input('Column number (blank to finish): ')
+            if s.strip() == '':
+                break
+            picks.append(df.columns[int(s)-1])
+        return picks
+
+    #---- Select Chart ----#
+    def select_chart(self):
+        names = list(CHARTS)
+        print("\nSelect Chart:")
+        for i, name in enumerate(names, start=1):
+            print(f"{i}: {name}")
+        return names[int(input("\nEnter chart number: ")) - 1]
+
+    def select_columns(self, df: pd.DataFrame, chart: str) -> List[str]:
+        n_columns = CHARTS[chart][2]
+        if n_columns is None:
+            return self.select_many(df)
+        if n_columns == 1:
+            return [self.select_onevariable(df)]
+        if n_columns == 2:
+            return self.select_twovariable(df)
+        return self.select_n_variables(df, n_columns)
+
+
+def run(df: pd.DataFrame, prompts=None):
+    """Prompts for a chart, its columns and a theme, then builds and returns the figure."""
+    prompts = prompts or ConsolePrompts()
+    chart = prompts.select_chart()
+    columns = prompts.select_columns(df, chart)
+    return plot(df, chart, columns, theme=prompts.select_theme())
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if not argv:
+        print('Usage: python -m source.components.plot_cli <file.csv | file.xlsx>')
+        return 1
+    path = argv[0]
+    df = pd.read_excel(path) if path.lower().endswith(('.xlsx', '.xls')) else pd.read_csv(path)
+    fig = run(df)
+    if fig is None:
+        print('⚠️ No figure could be built for the selected columns.')
+        return 1
+    fig.show()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,25 @@
 
-from typing import List
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 import functools
+import logging
+
+from django.conf import settings
+
+from source.components import decimation
+from source.components.contingency import contingency_engine
+from source.components.outliers import outlier_engine
+from source.components.pairwise import pairwise_engine
+from source.components.regression import regression_engine
+
+logger = logging.getLogger(__name__)
+
+THEMES = ["plotly", "plotly_white", "plotly_dark", "ggplot2", "seaborn", "simple_white", "none"]
+# Correlation heatmaps with more rows than this have no cell labels
+MAX_LABELLED_CELLS = 25
 
 
 def safe_plot(func):
@@ -12,66 +28,58 @@ def safe_plot(func):
         try:
             return func(*args, **kwargs)
         except KeyError as e:
-            print(f"❌ Column error: '{e.args[0]}' not found in DataFrame.")
+            logger.warning(f"❌ Column error: '{e.args[0]}' not found in DataFrame.")
         except ValueError as e:
-            print(f"⚠️ Value Error: {e}")
+            logger.warning(f"⚠️ Value Error: {e}")
         except TypeError as e:
-            print(f"⚠️ Type Error: {e}")
+            logger.warning(f"⚠️ Type Error: {e}")
         except Exception as e:
-            print(f"🚨 Unexpected Error: {e}")
+            logger.warning(f"🚨 Unexpected Error: {e}")
     return wrapper
 
 
 class fundamental:
+    """
+    Shared helpers of the plot builders. Builders never prompt: columns and
+    theme are arguments, the console prompts live in ``plot_cli``.
+    """
+
+    #---- Apply Theme ----#
+    def apply_theme(self, fig, theme=None):
+        if not theme:
+            theme = getattr(settings, 'PLOT_THEME', THEMES[0]) if settings.configured else THEMES[0]
+        if theme not in THEMES:
+            raise ValueError(f"Unknown theme '{theme}', expected one of {THEMES}")
+        fig.update_layout(template=theme)
+        return fig
+
+    #---- Check Columns ----#
+    def require(self, *columns):
+        missing = [i for i, col in enumerate(columns, start=1) if col is None or col == '']
+        if missing:
+            raise ValueError(f"Column {missing[0]} of {len(columns)} is not selected.")
+        return columns
+
+    #---- Precomputed Box ----#
+    def box_trace(self, stats: pd.DataFrame, x=None, name=None, **kwargs):
+        """
+        Box trace from ``OutlierEngine.box_stats`` rows: quartiles, mean, sd and
+        whiskers are sent precomputed, ``y`` only holds the outlier points of
+        every box instead of every row.
+        """
+        return go.Box(
+            x=x, name=name,
+            q1=stats['q1'].tolist(), median=stats['median'].tolist(), q3=stats['q3'].tolist(),
+            lowerfence=stats['lowerfence'].tolist(), upperfence=stats['upperfence'].tolist(),
+            mean=stats['mean'].tolist(), sd=stats['sd'].tolist(),
+            y=stats['points'].tolist(), boxpoints='all', jitter=0, pointpos=0, **kwargs)
+
+    #---- Matrix Heatmap ----#
+    def matrix_heatmap(self, matrix: pd.DataFrame, title: str):
+        """Heatmap of a ``PairwiseEngine`` matrix, cell labels are left out on large matrices."""
+        return px.imshow(matrix, text_auto='.2f' if len(matrix) <= MAX_LABELLED_CELLS else False,
+                         zmin=-1 if (matrix < 0).any().any() else 0, zmax=1, title=title)
 
-    #---- Select Theme ----#
-    @safe_plot
-    def select_theme(self, fig):
-        themes = ["plotly", "plotly_white", "plotly_dark", "ggplot2", "seaborn", "simple_white", "none"]
-        print("\nSelect Theme for Plot:")
-        for i, t in enumerate(themes, start=1):
-            print(f"{i}: {t}")
-        try:
-            theme_index = int(input("\nEnter theme number: "))
-            selected_theme = themes[theme_index - 1]
-        except (ValueError, IndexError):
-            print("⚠️ Invalid choice! Defaulting to 'default'")
-            selected_theme = 'default'
-        fig.update_layout(template=selected_theme)
-        return selected_theme
-
-    #---- Select One Variable ----#
-    @safe_plot
-    def select_onevariable(self, df: pd.DataFrame):
-        print('Data columns:\n')
-        for i, col in enumerate(df.columns, start=1):
-            print(f"{i}: {col}")
-        x = int(input('Select column number: '))
-        return df.columns[x - 1]
-
-    #---- Select Two Variable ----#
-    @safe_plot
-    def select_twovariable(self, df : pd.DataFrame):
-        print('Data columns:\n')
-        for i, col in enumerate(df.columns, start=1):
-            print(f"{i}: {col}")
-        x = int(input('Select column number for X: '))
-        y = int(input('Select column number for Y: '))
-        return [df.columns[x - 1], df.columns[y-1]]
-
-    #---- Select N Variables ----#
-    @safe_plot
-    def select_n_variables(self, df: pd.DataFrame, n: int) -> List[str]:
-        print('Data columns:\n')
-        for i, col in enumerate(df.columns, start=1):
-            print(f"{i}: {col}")
-        picks = []
-        for j in range(1, n+1):
-            idx = int(input(f'Select column number {j}: '))
-            picks.append(df.columns[idx-1])
-        return picks
-
-   
 
 #-----------------------------------------------------------
 #---- One Variable Numeric Plots ---------------------------
@@ -83,27 +91,38 @@ class OneVariableNumeric:
         self.fundamental = fundamental()
 
     @safe_plot
-    def histogram(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
-        fig = px.histogram(df, x=x, nbins=20, title=f"Histogram of {x}")
-        self.fundamental.select_theme(fig)
+    def histogram(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
+        series = df[x]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            # Binned here, the figure carries the 20 bars instead of every row
+            centers, widths, counts, edges = decimation.histogram(series, bins=20)
+            label = str if pd.api.types.is_datetime64_any_dtype(series) else "{:.6g}".format
+            ranges = [f"{label(low)} - {label(high)}" for low, high in zip(edges[:-1], edges[1:])]
+            fig = go.Figure(go.Bar(x=centers, y=counts, width=widths, customdata=ranges,
+                                   hovertemplate='%{customdata}<br>count=%{y}<extra></extra>'))
+            fig.update_layout(title=f"Histogram of {x}", xaxis_title=x, yaxis_title='count', bargap=0)
+        else:
+            counts = series.value_counts(sort=False).reset_index()
+            counts.columns = [x, "count"]
+            fig = px.bar(counts, x=x, y="count", title=f"Histogram of {x}")
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def boxplot(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
-        fig = px.box(df, y=x, title=f"Box Plot of {x}")
-        self.fundamental.select_theme(fig)
+    def boxplot(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
+        stats = outlier_engine.box_stats(df, x)
+        fig = go.Figure(self.fundamental.box_trace(stats, x=[str(x)], name=str(x)))
+        fig.update_layout(title=f"Box Plot of {x}", yaxis_title=x)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def violin(self, df: pd.DataFrame, x =  None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def violin(self, df: pd.DataFrame, x =  None, theme=None):
+        self.fundamental.require(x)
         fig = px.violin(df, y=x, title=f"Violin Plot of {x}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
 
@@ -117,33 +136,30 @@ class OneVariableCategorical:
         self.fundamental = fundamental()
 
     @safe_plot
-    def bar(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def bar(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
         counts = df[x].value_counts().reset_index()
         counts.columns = [x, "count"]
         fig = px.bar(counts, x=x, y="count", title=f"Bar Chart of {x}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def pie(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def pie(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
         counts = df[x].value_counts().reset_index()
         counts.columns = [x, "count"]
         fig = px.pie(counts, names=x, values="count", title=f"Pie Chart of {x}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def donut(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def donut(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
         counts = df[x].value_counts().reset_index()
         counts.columns = [x, "count"]
         fig = px.pie(counts, names=x, values="count", hole=0.5, title=f"Donut Chart of {x}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
 
@@ -157,24 +173,22 @@ class OneVariableDateTime:
         self.fundamental = fundamental()
 
     @safe_plot
-    def line_unsorted(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def line_unsorted(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
         counts = df[x].value_counts().sort_index().reset_index()
         counts.columns = [x, "count"]
         fig = px.line(counts, x=x, y="count", title=f"Line Chart of {x} (Unsorted)")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def line_sorted(self, df: pd.DataFrame, x = None):
-        if not x:
-            x = self.fundamental.select_onevariable(df)
+    def line_sorted(self, df: pd.DataFrame, x = None, theme=None):
+        self.fundamental.require(x)
         df = df.sort_values(by=x)
         counts = df[x].value_counts().sort_index().reset_index()
         counts.columns = [x, "count"]
         fig = px.line(counts, x=x, y="count", title=f"Line Chart of {x} (Sorted)")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
 
@@ -205,32 +219,64 @@ class TwoVariableXCatYNum:
         self.fundamental = fundamental()
 
     @safe_plot
-    def bar(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.bar(df, x=x, y=y, title=f"Bar Chart of {y} by {x}")
-        self.fundamental.select_theme(fig)
+    def bar(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        totals = df.groupby(x, observed=True, sort=False)[y].sum().reset_index()
+        fig = px.bar(totals, x=x, y=y, title=f"Bar Chart of {y} by {x}")
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def column(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.bar(df, x=y, y=x, orientation='h', title=f"Column Chart of {y} by {x}")
-        self.fundamental.select_theme(fig)
+    def column(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        totals = df.groupby(x, observed=True, sort=False)[y].sum().reset_index()
+        fig = px.bar(totals, x=y, y=x, orientation='h', title=f"Column Chart of {y} by {x}")
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def lollipop(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
+    def lollipop(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
         df_sorted = df.sort_values(by=y, ascending=True)
         fig = px.scatter(df_sorted, x=x, y=y, title=f"Lollipop Chart of {y} by {x}")
         fig.add_traces(px.line(df_sorted, x=x, y=y).data)
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
 
+#-----------------------------------------------------------
+#------ Two Variable: Both Categorical ----------------------
+#-----------------------------------------------------------
+class TwoVariableCategorical:
+    """Class for plotting count charts of two categorical columns."""
+
+    def __init__(self):
+        self.fundamental = fundamental()
+
+    def _counts(self, df, x, color):
+        counts = df.groupby([x, color], observed=True, sort=False).size().reset_index()
+        counts.columns = [x, color, "count"]
+        return counts
+
+    @safe_plot
+    def stacked_bar(self, df, x=None, color=None, theme=None):
+        self.fundamental.require(x, color)
+        fig = px.bar(self._counts(df, x, color), x=x, y="count", color=color,
+                     title=f"Stacked Bar of {color} by {x}")
+        fig.update_layout(barmode='stack')
+        self.fundamental.apply_theme(fig, theme)
+        return fig
+
+    @safe_plot
+    def grouped_bar(self, df, x=None, color=None, theme=None):
+        self.fundamental.require(x, color)
+        fig = px.bar(self._counts(df, x, color), x=x, y="count", color=color,
+                     title=f"Grouped Bar of {color} by {x}")
+        fig.update_layout(barmode='group')
+        self.fundamental.apply_theme(fig, theme)
+        return fig
+
+
 #-----------------------------------------------------------
 #------ Two Variable: Both Numeric --------------------------
 #-----------------------------------------------------------
@@ -240,35 +286,42 @@ class TwoVariableNumeric:
     def __init__(self):
         self.fundamental = fundamental()
     @safe_plot
-    def correlation_heatmap(self, df: pd.DataFrame, cols : list):
-        nums = df[cols]
-        corr = nums.corr()
-        fig = px.imshow(corr, text_auto=True, title='Correlation matrix')
-        self.fundamental.select_theme(fig)
+    def correlation_heatmap(self, df: pd.DataFrame, cols : list, theme=None):
+        corr = pairwise_engine.matrix(df, cols)
+        fig = self.fundamental.matrix_heatmap(corr, 'Correlation matrix')
+        self.fundamental.apply_theme(fig, theme)
         return fig 
 
     @safe_plot
-    def scatter(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.scatter(df, x=x, y=y, title=f"Scatter Plot of {y} vs {x}")
-        self.fundamental.select_theme(fig)
+    def scatter(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        if len(df) > decimation.point_budget():
+            # Too many points to ship to the browser, the density is drawn as a 2D histogram instead
+            xs, ys, counts = decimation.bin_2d(df, x, y)
+            fig = go.Figure(go.Heatmap(x=xs, y=ys, z=counts, colorscale='Viridis', colorbar=dict(title='rows')))
+            fig.update_layout(title=f"Scatter Plot of {y} vs {x}", xaxis_title=x, yaxis_title=y)
+            decimation.annotate(fig, int(np.nansum(counts)), len(df), 'binned', bins=int(np.isfinite(counts).sum()))
+        else:
+            fig = px.scatter(df, x=x, y=y, title=f"Scatter Plot of {y} vs {x}")
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def line(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.line(df, x=x, y=y, title=f"Line Chart of {y} vs {x}")
-        self.fundamental.select_theme(fig)
+    def line(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        data, total = decimation.decimate_line(df, x, y)
+        fig = px.line(data, x=x, y=y, title=f"Line Chart of {y} vs {x}")
+        decimation.annotate(fig, len(data), total, 'LTTB')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def area(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.area(df, x=x, y=y, title=f"Area Chart of {y} vs {x}")
-        self.fundamental.select_theme(fig)
+    def area(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        data, total = decimation.decimate_line(df, x, y)
+        fig = px.area(data, x=x, y=y, title=f"Area Chart of {y} vs {x}")
+        decimation.annotate(fig, len(data), total, 'LTTB')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
 
@@ -282,19 +335,21 @@ class TwoVariableXDateYNum:
         self.fundamental = fundamental()
 
     @safe_plot
-    def line(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.line(df, x=x, y=y, title=f"Line Chart of {y} over Time ({x})")
-        self.fundamental.select_theme(fig)
+    def line(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        data, total = decimation.decimate_line(df, x, y)
+        fig = px.line(data, x=x, y=y, title=f"Line Chart of {y} over Time ({x})")
+        decimation.annotate(fig, len(data), total, 'LTTB')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def area(self, df, x=None, y=None):
-        if not x and not y:
-            x, y = self.fundamental.select_twovariable(df)
-        fig = px.area(df, x=x, y=y, title=f"Area Chart of {y} over Time ({x})")
-        self.fundamental.select_theme(fig)
+    def area(self, df, x=None, y=None, theme=None):
+        self.fundamental.require(x, y)
+        data, total = decimation.decimate_line(df, x, y)
+        fig = px.area(data, x=x, y=y, title=f"Area Chart of {y} over Time ({x})")
+        decimation.annotate(fig, len(data), total, 'LTTB')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
 
@@ -303,6 +358,7 @@ class TwoVariableXDateYNum:
 #-----------------------------------------------------------
 class TwoVariable(
     TwoVariableXCatYNum,
+    TwoVariableCategorical,
     TwoVariableNumeric,
     TwoVariableXDateYNum
 ):
@@ -310,6 +366,7 @@ class TwoVariable(
 
     def __init__(self):
         TwoVariableXCatYNum.__init__(self)
+        TwoVariableCategorical.__init__(self)
         TwoVariableNumeric.__init__(self)
         TwoVariableXDateYNum.__init__(self)
 
@@ -325,83 +382,91 @@ class ThreeColumns:
 
     # 3 columns: Numeric + Numeric + Categorical
     @safe_plot
-    def scatter_color(self, df, x=None, y=None, cat=None):
-        if not x and not y and not cat:
-            x, y, cat = self.fundamental.select_n_variables(df, 3)
-        fig = px.scatter(df, x=x, y=y, color=cat, title=f"Scatter of {x} vs {y} colored by {cat}")
-        self.fundamental.select_theme(fig)
+    def scatter_color(self, df, x=None, y=None, cat=None, theme=None):
+        self.fundamental.require(x, y, cat)
+        data, total = decimation.sample_rows(df, by=cat)
+        fig = px.scatter(data, x=x, y=y, color=cat, title=f"Scatter of {x} vs {y} colored by {cat}")
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def bubble(self, df, x=None, y=None, size=None):
-        if not x and not y and not size:
-            x, y, size = self.fundamental.select_n_variables(df, 3)
-        fig = px.scatter(df, x=x, y=y, size=size, title=f"Bubble chart of {x} vs {y} sized by {size}")
-        self.fundamental.select_theme(fig)
+    def bubble(self, df, x=None, y=None, size=None, theme=None):
+        self.fundamental.require(x, y, size)
+        data, total = decimation.sample_rows(df, by=None)
+        fig = px.scatter(data, x=x, y=y, size=size, title=f"Bubble chart of {x} vs {y} sized by {size}")
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def box_by_cat(self, df, cat=None, num=None, color=None):
-        if not cat and not num and not color:
-            cat, num, color = self.fundamental.select_n_variables(df, 3)
-        fig = px.box(df, x=cat, y=num, color=color, title=f"Box plot of {num} by {cat} (colored by {color})")
-        self.fundamental.select_theme(fig)
+    def box_by_cat(self, df, cat=None, num=None, color=None, theme=None):
+        self.fundamental.require(cat, num, color)
+        stats = outlier_engine.box_stats(df, num, by=[cat, color])
+        fig = go.Figure()
+        for value, group in stats.groupby(level=1, sort=False):
+            fig.add_trace(self.fundamental.box_trace(
+                group, x=group.index.get_level_values(0).astype(str).tolist(), name=str(value),
+                legendgroup=str(value)))
+        fig.update_layout(title=f"Box plot of {num} by {cat} (colored by {color})", boxmode='group',
+                          xaxis_title=cat, yaxis_title=num, legend_title_text=color)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     # 3 columns: Numeric + Numeric + Numeric
     @safe_plot
-    def bubble_3num(self, df, x=None, y=None, size=None):
-        if not x and not y and not size:
-            x, y, size = self.fundamental.select_n_variables(df, 3)
-        fig = px.scatter(df, x=x, y=y, size=size, title=f"Bubble chart: {x} vs {y}, size={size}")
-        self.fundamental.select_theme(fig)
+    def bubble_3num(self, df, x=None, y=None, size=None, theme=None):
+        self.fundamental.require(x, y, size)
+        data, total = decimation.sample_rows(df, by=None)
+        fig = px.scatter(data, x=x, y=y, size=size, title=f"Bubble chart: {x} vs {y}, size={size}")
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def scatter_3d(self, df, x=None, y=None, z=None):
-        if not x and not y and not z:
-            x, y, z = self.fundamental.select_n_variables(df, 3)
-        fig = px.scatter_3d(df, x=x, y=y, z=z, title=f"3D Scatter of {x}, {y}, {z}")
-        self.fundamental.select_theme(fig)
+    def scatter_3d(self, df, x=None, y=None, z=None, theme=None):
+        self.fundamental.require(x, y, z)
+        data, total = decimation.sample_rows(df, by=None)
+        fig = px.scatter_3d(data, x=x, y=y, z=z, title=f"3D Scatter of {x}, {y}, {z}")
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     # 3 columns: Categorical + Categorical + Numeric
     @safe_plot
-    def grouped_bar(self, df, cat1=None, cat2=None, val=None):
-        if not cat1 and not cat2 and not val:
-            cat1, cat2, val = self.fundamental.select_n_variables(df, 3)
-        fig = px.bar(df, x=cat1, y=val, color=cat2, barmode='group',
+    def grouped_bar(self, df, cat1=None, cat2=None, val=None, theme=None):
+        self.fundamental.require(cat1, cat2, val)
+        # One bar per group instead of one segment per row
+        totals = df.groupby([cat1, cat2], observed=True, sort=False)[val].sum().reset_index()
+        fig = px.bar(totals, x=cat1, y=val, color=cat2, barmode='group',
                      title=f"Grouped bar of {val} by {cat1} and {cat2}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def heatmap_pivot(self, df, cat1=None, cat2=None, val=None):
-        if not cat1 and not cat2 and not val:
-            cat1, cat2, val = self.fundamental.select_n_variables(df, 3)
-        pivot = df.pivot_table(values=val, index=cat1, columns=cat2, aggfunc='mean')
+    def heatmap_pivot(self, df, cat1=None, cat2=None, val=None, theme=None):
+        self.fundamental.require(cat1, cat2, val)
+        pivot = df.pivot_table(values=val, index=cat1, columns=cat2, aggfunc='mean', observed=True)
         fig = px.imshow(pivot, labels=dict(x=cat2, y=cat1, color=val),
                         title=f"Heatmap (mean {val}) by {cat1} and {cat2}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     # 3 columns: Datetime + Numeric + Categorical
     @safe_plot
-    def line_time_group(self, df, time_col=None, val=None, cat=None):
-        if not time_col and not val and not cat:
-            time_col, val, cat = self.fundamental.select_n_variables(df, 3)
+    def line_time_group(self, df, time_col=None, val=None, cat=None, theme=None):
+        self.fundamental.require(time_col, val, cat)
         df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
         fig = px.line(df, x=time_col, y=val, color=cat, title=f"Time series of {val} by {cat}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def area_time_group(self, df, time_col=None, val=None, cat=None):
-        if not time_col and not val and not cat:
-            time_col, val, cat = self.fundamental.select_n_variables(df, 3)
+    def area_time_group(self, df, time_col=None, val=None, cat=None, theme=None):
+        self.fundamental.require(time_col, val, cat)
         df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
         fig = px.area(df, x=time_col, y=val, color=cat, title=f"Area chart of {val} by {cat} over time")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
 
@@ -411,38 +476,48 @@ class FourColumns:
         self.fundamental = fundamental()
 
     @safe_plot
-    def box_color_facet(self, df, num1=None, num2=None, cat1=None, cat2=None):
-        if not num1 and not num2 and not cat1 and not cat2:
-            num1, num2, cat1, cat2 = self.fundamental.select_n_variables(df, 4)
-        fig = px.box(df, x=cat1, y=num1, color=cat2, facet_col=cat2,
-                     title=f"Box plot of {num1} by {cat1} colored/faceted by {cat2}")
-        self.fundamental.select_theme(fig)
+    def box_color_facet(self, df, num1=None, num2=None, cat1=None, cat2=None, theme=None):
+        self.fundamental.require(num1, num2, cat1, cat2)
+        stats = outlier_engine.box_stats(df, num1, by=[cat2, cat1])
+        facets = stats.index.get_level_values(0).unique()
+        fig = make_subplots(rows=1, cols=max(1, len(facets)), shared_yaxes=True,
+                            subplot_titles=[f"{cat2}={value}" for value in facets])
+        colors = px.colors.qualitative.Plotly
+        for i, value in enumerate(facets):
+            group = stats.xs(value, level=0, drop_level=False)
+            fig.add_trace(self.fundamental.box_trace(
+                group, x=group.index.get_level_values(1).astype(str).tolist(), name=str(value),
+                marker_color=colors[i % len(colors)]), row=1, col=i + 1)
+            fig.update_xaxes(title_text=cat1, row=1, col=i + 1)
+        fig.update_yaxes(title_text=num1, row=1, col=1)
+        fig.update_layout(title=f"Box plot of {num1} by {cat1} colored/faceted by {cat2}",
+                          legend_title_text=cat2)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def faceted_bar(self, df, num=None, cat1=None, cat2=None):
-        if not num and not cat1 and not cat2:
-            num, _, cat1, cat2 = self.fundamental.select_n_variables(df, 4)
+    def faceted_bar(self, df, num=None, cat1=None, cat2=None, theme=None):
+        self.fundamental.require(num, cat1, cat2)
         fig = px.bar(df, x=cat1, y=num, color=cat2, facet_col=cat2,
                      title=f"Faceted bar of {num} by {cat1} and {cat2}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def scatter_size_color(self, df, x=None, y=None, size=None, cat=None):
-        if not x and not y and not size and not cat:
-            x, y, size, cat = self.fundamental.select_n_variables(df, 4)
-        fig = px.scatter(df, x=x, y=y, size=size, color=cat,
+    def scatter_size_color(self, df, x=None, y=None, size=None, cat=None, theme=None):
+        self.fundamental.require(x, y, size, cat)
+        data, total = decimation.sample_rows(df, by=cat)
+        fig = px.scatter(data, x=x, y=y, size=size, color=cat,
                          title=f"Scatter of {x} vs {y}, size={size}, color={cat}")
-        self.fundamental.select_theme(fig)
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def parallel_coordinates(self, df, col1=None, col2=None, col3=None, col4=None):
-        if not col1 and not col2 and not col3 and not col4:
-            nums = self.fundamental.select_n_variables(df, 4)
-        else:
-            nums = [col for col in [col1, col2, col3, col4] if col]
+    def parallel_coordinates(self, df, col1=None, col2=None, col3=None, col4=None, theme=None):
+        nums = [col for col in [col1, col2, col3, col4] if col]
+        if len(nums) < 2:
+            raise ValueError('Need at least 2 columns for parallel coordinates')
         try:
             color_col = nums[-1]
             dims = nums[:-1]
@@ -450,16 +525,15 @@ class FourColumns:
             color_col = None
             dims = nums
         fig = px.parallel_coordinates(df, dimensions=dims, color=color_col) if color_col else px.parallel_coordinates(df, dimensions=dims)
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def scatter_geo(self, df, lat=None, lon=None, cat=None, val=None):
-        if not lat and not lon and not cat and not val:
-            lat, lon, cat, val = self.fundamental.select_n_variables(df, 4)
+    def scatter_geo(self, df, lat=None, lon=None, cat=None, val=None, theme=None):
+        self.fundamental.require(lat, lon, cat, val)
         fig = px.scatter_geo(df, lat=lat, lon=lon, color=cat, size=val,
                              title=f"Geo scatter of {val} by {cat}")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
 
@@ -469,63 +543,61 @@ class ManyColumns:
         self.fundamental = fundamental()
 
     @safe_plot
-    def parallel_coords(self, df):
-        print('Select numeric columns for parallel coordinates (enter numbers one by one, blank to finish):')
-        for i, col in enumerate(df.columns, start=1):
-            print(f"{i}: {col}")
-        picks = []
-        while True:
-            s = input('Column number (blank to finish): ')
-            if s.strip() == '':
-                break
-            picks.append(df.columns[int(s)-1])
+    def parallel_coords(self, df, columns=None, theme=None):
+        picks = list(columns) if columns else list(df.select_dtypes(include=[np.number]).columns)
         if len(picks) < 2:
-            print('Need at least 2 columns for parallel coordinates')
-            return
+            raise ValueError('Need at least 2 columns for parallel coordinates')
         fig = px.parallel_coordinates(df[picks])
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def scatter_matrix(self, df):
-        print('Select columns for scatter matrix (enter numbers one by one, blank to finish):')
-        for i, col in enumerate(df.columns, start=1):
-            print(f"{i}: {col}")
-        picks = []
-        while True:
-            s = input('Column number (blank to finish): ')
-            if s.strip() == '':
-                break
-            picks.append(df.columns[int(s)-1])
+    def scatter_matrix(self, df, columns=None, theme=None):
+        picks = list(columns) if columns else list(df.select_dtypes(include=[np.number]).columns)
         if len(picks) < 2:
-            print('Need at least 2 columns for scatter matrix')
-            return
-        fig = px.scatter_matrix(df[picks], title='Scatter matrix')
-        self.fundamental.select_theme(fig)
+            raise ValueError('Need at least 2 columns for scatter matrix')
+        data, total = decimation.sample_rows(df[picks])
+        fig = px.scatter_matrix(data, title='Scatter matrix')
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def treemap_sunburst(self, df):
-        print('Select two categorical columns and one numeric (enter 3 numbers):')
-        c1 = int(input('cat1 column number: '))
-        c2 = int(input('cat2 column number: '))
-        v = int(input('value column number: '))
-        cat1 = df.columns[c1-1]
-        cat2 = df.columns[c2-1]
-        val = df.columns[v-1]
+    def treemap_sunburst(self, df, cat1=None, cat2=None, val=None, theme=None):
+        self.fundamental.require(cat1, cat2, val)
         fig = px.treemap(df, path=[cat1, cat2], values=val, title=f"Treemap by {cat1} and {cat2} (size={val})")
-        self.fundamental.select_theme(fig)
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
     @safe_plot
-    def correlation_heatmap(self, df):
-        nums = df.select_dtypes(include=[np.number])
-        if nums.shape[1] < 2:
-            print('Need at least two numeric columns for correlation matrix')
-            return
-        corr = nums.corr()
-        fig = px.imshow(corr, text_auto=True, title='Correlation matrix')
-        self.fundamental.select_theme(fig)
+    def correlation_heatmap(self, df, theme=None):
+        nums = list(df.select_dtypes(include=[np.number]).columns)
+        if len(nums) < 2:
+            raise ValueError('Need at least two numeric columns for correlation matrix')
+        corr = pairwise_engine.matrix(df, nums)
+        fig = self.fundamental.matrix_heatmap(corr, 'Correlation matrix')
+        self.fundamental.apply_theme(fig, theme)
+        return fig
+
+    @safe_plot
+    def pairwise_heatmap(self, df, columns=None, method='pearson', theme=None):
+        # Numeric, categorical and mixed pairs, see PairwiseEngine
+        matrix = pairwise_engine.matrix(df, columns or None, method=method)
+        if len(matrix) < 2:
+            raise ValueError('Need at least two numeric or categorical columns for pairwise matrix')
+        fig = self.fundamental.matrix_heatmap(
+            matrix, f"Pairwise matrix ({method}, Cramer's V, correlation ratio)")
+        self.fundamental.apply_theme(fig, theme)
+        return fig
+
+    @safe_plot
+    def association_heatmap(self, df, columns=None, theme=None):
+        # Cramer's V from sparse contingency tables, no crosstab of the high-cardinality columns
+        matrix = contingency_engine.association_matrix(df, columns or None)
+        if matrix.shape[1] < 2:
+            raise ValueError("Need at least two categorical columns for Cramer's V matrix")
+        fig = px.imshow(matrix, text_auto='.2f', zmin=0, zmax=1, title="Association matrix (Cramer's V)")
+        self.fundamental.apply_theme(fig, theme)
         return fig
 
 
@@ -542,11 +614,100 @@ class Regression(fundamental):
     def __init__(self):
         fundamental.__init__(self)
 
-    def RegressionPlot(self, df : pd.DataFrame, cols): 
-        fig = px.scatter(df, x=cols[0], y=cols[1], trendline='ols')
-        fundamental.select_theme(self, fig)
+    def RegressionPlot(self, df : pd.DataFrame, cols, theme=None, kind='ols'):
+        x, y = self.require(*(list(cols) + [None, None])[:2])
+        # Fitted on every row (cached per dataset version), only a sample of the points is drawn
+        result = regression_engine.fit(df, x, y, kind)
+        data, total = decimation.sample_rows(df[[x, y]])
+        fig = px.scatter(data, x=x, y=y, title=f"Regression of {y} on {x}")
+        if result['lower'] is not None:
+            fig.add_trace(go.Scatter(x=result['x'], y=result['lower'], mode='lines', line=dict(width=0),
+                                     showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=result['x'], y=result['upper'], mode='lines', line=dict(width=0),
+                                     fill='tonexty', fillcolor='rgba(239, 85, 59, 0.2)', name='95% confidence',
+                                     hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=result['x'], y=result['fit'], mode='lines', line=dict(color='#EF553B'),
+                                 name=f"{kind.upper()} trendline",
+                                 hovertemplate=regression_engine.equation(result, x, y) + '<extra></extra>',
+                                 meta={'n': result['n'], 'r2': result['r2'], 'coefficients': result['coefficients']}))
+        decimation.annotate(fig, len(data), total, 'sampled')
+        self.apply_theme(fig, theme)
         return fig
 
+#-----------------------------------------------------------
+#---- Declarative Entry Point ------------------------------
+#-----------------------------------------------------------
+# chart name -> (builder class, method, number of columns, None for a column list)
+CHARTS = {
+    'histogram': (OneVariableNumeric, 'histogram', 1),
+    'boxplot': (OneVariableNumeric, 'boxplot', 1),
+    'violin': (OneVariableNumeric, 'violin', 1),
+    'bar': (OneVariableCategorical, 'bar', 1),
+    'pie': (OneVariableCategorical, 'pie', 1),
+    'donut': (OneVariableCategorical, 'donut', 1),
+    'line_unsorted': (OneVariableDateTime, 'line_unsorted', 1),
+    'line_sorted': (OneVariableDateTime, 'line_sorted', 1),
+    'cat_num_bar': (TwoVariableXCatYNum, 'bar', 2),
+    'cat_num_column': (TwoVariableXCatYNum, 'column', 2),
+    'lollipop': (TwoVariableXCatYNum, 'lollipop', 2),
+    'stacked_bar': (TwoVariableCategorical, 'stacked_bar', 2),
+    'grouped_count_bar': (TwoVariableCategorical, 'grouped_bar', 2),
+    'scatter': (TwoVariableNumeric, 'scatter', 2),
+    'line': (TwoVariableNumeric, 'line', 2),
+    'area': (TwoVariableNumeric, 'area', 2),
+    'time_line': (TwoVariableXDateYNum, 'line', 2),
+    'time_area': (TwoVariableXDateYNum, 'area', 2),
+    'regression': (Regression, 'RegressionPlot', None),
+    'scatter_color': (ThreeColumns, 'scatter_color', 3),
+    'bubble': (ThreeColumns, 'bubble', 3),
+    'box_by_cat': (ThreeColumns, 'box_by_cat', 3),
+    'bubble_3num': (ThreeColumns, 'bubble_3num', 3),
+    'scatter_3d': (ThreeColumns, 'scatter_3d', 3),
+    'grouped_bar': (ThreeColumns, 'grouped_bar', 3),
+    'heatmap_pivot': (ThreeColumns, 'heatmap_pivot', 3),
+    'line_time_group': (ThreeColumns, 'line_time_group', 3),
+    'area_time_group': (ThreeColumns, 'area_time_group', 3),
+    'box_color_facet': (FourColumns, 'box_color_facet', 4),
+    'faceted_bar': (FourColumns, 'faceted_bar', 3),
+    'scatter_size_color': (FourColumns, 'scatter_size_color', 4),
+    'parallel_coordinates': (FourColumns, 'parallel_coordinates', 4),
+    'scatter_geo': (FourColumns, 'scatter_geo', 4),
+    'parallel_coords': (ManyColumns, 'parallel_coords', None),
+    'scatter_matrix': (ManyColumns, 'scatter_matrix', None),
+    'treemap_sunburst': (ManyColumns, 'treemap_sunburst', 3),
+    'correlation_matrix': (ManyColumns, 'correlation_heatmap', 0),
+    'association_matrix': (ManyColumns, 'association_heatmap', None),
+    'pairwise_matrix': (ManyColumns, 'pairwise_heatmap', None),
+}
+
+_builders = {}
+
+
+def plot(df: pd.DataFrame, chart: str, columns=None, theme=None):
+    """
+    Builds a chart from a spec, nothing is prompted so it is safe in views and worker pools.
+
+    Parameters:
+
+    chart : (str) : Name from ``CHARTS``.
+    columns : (list | None) : Columns in the order of the builder's arguments.
+    theme : (str | None) : Plotly template from ``THEMES``, ``settings.PLOT_THEME`` by default.
+
+    Returns:
+        Figure, or None when the figure could not be built for these columns.
+    """
+    if chart not in CHARTS:
+        raise ValueError(f"Unknown chart '{chart}'")
+    builder_class, method, n_columns = CHARTS[chart]
+    if builder_class not in _builders:
+        _builders[builder_class] = builder_class()
+    build = getattr(_builders[builder_class], method)
+    columns = list(columns or [])
+    if n_columns is None:
+        return build(df, columns, theme=theme)
+    return build(df, *columns[:n_columns], theme=theme)
+
+
 if __name__ == '__main__':
-    print('Module loaded. Use MultiColumnPlots() to access multi-column plotting helpers.')
+    print('Module loaded. Use plot() to build a chart, or run source/components/plot_cli.py for the console prompts.')
 
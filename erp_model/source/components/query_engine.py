@@ -0,0 +1,236 @@
+"""
+Lazy queries over the columnar dataset store.
+
+A ``Query`` only records a projection, row filters and a limit; nothing is
+read until ``collect``, ``stats`` or ``count`` runs it on an execution
+backend. The Arrow backend pushes the projection and the filters down to the
+Parquet scan (only the needed columns and row groups are read) and streams
+aggregations batch by batch, the pandas backend is the eager fallback.
+Other engines can be plugged in with ``@backend('name')``.
+"""
+#base library
+import logging
+import operator
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.data_store import DatasetStore
+from source.components.running_stats import RunningStats
+
+logger = logging.getLogger(__name__)
+
+# name -> backend class
+BACKENDS = {}
+
+# Comparison operators accepted by ``Query.where``
+OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+UNARY_OPERATORS = ('is null', 'not null')
+
+
+def backend(name):
+    """Registers an execution backend class."""
+    def register(cls):
+        BACKENDS[name] = cls
+        cls.name = name
+        return cls
+    return register
+
+
+class Query:
+    """
+    Immutable lazy query on one Parquet file, every method returns a new query.
+
+    Parameters:
+
+    engine : (QueryEngine) : Engine running the query.
+    path : (str | Path) : Parquet file of the dataset.
+    """
+
+    def __init__(self, engine, path, columns=None, filters=(), limit=None):
+        self.engine = engine
+        self.path = str(path)
+        self.columns = list(columns) if columns is not None else None
+        self.filters = tuple(filters)
+        self.row_limit = limit
+
+    def _replace(self, **changes):
+        state = {'columns': self.columns, 'filters': self.filters, 'limit': self.row_limit}
+        state.update(changes)
+        return Query(self.engine, self.path, **state)
+
+    #---- Building ----#
+    def select(self, *columns):
+        """Projection, only these columns are read."""
+        return self._replace(columns=[str(col) for col in columns])
+
+    def where(self, column, op, value=None):
+        """Row filter ``column op value``, ``op`` is a comparison, 'in', 'is null' or 'not null'."""
+        if op not in OPERATORS and op not in UNARY_OPERATORS and op != 'in':
+            raise ValueError(f"Unsupported filter operator '{op}'")
+        return self._replace(filters=self.filters + ((str(column), op, value),))
+
+    def limit(self, n):
+        return self._replace(limit=int(n))
+
+    #---- Running ----#
+    def schema(self):
+        """Arrow schema of the projected columns, read from the file footer only."""
+        schema = pq.read_schema(self.path)
+        return schema if self.columns is None else pa.schema([schema.field(col) for col in self.columns])
+
+    def collect(self) -> pd.DataFrame:
+        return self.engine.backend.collect(self)
+
+    def head(self, n=5) -> pd.DataFrame:
+        return self.limit(n).collect()
+
+    def count(self) -> int:
+        if not self.filters:
+            # Row count is in the Parquet footer
+            rows = pq.ParquetFile(self.path).metadata.num_rows
+            return min(rows, self.row_limit) if self.row_limit is not None else rows
+        return self.engine.backend.count(self)
+
+    def stats(self) -> dict:
+        """Count, nulls and numeric moments of the selected columns, in ``RunningStats.to_dict`` form."""
+        return self.engine.backend.stats(self)
+
+    def __repr__(self):
+        return f'Query({self.path!r}, columns={self.columns}, filters={list(self.filters)}, limit={self.row_limit})'
+
+
+#-----------------------------------------------------------
+#---- Backends ---------------------------------------------
+#-----------------------------------------------------------
+@backend('arrow')
+class ArrowBackend:
+    """pyarrow dataset scanner, projection and predicate pushdown with batched streaming."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'CSV_CHUNK_ROWS', 100_000)
+
+    @staticmethod
+    def _expression(filters):
+        expression = None
+        for column, op, value in filters:
+            field = pc.field(column)
+            if op == 'is null':
+                condition = field.is_null()
+            elif op == 'not null':
+                condition = field.is_valid()
+            elif op == 'in':
+                condition = field.isin(list(value))
+            else:
+                condition = OPERATORS[op](field, value)
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _scanner(self, query: Query, columns=None):
+        dataset = ds.dataset(query.path, format='parquet')
+        return dataset.scanner(columns=columns if columns is not None else query.columns,
+                               filter=self._expression(query.filters), batch_size=self.batch_size)
+
+    def collect(self, query: Query) -> pd.DataFrame:
+        scanner = self._scanner(query)
+        # head() stops reading once the limit is reached
+        table = scanner.head(query.row_limit) if query.row_limit is not None else scanner.to_table()
+        return DatasetStore.to_pandas(table)
+
+    def count(self, query: Query) -> int:
+        rows = self._scanner(query, columns=[]).count_rows()
+        return min(rows, query.row_limit) if query.row_limit is not None else rows
+
+    def stats(self, query: Query) -> dict:
+        stats = RunningStats()
+        remaining = query.row_limit
+        for batch in self._scanner(query).to_batches():
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                batch = batch.slice(0, remaining)
+                remaining -= batch.num_rows
+            if batch.num_rows:
+                stats.update(batch.to_pandas())
+        return stats.to_dict()
+
+
+@backend('pandas')
+class PandasBackend:
+    """Eager fallback, reads the projected columns and filters in memory."""
+
+    def _frame(self, query: Query) -> pd.DataFrame:
+        columns = query.columns
+        if columns is not None:
+            # Filter columns are read too, they are dropped again after filtering
+            columns = list(dict.fromkeys(columns + [column for column, _, _ in query.filters]))
+        df = DatasetStore.to_pandas(pq.read_table(query.path, columns=columns))
+        for column, op, value in query.filters:
+            values = df[column]
+            if op == 'is null':
+                mask = values.isna()
+            elif op == 'not null':
+                mask = values.notna()
+            elif op == 'in':
+                mask = values.isin(list(value))
+            else:
+                mask = OPERATORS[op](values, value)
+            df = df[mask.fillna(False).astype(bool)]
+        if query.columns is not None:
+            df = df[query.columns]
+        return df.head(query.row_limit) if query.row_limit is not None else df
+
+    def collect(self, query: Query) -> pd.DataFrame:
+        return self._frame(query)
+
+    def count(self, query: Query) -> int:
+        return len(self._frame(query))
+
+    def stats(self, query: Query) -> dict:
+        return RunningStats().update(self._frame(query)).to_dict()
+
+
+class QueryEngine:
+    """
+    Entry point of the lazy queries, ``query_engine.scan(file_record)``.
+
+    Parameters:
+
+    backend_name : (str) : Registered backend, ``settings.QUERY_BACKEND`` by default.
+                   An unknown backend falls back to pandas.
+    """
+
+    def __init__(self, backend_name=None):
+        name = backend_name or getattr(settings, 'QUERY_BACKEND', 'arrow')
+        if name not in BACKENDS:
+            logger.warning(f"Unknown query backend '{name}', using pandas")
+            name = 'pandas'
+        self.backend = BACKENDS[name]()
+
+    def scan(self, file_record, store=None) -> Query:
+        """Lazy query over the stored copy of an uploaded dataset."""
+        try:
+            store = store or DatasetStore()
+            return self.scan_path(store.full_path(file_record.file_path))
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def scan_path(self, path) -> Query:
+        return Query(self, path)
+
+
+# Shared per-process instance
+query_engine = QueryEngine()
@@ -0,0 +1,235 @@
+"""
+Regression trendlines fitted from sufficient statistics.
+
+    ols  : straight line, closed form least squares
+    poly : polynomial of ``degree`` (up to ``MAX_DEGREE``)
+    lowess : locally weighted linear fit (``frac`` of the rows per fit)
+
+Least squares fits only need the power sums of x (up to ``2 * degree``) and
+the sums of ``x**k * y``, one pass over the rows; x is standardized first so
+the normal equations stay well conditioned. Coefficients, R² and a
+confidence band of the fitted mean come back as data. LOWESS runs on
+``LOWESS_BINS`` quantile bins of x (bin means weighted by their row counts)
+instead of one local fit per row, R² is taken from the residuals of every
+row. Fits of frames handed out by the DataFrame cache are kept per dataset
+version, re-rendering a trendline does not refit it.
+"""
+#base library
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from numpy.polynomial import Polynomial
+from scipy.stats import t as t_distribution
+
+#app Modules
+from exception import CustomException
+from source.components.data_cache import dataset_key
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('ols', 'poly', 'lowess')
+MAX_DEGREE = 5
+GRID_POINTS = 200       # points of the drawn line and band
+LOWESS_BINS = 200
+LOWESS_FRAC = 2 / 3     # statsmodels' default
+QUANTILE_SAMPLE = 100_000   # rows the LOWESS quantile edges are taken from
+LOOKUP_CELLS = 1 << 16      # equal width cells mapping rows to LOWESS bins
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.astype('int64').to_numpy(dtype='float64')
+        # NaT has no integer value, its placeholder (0 or the smallest int64) is masked
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _least_squares(x: np.ndarray, y: np.ndarray, degree: int, level: float, grid: np.ndarray) -> dict:
+    """Polynomial fit from the power sums of the standardized x."""
+    n = len(x)
+    terms = degree + 1
+    if n <= terms:
+        raise ValueError(f'Need more than {terms} rows for a degree {degree} fit')
+    center, scale = x.mean(), x.std()
+    scale = scale if scale > 0 else 1.0
+    z = (x - center) / scale
+    # y is centered too, the residual sum below would otherwise cancel against a large mean
+    offset = y.mean()
+    y = y - offset
+
+    # Power sums z**0 .. z**(2 * degree) and z**k * y
+    moments, cross, power = np.empty(2 * degree + 1), np.empty(terms), np.ones(n)
+    for k in range(2 * degree + 1):
+        moments[k] = power.sum()
+        if k < terms:
+            cross[k] = power @ y
+        power *= z
+    gram = moments[np.add.outer(np.arange(terms), np.arange(terms))]
+    inverse = np.linalg.pinv(gram)
+    beta = inverse @ cross
+
+    centered_total = y @ y
+    residual = max(centered_total - beta @ cross, 0.0)
+    r2 = 1.0 - residual / centered_total if centered_total > 0 else float('nan')
+    sigma2 = residual / (n - terms)
+    beta[0] += offset
+
+    grid_z = (grid - center) / scale
+    basis = np.vander(grid_z, terms, increasing=True)
+    fit = basis @ beta
+    se = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', basis, inverse, basis) * sigma2, 0.0))
+    margin = t_distribution.ppf((1 + level) / 2, n - terms) * se
+    # Coefficients of x itself (intercept first): beta is a polynomial of (x - center) / scale
+    coefficients = Polynomial(beta)(Polynomial([-center / scale, 1 / scale])).coef
+    coefficients = np.pad(coefficients, (0, terms - len(coefficients)))
+    return {'coefficients': coefficients.tolist(), 'r2': float(r2), 'fit': fit, 'lower': fit - margin, 'upper': fit + margin}
+
+
+def _lowess(x: np.ndarray, y: np.ndarray, frac: float) -> dict:
+    """Binned LOWESS, see the module doc."""
+    # The head of the rows is checked first, the full pass only runs for few distinct values
+    if len(np.unique(x[:LOWESS_BINS * 50])) <= LOWESS_BINS and len(pd.unique(x)) <= LOWESS_BINS:
+        # Few distinct values (codes, years, ...) are bins of their own
+        codes, uniques = pd.factorize(x)
+        rank = np.empty(len(uniques), dtype=np.int64)
+        rank[np.argsort(uniques)] = np.arange(len(uniques))
+        bins = rank[codes]
+        size = len(uniques)
+    else:
+        # Quantile edges (of a sample) follow the rows, the equal width ones cap the width of the tail bins
+        step = max(1, len(x) // QUANTILE_SAMPLE)
+        edges = np.union1d(np.quantile(x[::step], np.linspace(0, 1, LOWESS_BINS + 1)),
+                           np.linspace(x.min(), x.max(), LOWESS_BINS + 1))
+        # Rows find their bin through a fine equal width grid instead of a search per row
+        low, width = edges[0], (edges[-1] - edges[0]) / LOOKUP_CELLS
+        cells = np.minimum(((x - low) / width).astype(np.int64), LOOKUP_CELLS - 1)
+        lookup = np.clip(np.searchsorted(edges, low + width * np.arange(LOOKUP_CELLS), side='right') - 1,
+                         0, len(edges) - 2)
+        bins = lookup[cells]
+        size = len(edges) - 1
+    if size < 2:
+        raise ValueError('Need at least two distinct x values for a LOWESS fit')
+
+    counts = np.bincount(bins, minlength=size).astype(np.float64)
+    used = counts > 0
+    # Sufficient statistics of every bin, the local fits see the spread of x inside a bin
+    sx, sy, sxx, sxy = (np.bincount(bins, weights, size)[used] for weights in (x, y, x * x, x * y))
+    counts = counts[used]
+    centers = sx / counts
+    bins = (np.cumsum(used) - 1)[bins]
+
+    # Bandwidth of every bin: distance within which ``frac`` of the rows lie
+    distance = np.abs(centers[:, None] - centers[None, :])
+    order = np.argsort(distance, axis=1)
+    reach = np.cumsum(counts[order], axis=1) >= frac * counts.sum()
+    nearest = np.take_along_axis(distance, order, axis=1)[np.arange(len(centers)), reach.argmax(axis=1)]
+    bandwidth = np.maximum(nearest, np.finfo(float).eps) * 1.0001
+    kernel = np.clip(1 - (distance / bandwidth[:, None]) ** 3, 0, None) ** 3
+
+    # Weighted local line at every bin center, the tricube weight of a row is the one of its bin
+    w, wx, wy, wxx, wxy = (kernel @ stat for stat in (counts, sx, sy, sxx, sxy))
+    x_mean, y_mean = wx / w, wy / w
+    variance = wxx - wx * x_mean
+    slope = np.where(variance > 0, (wxy - wx * y_mean) / np.where(variance > 0, variance, 1.0), 0.0)
+    fit = y_mean + slope * (centers - x_mean)
+
+    # Every row is fitted by the local line of its bin
+    residual = y - fit[bins] - slope[bins] * (x - centers[bins])
+    centered_total = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - (residual @ residual) / centered_total if centered_total > 0 else float('nan')
+    return {'coefficients': None, 'r2': float(r2), 'grid': centers, 'fit': fit, 'lower': None, 'upper': None}
+
+
+class RegressionEngine:
+    """Trendline fits, see the module doc."""
+
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._fits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fit(self, df: pd.DataFrame, x, y, kind='ols', degree=2, frac=None, level=0.95) -> dict:
+        """
+        Trendline of ``y`` over ``x``, rows missing either value are left out.
+
+        Parameters:
+
+        kind : (str) : 'ols', 'poly' or 'lowess'.
+        degree : (int) : Polynomial degree of 'poly'.
+        frac : (float) : Share of the rows of every LOWESS fit, ``LOWESS_FRAC`` by default.
+        level : (float) : Confidence level of the band.
+
+        Returns:
+            dict : {'kind', 'n', 'coefficients' (intercept first, None for lowess), 'r2',
+                    'x', 'fit', 'lower', 'upper' (band arrays, None for lowess)}, 'x' holds
+                   datetimes when the x column does.
+        """
+        try:
+            if kind not in KINDS:
+                raise ValueError(f"Unknown trendline '{kind}', expected one of {list(KINDS)}")
+            degree = 1 if kind == 'ols' else int(degree)
+            if not 1 <= degree <= MAX_DEGREE:
+                raise ValueError(f'Polynomial degree must be between 1 and {MAX_DEGREE}')
+            frac = frac or LOWESS_FRAC
+
+            key = dataset_key(df)
+            key = (key, x, y, kind, degree, frac, level) if key is not None else None
+            result = self._cached(key)
+            if result is not None:
+                return result
+
+            x_values, y_values = _as_float(df[x]), _as_float(df[y])
+            valid = np.isfinite(x_values) & np.isfinite(y_values)
+            x_values, y_values = x_values[valid], y_values[valid]
+            if kind == 'lowess':
+                result = _lowess(x_values, y_values, frac)
+                grid = result.pop('grid')
+            else:
+                grid = np.linspace(x_values.min(), x_values.max(), GRID_POINTS) if len(x_values) else np.empty(0)
+                result = _least_squares(x_values, y_values, degree, level, grid)
+            if pd.api.types.is_datetime64_any_dtype(df[x]):
+                grid = pd.to_datetime(grid.astype('int64'), unit=df[x].dt.unit)
+            result.update({'kind': kind, 'n': int(valid.sum()), 'x': grid})
+            self._remember(key, result)
+            return result
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    @staticmethod
+    def equation(result: dict, x='x', y='y') -> str:
+        """Hover label of a fit, e.g. 'y = 2.1 * x + 0.5'."""
+        if result['coefficients'] is None:
+            return f"LOWESS trendline<br>R²={result['r2']:.4f}"
+        terms = []
+        for power, coefficient in reversed(list(enumerate(result['coefficients']))):
+            name = '' if power == 0 else f' * {x}' if power == 1 else f' * {x}^{power}'
+            terms.append(f'{coefficient:.6g}{name}')
+        return f"{result['kind'].upper()} trendline<br>{y} = {' + '.join(terms)}<br>R²={result['r2']:.4f}"
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            result = self._fits.get(key)
+            if result is not None:
+                self._fits.move_to_end(key)
+            return result
+
+    def _remember(self, key, result):
+        if key is None:
+            return
+        with self._lock:
+            self._fits[key] = result
+            while len(self._fits) > self.max_items:
+                self._fits.popitem(last=False)
+
+
+# Shared per-process instance
+regression_engine = RegressionEngine()
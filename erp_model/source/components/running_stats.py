@@ -0,0 +1,79 @@
+#base library
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """
+    Column statistics accumulated chunk by chunk while a dataset is streamed in.
+
+    Keeps per column the non-null count and null count, and for numeric columns
+    min, max, mean and M2 (sum of squared deviations). Chunk results are merged
+    with Chan's parallel variance formula, so the result equals a full scan.
+    Columns that turn out to hold text in a later chunk only keep their counts.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            series = chunk[col]
+            stats = self.columns.setdefault(str(col), {'count': 0, 'nulls': 0})
+            nulls = int(series.isna().sum())
+            stats['nulls'] += nulls
+            count = len(series) - nulls
+
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy(dtype='float64', na_value=np.nan)
+                values = values[~np.isnan(values)]
+                if values.size:
+                    self.merge_numeric(stats, values)
+            elif count:
+                # Text in a numeric column, the store keeps the column as text
+                stats['text'] = True
+            stats['count'] += count
+        return self
+
+    @staticmethod
+    def merge_numeric(stats: dict, values: np.ndarray):
+        """Merges a block of non-null floats into ``stats`` (numeric_count, mean, m2, min, max)."""
+        n_b = values.size
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        min_b, max_b = float(values.min()), float(values.max())
+
+        n_a = stats.get('numeric_count', 0)
+        if n_a == 0:
+            stats.update(numeric_count=n_b, mean=mean_b, m2=m2_b, min=min_b, max=max_b)
+            return
+
+        n = n_a + n_b
+        delta = mean_b - stats['mean']
+        stats['mean'] += delta * n_b / n
+        stats['m2'] += m2_b + delta ** 2 * n_a * n_b / n
+        stats['numeric_count'] = n
+        stats['min'] = min(stats['min'], min_b)
+        stats['max'] = max(stats['max'], max_b)
+
+    def to_dict(self) -> dict:
+        """JSON friendly summary: rows plus per column count, nulls and numeric moments."""
+        columns = {}
+        for col, stats in self.columns.items():
+            summary = {'count': stats['count'], 'nulls': stats['nulls']}
+            n = stats.get('numeric_count', 0)
+            if n and not stats.get('text'):
+                variance = stats['m2'] / (n - 1) if n > 1 else 0.0
+                summary.update(
+                    min=stats['min'],
+                    max=stats['max'],
+                    mean=stats['mean'],
+                    variance=variance,
+                    std=math.sqrt(variance),
+                )
+            columns[col] = summary
+        return {'rows': self.rows, 'columns': columns}
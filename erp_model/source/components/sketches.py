@@ -0,0 +1,276 @@
+#base library
+import base64
+import functools
+import json
+import logging
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+#app Modules
+from exception import CustomException
+
+logger = logging.getLogger(__name__)
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-null values of a column."""
+    return pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy(dtype=np.uint64)
+
+
+#-----------------------------------------------------------
+#---- Quantiles: KLL sketch --------------------------------
+#-----------------------------------------------------------
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang, Liberty). Level ``h`` holds items of
+    weight ``2**h``; a full level is sorted and every other item is promoted.
+    Rank error is about ``1.7 / k`` of the item count.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item stays behind, the rest is halved with a random offset
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(0, 2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        self.n += values.size
+        # Large blocks are fed in slices so level 0 never holds more than a few capacities
+        step = max(self.k * 4, 1)
+        for start in range(0, values.size, step):
+            self.levels[0] = np.concatenate([self.levels[0], values[start:start + step]])
+            self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch'):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q):
+        """Approximate quantile(s) for ``q`` in [0, 1]."""
+        values, weights = self._weighted()
+        if not values.size:
+            return np.nan
+        cumulative = np.cumsum(weights)
+        targets = np.asarray(q, dtype='float64') * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, targets, side='left'), values.size - 1)
+        result = values[index]
+        return float(result) if np.ndim(result) == 0 else result.tolist()
+
+    def rank(self, x) -> float:
+        """Approximate fraction of items strictly below ``x``."""
+        values, weights = self._weighted()
+        if not values.size:
+            return 0.0
+        return float(weights[values < x].sum() / weights.sum())
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data['k'])
+        sketch.n = data['n']
+        sketch.levels = [np.asarray(items, dtype='float64') for items in data['levels']]
+        return sketch
+
+
+#-----------------------------------------------------------
+#---- Distinct counts: HyperLogLog -------------------------
+#-----------------------------------------------------------
+class HyperLogLog:
+    """Mergeable distinct-count sketch, standard error about ``1.04 / sqrt(2**p)`` (1.6% at p=12)."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        if not hashes.size:
+            return self
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Remaining bits (< 2**52) are exact in float64, frexp gives their bit length
+        _, bit_length = np.frexp(rest.astype('float64'))
+        rank = ((64 - self.p) - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, series: pd.Series):
+        return self.update_hashes(hash_values(series))
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype('float64')))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_dict(self):
+        return {'p': self.p, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(p=data['p'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+#-----------------------------------------------------------
+#---- Heavy hitters: Misra-Gries summary -------------------
+#-----------------------------------------------------------
+class HeavyHitters:
+    """
+    Mergeable frequent-items summary (Misra-Gries, the deterministic form of
+    space-saving) keeping ``k`` counters. Counts are lower bounds, under-counted
+    by at most ``n / (k + 1)``.
+    """
+
+    def __init__(self, k=64):
+        self.k = k
+        self.n = 0
+        self.counters = {}
+
+    def _add_counts(self, counts: dict, n: int):
+        self.n += n
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + int(count)
+        if len(self.counters) > self.k:
+            threshold = sorted(self.counters.values(), reverse=True)[self.k]
+            self.counters = {value: count - threshold
+                             for value, count in self.counters.items() if count > threshold}
+
+    def update(self, series: pd.Series):
+        counts = series.dropna().astype(str).value_counts()
+        self._add_counts(counts.to_dict(), int(counts.sum()))
+        return self
+
+    def merge(self, other: 'HeavyHitters'):
+        self._add_counts(other.counters, other.n)
+        return self
+
+    def top(self, k=None):
+        items = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)
+        return items[:k] if k else items
+
+    def error_bound(self) -> int:
+        return self.n // (self.k + 1)
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'counters': self.counters}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data['k'])
+        sketch.n = data['n']
+        sketch.counters = dict(data['counters'])
+        return sketch
+
+
+#-----------------------------------------------------------
+#---- Per dataset bundle -----------------------------------
+#-----------------------------------------------------------
+class DatasetSketches:
+    """
+    Sketches of every column of one dataset, built chunk by chunk during
+    ingestion and stored as JSON next to the dataset file.
+    """
+
+    def __init__(self):
+        self.quantiles = {}
+        self.distinct = {}
+        self.heavy = {}
+
+    def update(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            name = str(col)
+            series = chunk[col]
+            self.distinct.setdefault(name, HyperLogLog()).update(series)
+            self.heavy.setdefault(name, HeavyHitters()).update(series)
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self.quantiles.setdefault(name, KLLSketch()).update(series.to_numpy(dtype='float64', na_value=np.nan))
+        return self
+
+    def to_dict(self):
+        return {
+            'quantiles': {col: sketch.to_dict() for col, sketch in self.quantiles.items()},
+            'distinct': {col: sketch.to_dict() for col, sketch in self.distinct.items()},
+            'heavy': {col: sketch.to_dict() for col, sketch in self.heavy.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = cls()
+        sketches.quantiles = {col: KLLSketch.from_dict(item) for col, item in data.get('quantiles', {}).items()}
+        sketches.distinct = {col: HyperLogLog.from_dict(item) for col, item in data.get('distinct', {}).items()}
+        sketches.heavy = {col: HeavyHitters.from_dict(item) for col, item in data.get('heavy', {}).items()}
+        return sketches
+
+    def save(self, path):
+        try:
+            with open(path, 'w') as file:
+                json.dump(self.to_dict(), file)
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as file:
+                return cls.from_dict(json.load(file))
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+
+@functools.lru_cache(maxsize=32)
+def load_sketches(path):
+    """Loads (and memoizes) the sketches stored at ``path``, None when the dataset has none."""
+    if not os.path.exists(path):
+        return None
+    return DatasetSketches.load(path)
@@ -0,0 +1,266 @@
+"""
+Versioned transformation log of the uploaded datasets.
+
+Every transformation of the interactive analysis is recorded as a
+``TransformStep`` on top of a parent version (0 is the ingested data). Step ids
+are the dataset versions, they are never reused, so caches keyed by
+``(dataset_id, version)`` never serve stale content.
+
+A step only stores what it changed (a ``Delta``): the replaced or added
+columns, the dropped columns and, for row filters, the kept row positions.
+A version is materialized lazily by replaying the deltas from its nearest
+cached ancestor; untouched columns are shared with the parent frame
+(copy-on-write), so a step touching one column never rewrites the others.
+Undo, redo and branching only move the version pointer kept in the session.
+"""
+#base library
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+#django library
+from django.conf import settings
+
+#app Modules
+from exception import CustomException
+from source.components.data_cache import dataframe_cache, load_dataset, tag_dataset
+from source.components.data_store import DatasetStore
+from source.components.duplicates import duplicate_engine
+from source.components.outliers import outlier_engine
+
+logger = logging.getLogger(__name__)
+
+# operation name -> function(df, **params) returning a Delta
+OPERATIONS = {}
+
+
+def operation(name):
+    """Registers a function as a transformation step."""
+    def register(func):
+        OPERATIONS[name] = func
+        return func
+    return register
+
+
+class Delta:
+    """
+    Change made by one step to its parent frame.
+
+    Parameters:
+
+    columns : (dict) : Replaced or added columns, aligned with the rows after ``rows`` is applied.
+    dropped : (list) : Columns removed from the frame.
+    rows : (np.ndarray | None) : Positions of the kept rows, None keeps every row.
+    """
+
+    def __init__(self, columns=None, dropped=None, rows=None):
+        self.columns = dict(columns or {})
+        self.dropped = list(dropped or [])
+        self.rows = None if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Returns the child frame, unchanged columns are shared with ``df``."""
+        out = df.iloc[self.rows] if self.rows is not None else df.copy(deep=False)
+        if self.dropped:
+            out = out.drop(columns=self.dropped)
+        for col, values in self.columns.items():
+            # Aligned by position, stored deltas come back with a fresh index
+            out[col] = pd.Series(values).set_axis(out.index)
+        return out
+
+    #---- Disk format: changed columns as Parquet, kept rows as .npy ----#
+    def save(self, store: DatasetStore, name: str):
+        try:
+            if self.columns:
+                store.write(pd.DataFrame({col: pd.Series(values).reset_index(drop=True)
+                                          for col, values in self.columns.items()}), f'{name}.parquet')
+            if self.rows is not None:
+                np.save(store.full_path(f'{name}.rows.npy'), self.rows)
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    @classmethod
+    def load(cls, store: DatasetStore, name: str, dropped=None):
+        try:
+            columns = store.read(f'{name}.parquet') if store.exists(f'{name}.parquet') else None
+            rows_path = store.full_path(f'{name}.rows.npy')
+            rows = np.load(rows_path) if rows_path.exists() else None
+            return cls({col: columns[col] for col in columns.columns} if columns is not None else None,
+                       dropped, rows)
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+
+#-----------------------------------------------------------
+#---- Operations -------------------------------------------
+#-----------------------------------------------------------
+@operation('auto_correct_datatypes')
+def auto_correct_datatypes(df: pd.DataFrame, source_path=None):
+    """Type inference of the text columns, only converted columns end up in the delta."""
+    from source.components.data_transformation import ColumnTranformer
+
+    corrected, _ = ColumnTranformer().auto_correct_datatypes(df, source_path=source_path)
+    return Delta({col: corrected[col] for col in df.columns if corrected[col].dtype != df[col].dtype})
+
+
+@operation('fill_missing')
+def fill_missing(df: pd.DataFrame, column, method='mean'):
+    """Fills the missing values of one column (mean, median, mode) or drops its incomplete rows (drop)."""
+    from source.components.data_transformation import ColumnTranformer
+
+    if method == 'drop':
+        return Delta(rows=np.flatnonzero(df[column].notna().to_numpy()))
+    return Delta({column: ColumnTranformer().handle_missing(df, column, method)})
+
+
+@operation('drop_duplicates')
+def drop_duplicates(df: pd.DataFrame, columns=None, near=None, threshold=None):
+    """
+    Keeps the first occurrence of every duplicated row (on ``columns`` or all
+    columns), names in the ``near`` columns are matched loosely.
+    """
+    return Delta(rows=np.flatnonzero(~duplicate_engine.duplicated(df, columns or None, near or (), threshold)))
+
+
+@operation('clip_outliers')
+def clip_outliers(df: pd.DataFrame, column, factor=None, method='iqr'):
+    """
+    Clips one numeric column to the outlier bounds of ``method`` (Tukey fences
+    ``[Q1 - factor*IQR, Q3 + factor*IQR]`` by default), see ``OutlierEngine``.
+    """
+    values = df[column]
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        raise ValueError(f"Column '{column}' is not numeric")
+    report = outlier_engine.detect(df, [column], method, factor)['columns'][column]
+    return Delta({column: values.clip(report['lower'], report['upper'])})
+
+
+#-----------------------------------------------------------
+#---- Log --------------------------------------------------
+#-----------------------------------------------------------
+class TransformLog:
+    """
+    Records steps and materializes dataset versions.
+
+    Materialized versions live in the memory tier of the DataFrame cache, the
+    deltas on disk are shared by the web and job worker processes. A recorded
+    version is always built from the stored delta, so it has the dtypes of the
+    store's backend whether it is served from memory or rebuilt.
+
+    Parameters:
+
+    cache : (DataFrameCache | None) : Cache of the materialized versions.
+    root : (str | Path | None) : Directory of the step deltas, ``settings.TRANSFORM_LOG_DIR`` by default.
+    """
+
+    def __init__(self, cache=None, root=None):
+        self.cache = cache or dataframe_cache
+        root = root or getattr(settings, 'TRANSFORM_LOG_DIR', None) or Path(settings.DATASET_STORE_DIR) / 'steps'
+        self.store = DatasetStore(root=root)
+
+    @staticmethod
+    def _name(step) -> str:
+        return f'{step.uploaded_file_id}-s{step.id}'
+
+    def record(self, file_record, parent, name, params=None, user=None, **options):
+        """
+        Applies operation ``name`` to version ``parent`` and stores it as a new step.
+
+        Parameters:
+
+        file_record : (UploadedFile) : Dataset the step belongs to.
+        parent : (int) : Version the operation is applied to, 0 for the ingested data.
+        params : (dict) : Operation arguments, stored with the step.
+        options : Extra arguments that do not change the result (e.g. ``source_path``), not stored.
+
+        Returns:
+            TransformStep : the new step, ``step.id`` is the new version.
+        """
+        from erp_app.models import TransformStep
+
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown transformation '{name}'")
+        params = dict(params or {})
+        df = self.materialize(file_record, parent)
+        if df is None:
+            raise ValueError('Dataset is no longer available, please upload the file again.')
+
+        delta = OPERATIONS[name](df, **params, **options)
+        try:
+            step = TransformStep.objects.create(
+                uploaded_file=file_record, user=user or file_record.user, parent_id=parent or None,
+                operation=name, params=params, columns=[str(col) for col in delta.columns],
+                dropped=delta.dropped, rows_before=len(df),
+                rows_after=len(delta.rows) if delta.rows is not None else len(df))
+            self.store.root.mkdir(parents=True, exist_ok=True)
+            delta.save(self.store, self._name(step))
+            # Cached as read back from disk, a cold rebuild gives the same dtypes
+            delta = Delta.load(self.store, self._name(step), delta.dropped)
+            self.cache.put(file_record.dataset_id, step.id, delta.apply(df))
+            logger.info(f'{name} recorded as version {step.id} of dataset {file_record.id} '
+                        f'({len(delta.columns)} columns changed)')
+            return step
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def lineage(self, file_record, version):
+        """Steps from the ingested data down to ``version``, empty for version 0."""
+        from erp_app.models import TransformStep
+
+        steps = {step.id: step for step in TransformStep.objects.filter(uploaded_file=file_record)}
+        chain = []
+        version = int(version or 0)
+        while version:
+            if version not in steps:
+                return None
+            chain.append(steps[version])
+            version = steps[version].parent_id or 0
+        return chain[::-1]
+
+    def materialize(self, file_record, version=0):
+        """
+        Returns dataset ``version``, replaying the deltas of the steps below its
+        nearest cached ancestor. None when the version does not exist.
+        """
+        version = int(version or 0)
+        if not version:
+            return load_dataset(file_record)
+        df = self.cache.get(file_record.dataset_id, version)
+        if df is not None:
+            return df
+
+        chain = self.lineage(file_record, version)
+        if chain is None:
+            return None
+        start = 0
+        for position in range(len(chain) - 1, -1, -1):
+            df = self.cache.get(file_record.dataset_id, chain[position].id)
+            if df is not None:
+                start = position + 1
+                break
+        else:
+            df = load_dataset(file_record)
+        if df is None:
+            return None
+
+        try:
+            for step in chain[start:]:
+                df = Delta.load(self.store, self._name(step), step.dropped).apply(df)
+                self.cache.put(file_record.dataset_id, step.id, df)
+            logger.info(f'Version {version} of dataset {file_record.id} rebuilt from {len(chain) - start} step(s)')
+            return tag_dataset(df.copy(deep=False), self.cache.key(file_record.dataset_id, version))
+        except Exception as e:
+            raise CustomException(e, sys) #type: ignore
+
+    def history(self, file_record):
+        """Every step of a dataset (all branches), oldest first."""
+        from erp_app.models import TransformStep
+
+        return list(TransformStep.objects.filter(uploaded_file=file_record).order_by('id'))
+
+
+# Shared per-process instance
+transform_log = TransformLog()
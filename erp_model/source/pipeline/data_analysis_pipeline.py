@@ -4,5 +4,68 @@ import logging
 import sys
 import pandas as pd
 import numpy as np
-from components import data_analysis
+from source.components import data_analysis, data_transformation
 
+logger = logging.getLogger(__name__)
+datainfo = data_transformation.DataInfo()
+univariate = data_analysis.UniVariate()
+bivariate_num = data_analysis.BiVariateNumerical()
+bivariate_cat = data_analysis.BiVariateCategorical()
+multivariate = data_analysis.MultiVariate()
+
+
+def build_figure(request, df: pd.DataFrame, analysis_type: str, columns: list, visual: str = None, theme: str = None):
+    """
+    Picks a chart for the selected analysis type and columns and builds it.
+
+    Parameters:
+
+    analysis_type : (str) : 'univariate', 'bivariate' or 'multivariate'.
+    columns : (list) : Selected columns, the chart depends on their data types.
+    visual : (str | None) : Chart name understood by the analysis class, a default is chosen when None.
+    theme : (str | None) : Plotly template, ``settings.PLOT_THEME`` when None.
+    """
+    try:
+        if not columns:
+            raise ValueError("Select at least one column.")
+        kinds = datainfo.get_datatype(df[columns])
+        numeric = [col for col in columns if col in kinds['Numeric']]
+        categorical = [col for col in columns if col in kinds['Categorical']]
+        datetime = [col for col in columns if col in kinds['DateTime']]
+
+        if analysis_type == 'univariate':
+            column = columns[0]
+            if not visual:
+                visual = 'Histogram' if column in numeric else 'Line_sorted' if column in datetime else 'Bar'
+            return univariate.Visualization(request, df, column, visual, theme=theme)
+
+        if analysis_type == 'bivariate':
+            if len(columns) < 2:
+                raise ValueError("Bivariate analysis needs two columns.")
+            if len(numeric) >= 2:
+                return bivariate_num.Visualization(df, visual or 'Scatter', numeric[0], numeric[1], theme=theme)
+            if numeric and categorical:
+                # dtype labels expected by BiVariateCategorical, categorical column on the x axis
+                return bivariate_cat.Visualization(
+                    df, [categorical[0], numeric[0]], ['object', 'float64'], visual or 'Bar', theme=theme)
+            if len(categorical) >= 2:
+                return bivariate_cat.Visualization(
+                    df, categorical[:2], ['object', 'object'], visual or 'Stacked Bar', theme=theme)
+
+        if analysis_type == 'multivariate':
+            if len(numeric) >= 2 and categorical:
+                return multivariate.scatter_color(request, df, numeric[0], numeric[1], categorical[0], theme=theme)
+            if len(numeric) >= 3:
+                return multivariate.bubble(request, df, numeric[0], numeric[1], numeric[2], theme=theme)
+            if len(categorical) >= 2 and numeric:
+                return multivariate.grouped_bar(request, df, categorical[0], categorical[1], numeric[0], theme=theme)
+            if datetime and numeric and categorical:
+                return multivariate.line_time_group(request, df, datetime[0], numeric[0], categorical[0], theme=theme)
+            if len(categorical) >= 2:
+                return multivariate.association_heatmap(request, df, categorical, theme=theme)
+
+        logger.info(f'No chart for {analysis_type} on {columns}')
+        return None
+
+    except Exception as e:
+        raise CustomException(e, sys) #type: ignore
@@ -1,6 +1,7 @@
-import exception
+from source.components import excel_reader
 from source.components.data_ingestion import DataIngestion
 import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.contrib import messages
@@ -13,14 +14,34 @@ ingestion = DataIngestion()
 
 from erp_app.models import UploadedFile
 
-def ingest_data(request, uploaded_file, file_bytes):
+def ingest_data(request, uploaded_file, file_bytes=None):
+    """
+    Ingests an upload through ``DataIngestion``, so it is deduplicated by the same
+    content keys (one per sheet for workbooks) and stored with its summary and
+    sketches. Every sheet of a workbook becomes a dataset.
+    """
     try:
+        if file_bytes is not None:
+            uploaded_file = SimpleUploadedFile(uploaded_file.name, file_bytes)
+        if uploaded_file.name.endswith('.xlsx'):
+            workbook, path, content_hash = ingestion.stage_workbook(uploaded_file)
+            try:
+                sheets = excel_reader.sheet_names(path)
+            except Exception:
+                path.unlink(missing_ok=True)
+                raise
+            return ingestion.ingest_sheets(request, workbook, uploaded_file.name, sheets, content_hash)
+
+        # Identical content is stored once, later uploads reuse the stored copy
+        content_hash = ingestion.content_hash(uploaded_file)
+        meta = ingestion.find_stored(content_hash) or ingestion.store_upload(uploaded_file)
         uploaded_record = UploadedFile.objects.create(
             name=uploaded_file.name,
             user=request.user,
-            data=file_bytes
+            content_hash=content_hash,
+            **meta
         )
         request.session['uploaded_file_id'] = uploaded_record.id
         return 
-    except exception as e:
+    except Exception as e:
         raise CustomException(e, sys) #type: ignore
\ No newline at end of file